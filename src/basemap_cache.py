@@ -0,0 +1,126 @@
+import hashlib
+import math
+import os
+from collections import OrderedDict
+from typing import Sequence, Tuple
+import numpy as np
+import cartopy.crs as ccrs
+import cartopy.feature as cfeature
+import matplotlib.image as mpimg
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Каталог растровых подложек карты
+CACHE_DIR = os.path.join("work", "data", "basemaps")
+# Версия оформления: при изменении стиля старые файлы перестают использоваться
+CACHE_VERSION = 1
+# Ширина подложки округляется вверх до этого шага, чтобы не плодить файлы при resize
+SIZE_STEP = 256
+# Количество подложек, хранимых в памяти (остальные читаются из PNG на диске)
+MEMORY_CACHE_SIZE = 4
+
+# Цвета подложки по темам
+THEMES = {
+    'dark': {
+        'background': '#1e1e1e',
+        'land': '#2d2d2d',
+        'ocean': '#1a1a2e',
+        'coastline': '#4d4d4d',
+        'borders': '#4d4d4d'
+    }
+}
+
+# Недавно использованные подложки {ключ: RGBA-массив} в порядке обращения
+_memory_cache: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+
+
+def basemap_size(extent: Sequence[float], width: float) -> Tuple[int, int]:
+    """
+    Размер растра подложки для области карты
+
+    :param extent: Границы [lon_min, lon_max, lat_min, lat_max]
+    :param width: Ширина области осей на экране (пиксели)
+    :return: (ширина, высота) в пикселях
+    """
+    width = max(SIZE_STEP, int(math.ceil(width / SIZE_STEP)) * SIZE_STEP)
+    lon_span = extent[1] - extent[0]
+    lat_span = extent[3] - extent[2]
+    return width, max(1, int(round(width * lat_span / lon_span)))
+
+
+def basemap_key(projection: ccrs.Projection, extent: Sequence[float],
+                size: Tuple[int, int], theme: str) -> str:
+    """Ключ подложки: проекция, границы, размер и тема"""
+    extent_text = ",".join(f"{value:.4f}" for value in extent)
+    text = (f"{CACHE_VERSION}|{projection.proj4_init}|{extent_text}|"
+            f"{size[0]}x{size[1]}|{theme}")
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def render_basemap(projection: ccrs.Projection, extent: Sequence[float],
+                   size: Tuple[int, int], theme: str) -> np.ndarray:
+    """
+    Отрисовка подложки (суша, океан, береговая линия, границы) в растр
+
+    :return: RGBA-массив размером (высота, ширина, 4)
+    """
+    colors = THEMES[theme]
+    dpi = 100
+    figure = Figure(figsize=(size[0] / dpi, size[1] / dpi), dpi=dpi,
+                    facecolor=colors['background'])
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_axes([0, 0, 1, 1], projection=projection)
+    ax.set_axis_off()
+    ax.set_facecolor(colors['background'])
+    ax.add_feature(cfeature.LAND, facecolor=colors['land'])
+    ax.add_feature(cfeature.OCEAN, facecolor=colors['ocean'])
+    ax.add_feature(cfeature.COASTLINE, edgecolor=colors['coastline'], linewidth=0.8)
+    ax.add_feature(cfeature.BORDERS, linestyle=':',
+                   edgecolor=colors['borders'], linewidth=0.5)
+    ax.set_extent(extent, crs=ccrs.PlateCarree())
+    # Растр должен точно совпадать с границами, без сохранения пропорций
+    ax.set_aspect('auto')
+    ax.set_position([0, 0, 1, 1])
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba()).copy()
+
+
+def get_basemap(projection: ccrs.Projection, extent: Sequence[float],
+                size: Tuple[int, int], theme: str = 'dark') -> np.ndarray:
+    """
+    Подложка из памяти, с диска или отрисованная заново (с сохранением в PNG)
+
+    :param projection: Проекция карты
+    :param extent: Границы [lon_min, lon_max, lat_min, lat_max]
+    :param size: (ширина, высота) растра в пикселях
+    :param theme: Название темы из THEMES
+    :return: RGBA-массив
+    """
+    key = basemap_key(projection, extent, size, theme)
+    image = _memory_cache.get(key)
+    if image is not None:
+        _memory_cache.move_to_end(key)
+        return image
+
+    path = os.path.join(CACHE_DIR, f"basemap_{key}.png")
+    if os.path.exists(path):
+        try:
+            # PNG читается как float32; в памяти растр хранится в uint8
+            image = (mpimg.imread(path) * 255).round().astype(np.uint8)
+        except Exception as e:
+            print(f"Ошибка чтения подложки {path}: {str(e)}")
+
+    if image is None:
+        image = render_basemap(projection, extent, size, theme)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = f"{path}.tmp.png"
+            mpimg.imsave(tmp_path, image)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Ошибка сохранения подложки {path}: {str(e)}")
+
+    _memory_cache[key] = image
+    while len(_memory_cache) > MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+    return image
@@ -0,0 +1,275 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import matplotlib.image as mpimg
+from PySide6.QtGui import QColor
+from ephemeris import (INERTIAL_ORBIT_HOURS, ground_track_window, inertial_orbit,
+                       propagate_buffer, time_grid, window_indices)
+from pyorbital.astronomy import gmst
+
+# Расширения файлов, которые записываются как видео (через ffmpeg)
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.avi', '.webm', '.gif')
+# Виды, которые можно отрисовать
+VIEWS = ('3d', '2d')
+
+
+def propagate_frames(satellites: Sequence, start: datetime, frame_count: int,
+                     step_seconds: float, depth: int,
+                     inertial: bool = False) -> List[Dict[str, Any]]:
+    """
+    Расчет положений всех спутников для всех кадров заранее.
+
+    Для каждого спутника одним векторным вызовом рассчитываются положения
+    на моменты всех кадров и минутный буфер трассы на весь интервал анимации
+    вместе с глубиной прогноза; при отрисовке кадра берутся только срезы.
+
+    :param satellites: Пропагаторы спутников (Satellite)
+    :param start: Момент первого кадра (datetime в UTC)
+    :param frame_count: Количество кадров
+    :param step_seconds: Шаг модельного времени между кадрами (с)
+    :param depth: Глубина прогноза трассы (мин)
+    :param inertial: Рассчитать также виток и положения в инерциальной системе
+    :return: Эфемериды спутников {'name', 'buffer', 'lons', 'lats', 'alts'
+             [, 'orbits', 'orbit_index', 'positions']}; витки рассчитываются
+             на каждые INERTIAL_ORBIT_HOURS, 'orbit_index' — номер витка кадра;
+             спутники с ошибкой расчета пропускаются
+    """
+    times = time_grid(start, frame_count, step_seconds)
+    # Виток обновляется так же, как в EphemerisCache: раз в INERTIAL_ORBIT_HOURS
+    orbit_index = (np.arange(frame_count) * step_seconds
+                   // (INERTIAL_ORBIT_HOURS * 3600)).astype(int)
+    minutes = int(np.ceil(frame_count * step_seconds / 60)) + depth
+    ephemerides = []
+    for sat in satellites:
+        try:
+            lons, lats, alts = sat.orb.get_lonlatalt(times)
+            ephemeris = {
+                'name': sat.name,
+                'buffer': propagate_buffer(sat, start, minutes),
+                'lons': np.asarray(lons),
+                'lats': np.asarray(lats),
+                'alts': np.asarray(alts)
+            }
+            if inertial:
+                ephemeris['orbits'] = [
+                    inertial_orbit(sat, start + timedelta(hours=block * INERTIAL_ORBIT_HOURS))
+                    for block in range(int(orbit_index[-1]) + 1 if frame_count else 0)]
+                ephemeris['orbit_index'] = orbit_index
+                ephemeris['positions'] = np.column_stack(
+                    sat.orb.get_position(times, normalize=False)[0])
+        except Exception as e:
+            print(f"Ошибка расчета траектории {sat.name}: {str(e)}")
+            continue
+        ephemerides.append(ephemeris)
+    return ephemerides
+
+
+class FrameWriter:
+    """
+    Запись кадров в каталог PNG или в видеофайл.
+
+    Видео кодируется внешним ffmpeg: кадры передаются в его stdin без
+    сохранения на диск, поэтому память не зависит от числа кадров.
+    """
+
+    def __init__(self, path: str, fps: float = 30.0):
+        self.path = path
+        self.fps = fps
+        self.count = 0
+        self._process = None
+        self.is_video = path.lower().endswith(VIDEO_EXTENSIONS)
+        if not self.is_video:
+            os.makedirs(path, exist_ok=True)
+
+    def write(self, frame: np.ndarray):
+        """Запись кадра (RGB-массив uint8)"""
+        if not self.is_video:
+            mpimg.imsave(os.path.join(self.path, f"frame_{self.count:06d}.png"), frame)
+        else:
+            if self._process is None:
+                self._process = self._open_video(frame.shape[1], frame.shape[0])
+            self._process.stdin.write(np.ascontiguousarray(frame).tobytes())
+        self.count += 1
+
+    def _open_video(self, width: int, height: int) -> subprocess.Popen:
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise RuntimeError("Для записи видео нужен ffmpeg в PATH; "
+                               "укажите каталог, чтобы сохранить кадры в PNG")
+        command = [ffmpeg, '-y', '-loglevel', 'error',
+                   '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{width}x{height}",
+                   '-r', str(self.fps), '-i', '-']
+        if not self.path.lower().endswith('.gif'):
+            # yuv420p требует четных размеров кадра
+            command += ['-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p']
+        return subprocess.Popen(command + [self.path], stdin=subprocess.PIPE)
+
+    def close(self):
+        if self._process is not None:
+            self._process.stdin.close()
+            if self._process.wait() != 0:
+                raise RuntimeError(f"Ошибка ffmpeg при записи {self.path}")
+            self._process = None
+
+
+def render_animation(satellites: Sequence, start: datetime, frame_count: int,
+                     step_seconds: float, output: str, view: str = '3d',
+                     inertial: bool = False, depth: int = 120,
+                     size: Tuple[int, int] = (1280, 720), fps: float = 30.0,
+                     station: Optional[Tuple[float, float]] = None,
+                     footprint_elevation: Optional[float] = None,
+                     colors: Optional[Sequence[QColor]] = None,
+                     progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Пакетная отрисовка анимации движения спутников без окна.
+
+    Используются те же виды, что и в приложении (Earth3DViewer, Map2DWidget),
+    в режиме без окна; модельное время идет с шагом step_seconds, все
+    положения рассчитываются заранее (propagate_frames). Нужен QApplication
+    (для работы без экрана — платформа Qt offscreen).
+
+    :param satellites: Пропагаторы спутников (Satellite)
+    :param start: Момент первого кадра (datetime в UTC)
+    :param frame_count: Количество кадров
+    :param step_seconds: Шаг модельного времени между кадрами (с)
+    :param output: Видеофайл (VIDEO_EXTENSIONS) или каталог для кадров PNG
+    :param view: '3d' или '2d'
+    :param inertial: 3D вид в инерциальной системе (ECI)
+    :param depth: Глубина прогноза трассы (мин)
+    :param size: (ширина, высота) кадра в пикселях
+    :param fps: Частота кадров видео
+    :param station: (широта, долгота) наземной станции
+    :param footprint_elevation: Минимальный угол места для зон видимости на 2D карте
+    :param colors: Цвета спутников (по умолчанию — равномерно по кругу оттенков)
+    :param progress: Функция (записано кадров, всего кадров)
+    :return: Количество записанных кадров
+    """
+    if view not in VIEWS:
+        raise ValueError(f"Неизвестный вид: {view}")
+    if colors is None:
+        colors = [QColor.fromHsv(int(360 * i / max(1, len(satellites))), 200, 255)
+                  for i in range(len(satellites))]
+    color_by_name = {sat.name: color for sat, color in zip(satellites, colors)}
+    inertial = inertial and view == '3d'
+    ephemerides = propagate_frames(satellites, start, frame_count, step_seconds,
+                                   depth, inertial)
+    station_lat, station_lon = station if station is not None else (None, None)
+
+    if view == '3d':
+        from d3_view import Earth3DViewer
+        widget = Earth3DViewer(off_screen=True, window_size=size)
+        if inertial:
+            widget.set_frame('eci')
+            angles = gmst(time_grid(start, frame_count, step_seconds))
+    else:
+        from map_view import Map2DWidget
+        widget = Map2DWidget()
+        widget.set_frame_size(*size)
+
+    writer = FrameWriter(output, fps)
+    try:
+        for index in range(frame_count):
+            now = start + timedelta(seconds=index * step_seconds)
+            frame_data = []
+            for ephemeris in ephemerides:
+                entry = {'name': ephemeris['name'], 'color': color_by_name[ephemeris['name']]}
+                if inertial:
+                    entry['orbit'] = ephemeris['orbits'][ephemeris['orbit_index'][index]]
+                    entry['position'] = ephemeris['positions'][index]
+                else:
+                    buffer = ephemeris['buffer']
+                    first, last = window_indices(buffer, now, depth)
+                    head = (ephemeris['lons'][index], ephemeris['lats'][index],
+                            ephemeris['alts'][index])
+                    if view == '2d':
+                        entry['lons'], entry['lats'] = ground_track_window(
+                            buffer, first, last, head[0], head[1])
+                        entry['alt'] = head[2]
+                    else:
+                        entry['lons'] = np.concatenate([[head[0]], buffer['lons'][first:last]])
+                        entry['lats'] = np.concatenate([[head[1]], buffer['lats'][first:last]])
+                        entry['alts'] = np.concatenate([[head[2]], buffer['alts'][first:last]])
+                frame_data.append(entry)
+
+            if view == '3d':
+                widget.update_view(frame_data, station_lon, station_lat,
+                                   float(angles[index]) if inertial else None)
+            else:
+                widget.update_plot(frame_data, station_lon, station_lat, footprint_elevation)
+            writer.write(widget.grab_frame())
+            if progress is not None:
+                progress(index + 1, frame_count)
+    finally:
+        writer.close()
+        if view == '3d':
+            widget.plotter.close()
+    return writer.count
+
+
+def _parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Отрисовка анимации движения спутников в видео или кадры PNG без окна")
+    parser.add_argument('output', help="Видеофайл (.mp4, .gif, ...) или каталог для кадров")
+    parser.add_argument('--norad', type=int, nargs='+', required=True,
+                        help="Номера NORAD спутников")
+    parser.add_argument('--start', help="Начало (ISO 8601, UTC); по умолчанию — текущий момент")
+    parser.add_argument('--frames', type=int, default=300, help="Количество кадров")
+    parser.add_argument('--step', type=float, default=60.0,
+                        help="Шаг модельного времени между кадрами (с)")
+    parser.add_argument('--view', choices=VIEWS, default='3d')
+    parser.add_argument('--eci', action='store_true', help="3D вид в инерциальной системе")
+    parser.add_argument('--depth', type=int, default=120, help="Глубина прогноза трассы (мин)")
+    parser.add_argument('--size', default='1280x720', help="Размер кадра ШИРИНАxВЫСОТА")
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--station', type=float, nargs=2, metavar=('LAT', 'LON'),
+                        help="Координаты наземной станции (градусы)")
+    parser.add_argument('--footprints', type=float, metavar='ELEVATION',
+                        help="Показывать зоны видимости на 2D карте (мин. угол места)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = _parse_args(argv)
+    # Окна не создаются: Qt работает без экрана
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PySide6.QtWidgets import QApplication
+    from database import get_database
+    app = QApplication.instance() or QApplication([])
+
+    start = datetime.now(timezone.utc)
+    if args.start:
+        start = datetime.fromisoformat(args.start)
+        start = start.replace(tzinfo=timezone.utc) if start.tzinfo is None else start
+    width, height = (int(value) for value in args.size.lower().split('x'))
+
+    db = get_database()
+    satellites = []
+    for norad_id in args.norad:
+        sat = db.get_satellite_at(norad_id, start)
+        if sat is None:
+            print(f"Спутник {norad_id} не найден в каталоге")
+            continue
+        satellites.append(sat)
+    if not satellites:
+        return 1
+
+    def report(done: int, total: int):
+        if done == total or done % 100 == 0:
+            print(f"Кадр {done}/{total}")
+
+    count = render_animation(satellites, start, args.frames, args.step, args.output,
+                             view=args.view, inertial=args.eci, depth=args.depth,
+                             size=(width, height), fps=args.fps,
+                             station=tuple(args.station) if args.station else None,
+                             footprint_elevation=args.footprints, progress=report)
+    print(f"Записано кадров: {count} в {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
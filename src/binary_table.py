@@ -0,0 +1,324 @@
+import datetime as dt
+import mmap
+import os
+import pickle
+import struct
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Формат файла справочников (все числа little-endian):
+#   заголовок файла:   магическое число, версия формата, флаги, число таблиц
+#   заголовок таблицы: название, число строк, число столбцов
+#   описание столбца:  название, тип, флаги, смещение и размер данных в файле
+# Данные столбцов выровнены по 8 байт и читаются через mmap без копирования:
+#   [маска заполненности (uint8 на строку), если есть пропуски]
+#   числа — массив int64/float64/uint8; строки — смещения int64 (n + 1) и UTF-8
+MAGIC = b'SREF'
+FORMAT_VERSION = 1
+
+FILE_HEADER = struct.Struct('<4sHHI')
+TABLE_HEADER = struct.Struct('<QH')
+COLUMN_HEADER = struct.Struct('<BBQQ')
+NAME_LENGTH = struct.Struct('<H')
+
+ALIGNMENT = 8
+
+# Типы столбцов: код и тип элементов массива
+TYPE_CODES = {'int': 1, 'float': 2, 'bool': 3, 'datetime': 4, 'str': 5}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+NUMPY_TYPES = {'int': '<i8', 'float': '<f8', 'bool': 'u1', 'datetime': '<f8'}
+
+FLAG_HAS_MASK = 1
+
+# Классы, допустимые в справочниках старого формата (pickle)
+LEGACY_CLASSES = {
+    ('builtins', 'list'), ('builtins', 'dict'), ('builtins', 'tuple'), ('builtins', 'set'),
+    ('builtins', 'str'), ('builtins', 'int'), ('builtins', 'float'), ('builtins', 'bool'),
+    ('datetime', 'datetime'), ('datetime', 'date'), ('datetime', 'timedelta'),
+    ('datetime', 'timezone')
+}
+
+# Описание таблицы: список (название столбца, тип)
+Schema = Sequence[Tuple[str, str]]
+
+
+def _padding(size: int) -> int:
+    return -size % ALIGNMENT
+
+
+def _pack_name(name: str) -> bytes:
+    data = name.encode('utf-8')
+    return NAME_LENGTH.pack(len(data)) + data
+
+
+def _encode_column(kind: str, values: List[Any]) -> Tuple[int, bytes]:
+    """Кодирование значений столбца: (флаги, данные)"""
+    mask = np.array([value is not None for value in values], dtype=np.uint8)
+    has_mask = not mask.all()
+    parts = []
+    if has_mask:
+        parts.append(mask.tobytes())
+        parts.append(b'\0' * _padding(len(mask)))
+
+    if kind == 'str':
+        encoded = [b'' if value is None else str(value).encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        parts.append(offsets.tobytes())
+        parts.append(b''.join(encoded))
+    else:
+        if kind == 'datetime':
+            values = [value.timestamp() if value is not None else None for value in values]
+        array = np.array([0 if value is None else value for value in values],
+                         dtype=NUMPY_TYPES[kind])
+        parts.append(array.tobytes())
+    return (FLAG_HAS_MASK if has_mask else 0), b''.join(parts)
+
+
+def write_tables(path: str, tables: Dict[str, Tuple[Schema, List[Dict[str, Any]]]]):
+    """
+    Запись таблиц в файл справочников.
+
+    Файл записывается во временный и затем атомарно заменяет существующий.
+
+    :param path: Путь к файлу
+    :param tables: {название таблицы: (схема, записи-словари)}
+    """
+    # Сначала кодируем данные, чтобы знать размеры и смещения столбцов
+    encoded = []
+    header_size = FILE_HEADER.size
+    for table_name, (schema, records) in tables.items():
+        columns = []
+        for column, kind in schema:
+            if kind not in TYPE_CODES:
+                raise ValueError(f"Неизвестный тип столбца {column}: {kind}")
+            flags, data = _encode_column(kind, [record.get(column) for record in records])
+            columns.append((column, kind, flags, data))
+            header_size += len(_pack_name(column)) + COLUMN_HEADER.size
+        encoded.append((table_name, len(records), columns))
+        header_size += len(_pack_name(table_name)) + TABLE_HEADER.size
+
+    header = [FILE_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(encoded))]
+    body = []
+    offset = header_size + _padding(header_size)
+    for table_name, row_count, columns in encoded:
+        header.append(_pack_name(table_name))
+        header.append(TABLE_HEADER.pack(row_count, len(columns)))
+        for column, kind, flags, data in columns:
+            header.append(_pack_name(column))
+            header.append(COLUMN_HEADER.pack(TYPE_CODES[kind], flags, offset, len(data)))
+            body.append(data)
+            body.append(b'\0' * _padding(len(data)))
+            offset += len(data) + _padding(len(data))
+
+    header = b''.join(header)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(b'\0' * _padding(len(header)))
+        for part in body:
+            f.write(part)
+    os.replace(tmp_path, path)
+
+
+class BinaryTable:
+    """Таблица файла справочников: столбцы как представления данных файла"""
+
+    def __init__(self, buffer: memoryview, name: str, row_count: int,
+                 columns: Dict[str, Tuple[str, int, int, int]]):
+        self._buffer = buffer
+        self.name = name
+        self.row_count = row_count
+        # {столбец: (тип, флаги, смещение, размер)}
+        self._columns = columns
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._columns)
+
+    def column_type(self, column: str) -> str:
+        return self._columns[column][0]
+
+    def mask(self, column: str) -> Optional[np.ndarray]:
+        """Маска заполненных значений или None, если пропусков нет"""
+        kind, flags, offset, _ = self._columns[column]
+        if not flags & FLAG_HAS_MASK:
+            return None
+        return np.frombuffer(self._buffer, dtype=np.uint8, count=self.row_count,
+                             offset=offset).astype(bool)
+
+    def _data_offset(self, column: str) -> int:
+        _, flags, offset, _ = self._columns[column]
+        if flags & FLAG_HAS_MASK:
+            offset += self.row_count + _padding(self.row_count)
+        return offset
+
+    def array(self, column: str) -> np.ndarray:
+        """
+        Числовой столбец без копирования (пропуски содержат 0).
+
+        Массив ссылается на отображение файла и действителен до закрытия файла.
+        """
+        kind = self._columns[column][0]
+        if kind == 'str':
+            raise TypeError(f"Столбец {column} строковый")
+        return np.frombuffer(self._buffer, dtype=NUMPY_TYPES[kind],
+                             count=self.row_count, offset=self._data_offset(column))
+
+    def values(self, column: str) -> List[Any]:
+        """Значения столбца в виде объектов Python (None для пропусков)"""
+        kind = self._columns[column][0]
+        if kind == 'str':
+            offset = self._data_offset(column)
+            offsets = np.frombuffer(self._buffer, dtype='<i8', count=self.row_count + 1,
+                                    offset=offset).tolist()
+            start = offset + 8 * (self.row_count + 1)
+            data = self._buffer[start:start + offsets[-1]]
+            values = [bytes(data[offsets[i]:offsets[i + 1]]).decode('utf-8')
+                      for i in range(self.row_count)]
+        else:
+            values = self.array(column).tolist()
+            if kind == 'bool':
+                values = [bool(value) for value in values]
+            elif kind == 'datetime':
+                values = [datetime.fromtimestamp(value) for value in values]
+
+        mask = self.mask(column)
+        if mask is not None:
+            values = [value if valid else None for value, valid in zip(values, mask.tolist())]
+        return values
+
+    def records(self, schema: Optional[Schema] = None) -> List[Dict[str, Any]]:
+        """
+        Записи таблицы в виде словарей
+
+        :param schema: Ожидаемые столбцы; отсутствующие в файле заполняются None,
+                       лишние (из более новых версий) пропускаются
+        """
+        names = [column for column, _ in schema] if schema else self.column_names
+        columns = [self.values(column) if column in self._columns else [None] * self.row_count
+                   for column in names]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+class BinaryFile:
+    """Файл справочников, отображенный в память только для чтения"""
+
+    def __init__(self, path: str):
+        """
+        :param path: Путь к файлу
+        :raises ValueError: Файл не является файлом справочников или его версия новее
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Пустой файл нельзя отобразить в память
+            self._file.close()
+            raise ValueError(f"Пустой файл справочника: {path}")
+        self._buffer = memoryview(self._mmap)
+        try:
+            self.tables = self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self) -> Dict[str, BinaryTable]:
+        buffer = self._buffer
+        if len(buffer) < FILE_HEADER.size:
+            raise ValueError(f"Поврежденный файл справочника: {self.path}")
+        magic, version, _, table_count = FILE_HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Неизвестный формат файла справочника: {self.path}")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"Версия формата {version} не поддерживается: {self.path}")
+
+        position = FILE_HEADER.size
+        tables = {}
+        for _ in range(table_count):
+            table_name, position = self._read_name(position)
+            row_count, column_count = TABLE_HEADER.unpack_from(buffer, position)
+            position += TABLE_HEADER.size
+            columns = {}
+            for _ in range(column_count):
+                column, position = self._read_name(position)
+                code, flags, offset, size = COLUMN_HEADER.unpack_from(buffer, position)
+                position += COLUMN_HEADER.size
+                if offset + size > len(buffer):
+                    raise ValueError(f"Поврежденный файл справочника: {self.path}")
+                # Столбцы неизвестных типов (из более новых версий) пропускаются
+                if code in TYPE_NAMES:
+                    columns[column] = (TYPE_NAMES[code], flags, offset, size)
+            tables[table_name] = BinaryTable(buffer, table_name, row_count, columns)
+        return tables
+
+    def _read_name(self, position: int) -> Tuple[str, int]:
+        (length,) = NAME_LENGTH.unpack_from(self._buffer, position)
+        position += NAME_LENGTH.size
+        return bytes(self._buffer[position:position + length]).decode('utf-8'), position + length
+
+    def table(self, name: str) -> BinaryTable:
+        if name not in self.tables:
+            raise KeyError(f"Таблица {name} не найдена в {self.path}")
+        return self.tables[name]
+
+    def close(self):
+        """Закрытие файла (массивы, полученные через array(), становятся недействительны)"""
+        self.tables = {}
+        self._buffer.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> 'BinaryFile':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_tables(path: str, schemas: Optional[Dict[str, Schema]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Чтение всех таблиц файла в виде списков записей
+
+    :param path: Путь к файлу
+    :param schemas: Ожидаемые схемы таблиц {название: схема}
+    :return: {название таблицы: записи-словари}
+    """
+    schemas = schemas or {}
+    with BinaryFile(path) as f:
+        return {name: table.records(schemas.get(name)) for name, table in f.tables.items()}
+
+
+def is_binary_table(path: str) -> bool:
+    """Проверка, что файл записан в формате binary_table (по магическому числу)"""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class _LegacyUnpickler(pickle.Unpickler):
+    """Чтение pickle только со списками, словарями, строками, числами и датами"""
+
+    def find_class(self, module: str, name: str):
+        if (module, name) not in LEGACY_CLASSES:
+            raise pickle.UnpicklingError(
+                f"Недопустимый класс {module}.{name} в справочнике старого формата")
+        return getattr(dt, name) if module == 'datetime' else super().find_class(module, name)
+
+
+def read_legacy_pickle(path: str) -> Any:
+    """
+    Чтение справочника старого формата (pickle) для преобразования в binary_table
+
+    Загружаются только встроенные типы и даты, поэтому произвольный код
+    из файла не выполняется.
+
+    :param path: Путь к файлу
+    :return: Сохраненный объект
+    """
+    with open(path, 'rb') as f:
+        return _LegacyUnpickler(f).load()
@@ -0,0 +1,229 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Алфавит номеров NORAD в формате Alpha-5 (буквы I и O не используются)
+ALPHA5_DIGITS = "0123456789ABCDEFGHJKLMNPQRSTUVWXYZ"
+
+
+def parse_norad_id(tle1: str) -> int:
+    """
+    Извлекает номер NORAD из первой строки TLE (с поддержкой Alpha-5)
+
+    :param tle1: Первая строка TLE
+    :return: Номер по каталогу NORAD
+    """
+    field = tle1[2:7].strip()
+    if field and field[0].isalpha():
+        return ALPHA5_DIGITS.index(field[0].upper()) * 10000 + int(field[1:])
+    return int(field)
+
+
+def parse_cospar_id(tle1: str) -> Optional[str]:
+    """
+    Извлекает международное обозначение (COSPAR) из первой строки TLE
+
+    :param tle1: Первая строка TLE
+    :return: Обозначение вида 1998-067A или None, если поле пустое
+    """
+    field = tle1[9:17].strip()
+    if len(field) < 5 or not field[:5].isdigit():
+        return None
+    year = int(field[:2])
+    year += 2000 if year < 57 else 1900
+    return f"{year}-{field[2:5]}{field[5:]}"
+
+
+def parse_epoch(tle1: str) -> datetime:
+    """
+    Извлекает эпоху элементов из первой строки TLE
+
+    :param tle1: Первая строка TLE
+    :return: Эпоха (datetime в UTC)
+    """
+    year = int(tle1[18:20])
+    year += 2000 if year < 57 else 1900
+    day = float(tle1[20:32])
+    return datetime(year, 1, 1, tzinfo=timezone.utc) + timedelta(days=day - 1)
+
+
+def parse_mean_elements(tle2: str) -> Dict[str, float]:
+    """
+    Извлекает средние элементы орбиты из второй строки TLE
+
+    :param tle2: Вторая строка TLE
+    :return: Словарь с наклонением, RAAN, эксцентриситетом, аргументом перицентра,
+             средней аномалией (градусы) и средним движением (оборотов в сутки)
+    """
+    return {
+        'inclination': float(tle2[8:16]),
+        'raan': float(tle2[17:25]),
+        'eccentricity': float(f"0.{tle2[26:33].strip()}"),
+        'arg_perigee': float(tle2[34:42]),
+        'mean_anomaly': float(tle2[43:51]),
+        'mean_motion': float(tle2[52:63])
+    }
+
+
+def parse_tle_text(text: str) -> List[Tuple[str, str, str]]:
+    """
+    Разбирает текст в трехстрочном формате TLE
+
+    :param text: Текст ответа Celestrak
+    :return: Список кортежей (имя, первая строка, вторая строка)
+    """
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    entries = []
+    # Обрабатываем данные по три строки (имя и две строки TLE)
+    for i in range(0, len(lines) - 2, 3):
+        name, tle1, tle2 = lines[i], lines[i + 1], lines[i + 2]
+        if tle1.startswith('1 ') and tle2.startswith('2 '):
+            entries.append((name, tle1, tle2))
+    return entries
+
+
+class SatelliteCatalog:
+    """Каталог спутников с первичным ключом по номеру NORAD"""
+
+    def __init__(self):
+        # Записи каталога {norad_id: запись}
+        self.records: Dict[int, Dict[str, Any]] = {}
+
+        # Вторичные индексы
+        self.by_name: Dict[str, Set[int]] = {}
+        self.by_cospar: Dict[str, int] = {}
+        self.by_group: Dict[str, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, norad_id: int) -> bool:
+        return norad_id in self.records
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.records)
+
+    def add(self, name: str, tle1: str, tle2: str, group: Optional[str] = None) -> bool:
+        """
+        Добавляет элементы спутника в каталог.
+
+        Один и тот же объект из нескольких групп хранится один раз:
+        группа добавляется к записи, а строки TLE заменяются только более свежими.
+
+        :param name: Название спутника
+        :param tle1: Первая строка TLE
+        :param tle2: Вторая строка TLE
+        :param group: Группа Celestrak, из которой получены данные
+        :return: True, если запись создана или ее элементы обновлены
+        """
+        norad_id = parse_norad_id(tle1)
+        record = self.records.get(norad_id)
+
+        # Быстрый путь: те же элементы из другой группы или при повторной загрузке
+        if record is not None and record['tle1'] == tle1 and record['tle2'] == tle2:
+            if group:
+                record['groups'].add(group)
+                self.by_group.setdefault(group, set()).add(norad_id)
+            return False
+
+        epoch = parse_epoch(tle1)
+        if record is None:
+            record = {
+                'norad_id': norad_id,
+                'name': name,
+                'cospar_id': parse_cospar_id(tle1),
+                'tle1': tle1,
+                'tle2': tle2,
+                'epoch': epoch,
+                'groups': set()
+            }
+            record.update(parse_mean_elements(tle2))
+            self.records[norad_id] = record
+            self._index(record)
+            changed = True
+        elif epoch >= record['epoch']:
+            self._unindex(record)
+            record.update({
+                'name': name,
+                'cospar_id': parse_cospar_id(tle1),
+                'tle1': tle1,
+                'tle2': tle2,
+                'epoch': epoch
+            })
+            record.update(parse_mean_elements(tle2))
+            self._index(record)
+            changed = True
+        else:
+            changed = False
+
+        if group:
+            record['groups'].add(group)
+            self.by_group.setdefault(group, set()).add(norad_id)
+        return changed
+
+    def update(self, entries: Iterable[Tuple[str, str, str, Optional[str]]]) -> Set[int]:
+        """
+        Пакетное добавление элементов с определением изменившихся записей
+
+        :param entries: Кортежи (имя, первая строка TLE, вторая строка TLE, группа)
+        :return: Номера NORAD созданных и обновленных записей
+        """
+        changed = set()
+        for name, tle1, tle2, group in entries:
+            try:
+                if self.add(name, tle1, tle2, group):
+                    changed.add(parse_norad_id(tle1))
+            except ValueError as e:
+                print(f"Некорректные TLE для {name}: {str(e)}")
+        return changed
+
+    def remove(self, norad_id: int):
+        """Удаляет спутник из каталога и всех индексов"""
+        record = self.records.pop(norad_id, None)
+        if record is None:
+            return
+        self._unindex(record)
+        for group in record['groups']:
+            members = self.by_group.get(group)
+            if members is not None:
+                members.discard(norad_id)
+
+    def get(self, norad_id: int) -> Optional[Dict[str, Any]]:
+        """Получение записи по номеру NORAD"""
+        return self.records.get(norad_id)
+
+    def ids_by_name(self, name: str) -> Set[int]:
+        """Номера NORAD всех объектов с указанным названием"""
+        return set(self.by_name.get(name, ()))
+
+    def id_by_cospar(self, cospar_id: str) -> Optional[int]:
+        """Номер NORAD по международному обозначению"""
+        return self.by_cospar.get(cospar_id.upper())
+
+    def ids_by_group(self, group: str) -> Set[int]:
+        """Номера NORAD всех объектов из группы Celestrak"""
+        return set(self.by_group.get(group, ()))
+
+    def display_name(self, norad_id: int) -> str:
+        """
+        Уникальное отображаемое имя спутника.
+
+        При совпадении названий у разных объектов к имени добавляется номер NORAD.
+        """
+        record = self.records[norad_id]
+        if len(self.by_name.get(record['name'], ())) > 1:
+            return f"{record['name']} ({norad_id})"
+        return record['name']
+
+    def _index(self, record: Dict[str, Any]):
+        self.by_name.setdefault(record['name'], set()).add(record['norad_id'])
+        if record['cospar_id']:
+            self.by_cospar[record['cospar_id']] = record['norad_id']
+
+    def _unindex(self, record: Dict[str, Any]):
+        ids = self.by_name.get(record['name'])
+        if ids is not None:
+            ids.discard(record['norad_id'])
+            if not ids:
+                del self.by_name[record['name']]
+        if record['cospar_id'] and self.by_cospar.get(record['cospar_id']) == record['norad_id']:
+            del self.by_cospar[record['cospar_id']]
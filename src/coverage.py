@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Sequence
+import numpy as np
+from ephemeris import time_grid, to_datetime64
+from map_geometry import footprint_radius
+
+# Максимальное число элементов промежуточного массива (точки трасс x ячейки сетки);
+# ограничивает объем памяти на шаг расчета независимо от окна и числа спутников
+MAX_BATCH_ELEMENTS = 2_000_000
+# Количество шагов времени, пропагируемых за один раз
+PROPAGATION_CHUNK_STEPS = 120
+
+# Поля сетки покрытия, которые можно показать на карте
+COVERAGE_FIELDS = {
+    'coverage_minutes': 'Время покрытия (мин)',
+    'max_gap_minutes': 'Максимальный перерыв (мин)'
+}
+
+
+class CoverageAccumulator:
+    """
+    Накопитель покрытия на сетке широта/долгота.
+
+    Шаги времени добавляются блоками по мере пропагации; для каждой ячейки
+    хранится только число покрытых шагов, последний покрытый шаг и
+    наибольший перерыв, поэтому память не зависит от длины окна.
+
+    Длительности считаются в интервалах между отсчетами (метод трапеций:
+    крайние отсчеты окна весят половину шага), поэтому для окна из
+    N + 1 отсчетов время покрытия и перерыва не превышает N шагов.
+    """
+
+    def __init__(self, resolution: float = 1.0, min_elevation: float = 0.0):
+        """
+        :param resolution: Размер ячейки сетки (градусы)
+        :param min_elevation: Минимальный угол места на границе зоны видимости (градусы)
+        """
+        self.resolution = resolution
+        self.min_elevation = min_elevation
+        # Центры ячеек
+        self.lons = np.arange(-180 + resolution / 2, 180, resolution)
+        self.lats = np.arange(-90 + resolution / 2, 90, resolution)
+        shape = (len(self.lats), len(self.lons))
+
+        lat = np.radians(self.lats)
+        self._sin_lat = np.sin(lat)[None, :, None]
+        self._cos_lat = np.cos(lat)[None, :, None]
+        self._lon = np.radians(self.lons)[None, None, :]
+
+        self.steps = 0
+        self.covered_steps = np.zeros(shape, dtype=np.int32)
+        # Покрытие в первом отсчете окна (учитывается с половинным весом)
+        self._first_covered = np.zeros(shape, dtype=bool)
+        # Номер последнего покрытого шага (-1 — с начала окна покрытия не было)
+        self._last_covered = np.full(shape, -1, dtype=np.int64)
+        self._max_gap = np.zeros(shape, dtype=float)
+
+    def add(self, lons: np.ndarray, lats: np.ndarray, alts: np.ndarray):
+        """
+        Добавление блока шагов времени
+
+        :param lons: Долготы подспутниковых точек, массив (шаги, спутники), градусы
+        :param lats: Широты подспутниковых точек (шаги, спутники), градусы
+        :param alts: Высоты спутников (шаги, спутники), км
+        """
+        lons = np.atleast_2d(np.asarray(lons, dtype=float))
+        lats = np.atleast_2d(np.asarray(lats, dtype=float))
+        radius = footprint_radius(alts, self.min_elevation).reshape(lons.shape)
+
+        step_count, sat_count = lons.shape
+        lons, lats, radius = lons.ravel(), lats.ravel(), radius.ravel()
+        covered = np.zeros((step_count,) + self.covered_steps.shape, dtype=bool)
+        # Точки (шаг, спутник) обрабатываются пачками ограниченного размера;
+        # маски точек одного шага объединяются по «или»
+        batch = max(1, MAX_BATCH_ELEMENTS // self.covered_steps.size)
+        for first in range(0, len(lons), batch):
+            last = min(len(lons), first + batch)
+            visible = self._visible(lons[first:last], lats[first:last], radius[first:last])
+            steps = np.arange(first, last) // sat_count
+            starts = np.nonzero(np.r_[True, steps[1:] != steps[:-1]])[0]
+            covered[steps[starts]] |= np.logical_or.reduceat(visible, starts, axis=0)
+        for step_covered in covered:
+            self._accumulate(step_covered)
+
+    def _visible(self, lons: np.ndarray, lats: np.ndarray, radius: np.ndarray) -> np.ndarray:
+        """Маски ячеек в зонах видимости точек: массив (точки, широты, долготы)"""
+        lon = np.radians(lons)[:, None, None]
+        lat = np.radians(lats)[:, None, None]
+        # Ячейка видна, если центральный угол до подспутниковой точки меньше радиуса зоны:
+        # cos d = sin φ1 sin φ2 + cos φ1 cos φ2 cos Δλ >= cos r
+        cos_distance = (np.sin(lat) * self._sin_lat
+                        + np.cos(lat) * self._cos_lat * np.cos(self._lon - lon))
+        # Нерассчитанные положения (NaN) ячейки не покрывают
+        return cos_distance >= np.cos(radius)[:, None, None]
+
+    def _accumulate(self, covered: np.ndarray):
+        """Учет одного шага времени"""
+        if self.steps == 0:
+            self._first_covered[:] = covered
+        # Перерыв между покрытыми отсчетами; от начала окна — на половину шага меньше
+        gap = self.steps - self._last_covered - 1 - 0.5 * (self._last_covered < 0)
+        np.maximum(self._max_gap, np.where(covered, gap, 0), out=self._max_gap)
+        self._last_covered[covered] = self.steps
+        self.covered_steps += covered
+        self.steps += 1
+
+    def covered_intervals(self) -> np.ndarray:
+        """Время покрытия в шагах (крайние отсчеты окна — с половинным весом)"""
+        last_covered = self._last_covered == self.steps - 1
+        return self.covered_steps - 0.5 * self._first_covered - 0.5 * last_covered
+
+    def max_gap_steps(self) -> np.ndarray:
+        """Наибольший перерыв в шагах, включая участки у краев окна"""
+        if self.steps == 0:
+            return np.zeros_like(self._max_gap)
+        # Перерыв до конца окна; если покрытия не было — все окно
+        tail = np.where(self._last_covered < 0, self.steps - 1,
+                        self.steps - self._last_covered - 1.5)
+        return np.maximum(self._max_gap, np.maximum(tail, 0))
+
+
+def compute_coverage(satellites: Sequence, start: datetime, duration_minutes: float,
+                     step_seconds: float = 60.0, resolution: float = 1.0,
+                     min_elevation: float = 0.0,
+                     progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Расчет сетки покрытия группы спутников за интервал времени.
+
+    Положения рассчитываются векторно блоками по PROPAGATION_CHUNK_STEPS шагов
+    и сразу сворачиваются в накопитель.
+
+    :param satellites: Пропагаторы спутников (Satellite из Database)
+    :param start: Начало интервала (datetime в UTC)
+    :param duration_minutes: Длительность интервала (мин)
+    :param step_seconds: Шаг по времени (с)
+    :param resolution: Размер ячейки сетки (градусы)
+    :param min_elevation: Минимальный угол места (градусы)
+    :param progress: Функция (рассчитано шагов, всего шагов)
+    :return: Словарь с центрами ячеек 'lons', 'lats', сетками 'coverage_minutes',
+             'max_gap_minutes' (широты x долготы) и параметрами расчета
+    """
+    total = max(1, int(duration_minutes * 60 // step_seconds) + 1)
+    accumulator = CoverageAccumulator(resolution, min_elevation)
+    failed = set()
+
+    for first in range(0, total, PROPAGATION_CHUNK_STEPS):
+        count = min(PROPAGATION_CHUNK_STEPS, total - first)
+        times = time_grid(start + timedelta(seconds=first * step_seconds), count, step_seconds)
+        shape = (count, len(satellites))
+        lons, lats, alts = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        for i, sat in enumerate(satellites):
+            if i in failed:
+                continue
+            try:
+                lons[:, i], lats[:, i], alts[:, i] = sat.orb.get_lonlatalt(times)
+            except Exception as e:
+                print(f"Ошибка расчета покрытия для {sat.name}: {str(e)}")
+                failed.add(i)
+        accumulator.add(lons, lats, alts)
+        if progress is not None:
+            progress(first + count, total)
+
+    minutes_per_step = step_seconds / 60.0
+    return {
+        'lons': accumulator.lons,
+        'lats': accumulator.lats,
+        'coverage_minutes': accumulator.covered_intervals() * minutes_per_step,
+        'max_gap_minutes': accumulator.max_gap_steps() * minutes_per_step,
+        'start': start,
+        'duration_minutes': duration_minutes,
+        'step_seconds': step_seconds,
+        'min_elevation': min_elevation,
+        'satellites': [sat.name for sat in satellites]
+    }
+
+
+def save_coverage(path: str, grid: Dict[str, Any]):
+    """
+    Экспорт сетки покрытия в файл NumPy.
+
+    В .npy записывается массив (2, широты, долготы): время покрытия и
+    максимальный перерыв; в .npz — все сетки вместе с координатами и параметрами.
+    """
+    if path.lower().endswith('.npy'):
+        np.save(path, np.stack([grid['coverage_minutes'], grid['max_gap_minutes']]))
+        return
+    np.savez_compressed(
+        path,
+        lons=grid['lons'],
+        lats=grid['lats'],
+        coverage_minutes=grid['coverage_minutes'],
+        max_gap_minutes=grid['max_gap_minutes'],
+        start=to_datetime64(grid['start']).astype('datetime64[s]'),
+        duration_minutes=grid['duration_minutes'],
+        step_seconds=grid['step_seconds'],
+        min_elevation=grid['min_elevation'],
+        satellites=np.array(grid['satellites'], dtype=str)
+    )
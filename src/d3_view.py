@@ -1,21 +1,77 @@
 from pyvistaqt import BackgroundPlotter
 import pyvista as pv
-from pyvista import examples
+from vtkmodules.vtkCommonTransforms import vtkTransform
+from vtkmodules.vtkRenderingCore import vtkBillboardTextActor3D, vtkGlyph3DMapper
 from PySide6 import QtWidgets
 import numpy as np
 import math
 from typing import Dict, List, Optional, Tuple
+from scene_cache import get_earth_mesh, get_globe_texture
+
+# Системы координат 3D вида
+FRAMES = {
+    'ecef': 'Связанная с Землей (ECEF)',
+    'eci': 'Инерциальная (ECI)'
+}
+
+
+class ActorRegistry:
+    """
+    Реестр долгоживущих актеров сцены.
+
+    Актеры создаются один раз по ключу и затем только перемещаются;
+    удаляются они вместе со своим объектом (спутником), поэтому число
+    актеров на сцене не растет со временем работы.
+    """
+
+    def __init__(self, plotter):
+        self.plotter = plotter
+        self._actors: Dict[str, object] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._actors
+
+    def __len__(self) -> int:
+        return len(self._actors)
+
+    def get(self, key: str):
+        return self._actors.get(key)
+
+    def add(self, key: str, actor):
+        """Добавление актера на сцену (актер с тем же ключом заменяется)"""
+        self.remove(key)
+        self.plotter.add_actor(actor, name=key, reset_camera=False)
+        self._actors[key] = actor
+        return actor
+
+    def register(self, key: str, actor):
+        """Учет актера, уже добавленного на сцену (например, через add_mesh)"""
+        self._actors[key] = actor
+        return actor
+
+    def remove(self, key: str):
+        actor = self._actors.pop(key, None)
+        if actor is not None:
+            self.plotter.remove_actor(actor, reset_camera=False)
+
+    def scene_actor_count(self) -> int:
+        """Общее количество актеров на сцене (включая Землю и звезды)"""
+        return len(self.plotter.renderer.actors)
 
 
 class Earth3DViewer(QtWidgets.QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, smooth_orbits: bool = True, off_screen: bool = False,
+                 window_size: Tuple[int, int] = (1280, 720)):
+        """
+        :param smooth_orbits: Сглаживание линий орбит на GPU (MSAA)
+        :param off_screen: Отрисовка без окна (пакетный рендер кадров, см. grab_frame)
+        :param window_size: Размер кадра без окна (пиксели)
+        """
         super().__init__(parent)
-
-        # Инициализация 3D сцены
-        self.plotter = BackgroundPlotter(show=False)
-        self.plotter.set_background('black')
+        self.smooth_orbits = smooth_orbits
+        self.off_screen = off_screen
+        self.window_size = window_size
         layout = QtWidgets.QVBoxLayout(self)
-        layout.addWidget(self.plotter)
         self.setLayout(layout)
 
         # Параметры
@@ -23,26 +79,79 @@ class Earth3DViewer(QtWidgets.QWidget):
         self.satellite_size = 500  # радиус спутника
         self.orbit_width = 3       # ширина линии орбиты
 
-        # Создаем Землю
-        self._init_earth()
-        self._init_stars()
-        self._init_station()
-        self.reset_camera()
+        # Система координат сцены; в ECI Земля и станция поворачиваются
+        # общим преобразованием на звездное время, орбиты остаются неподвижными
+        self.frame = 'ecef'
+        self.earth_rotation = vtkTransform()
+
+        # Сцена создается при первом показе виджета (см. ensure_scene)
+        self.plotter = None
+        self.actors: Optional[ActorRegistry] = None
 
         # Хранилище объектов спутников
         self.satellites: Dict[str, dict] = {}
+        if off_screen:
+            # Виджет без окна не показывается: сцена нужна сразу
+            self.ensure_scene()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.ensure_scene()
+
+    def ensure_scene(self):
+        """
+        Создание окна отрисовки и сцены (один раз).
+
+        Выполняется при первом показе, поэтому скрытая 3D панель не замедляет
+        запуск приложения; сетка и текстура Земли читаются из кэша scene_cache.
+        """
+        if self.plotter is not None:
+            return
+        if self.off_screen:
+            plotter = pv.Plotter(off_screen=True, window_size=list(self.window_size))
+        else:
+            plotter = BackgroundPlotter(show=False)
+            self.layout().addWidget(plotter)
+        # Сцена строится в окне plotter; при ошибке окно удаляется, и сцена
+        # создается заново при следующем вызове, а не остается недостроенной
+        self.plotter = plotter
+        try:
+            plotter.set_background('black')
+            if self.smooth_orbits:
+                # Орбиты рисуются ломаными по точкам прогноза; ступенчатость
+                # линий убирает мультисэмплинг на GPU, а не интерполяция сплайном
+                plotter.enable_anti_aliasing('msaa')
+
+            # Актеры маркеров, станции, меток и орбит
+            self.actors = ActorRegistry(plotter)
+
+            # Создаем Землю
+            self._init_earth()
+            self._init_stars()
+            self._init_station()
+            self._init_markers()
+            self.reset_camera()
+        except Exception:
+            self.plotter = None
+            self.actors = None
+            if not self.off_screen:
+                self.layout().removeWidget(plotter)
+            plotter.close()
+            raise
 
     def _init_earth(self):
         """Инициализация модели Земли"""
-        self.earth = examples.planets.load_earth(radius=6378.1)
-        try:
-            texture = examples.load_globe_texture()
-            self.plotter.add_mesh(self.earth, texture=texture,
-                                  smooth_shading=True, name='earth')
-        except:
-            self.plotter.add_mesh(self.earth, color='blue',
-                                  opacity=0.8, name='earth')
-        self.earth.rotate_z(-180, inplace=True)
+        # Текстура сетки уже совмещена с ECEF: нулевой меридиан на оси X
+        self.earth = get_earth_mesh(radius=6378.1)
+        image = get_globe_texture()
+        if image is not None:
+            earth_actor = self.plotter.add_mesh(self.earth, texture=pv.Texture(image),
+                                                smooth_shading=True, name='earth')
+        else:
+            earth_actor = self.plotter.add_mesh(self.earth, color='blue',
+                                                opacity=0.8, name='earth')
+        earth_actor.SetUserTransform(self.earth_rotation)
+        self.actors.register('earth', earth_actor)
 
     def _init_stars(self):
         """Инициализация фона со звездами"""
@@ -59,34 +168,118 @@ class Earth3DViewer(QtWidgets.QWidget):
             )
 
     def _init_station(self):
-        """Инициализация наземной станции"""
-        self.station = None
+        """Инициализация наземной станции (конус перемещается сменой положения актера)"""
+        self.station = pv.Cone(center=(0, 0, 0), direction=(0, 0, 1),
+                               height=500, radius=200, resolution=10)
         self.station_actor = None
 
+    def _init_markers(self):
+        """
+        Маркеры всех спутников: одна точечная сетка с цветом в каждой точке.
+
+        Сферы рисуются глифами (инстансингом на GPU) в точках сетки, поэтому
+        обновление положения — запись в массив координат, а не построение сеток.
+        """
+        self.markers = pv.PolyData()
+        self.markers.points = np.zeros((0, 3))
+        # Порядок спутников в точках сетки
+        self.marker_names: List[str] = []
+
+        mapper = vtkGlyph3DMapper()
+        mapper.SetInputData(self.markers)
+        mapper.SetSourceData(pv.Sphere(radius=self.satellite_size))
+        mapper.ScalingOff()
+        mapper.OrientOff()
+        mapper.SetScalarModeToUsePointFieldData()
+        mapper.SelectColorArray('colors')
+        mapper.SetColorModeToDirectScalars()
+        self.markers_actor = self.actors.add('satellites', pv.Actor(mapper=mapper))
+
+    def _update_markers(self, names: List[str], positions: np.ndarray,
+                        colors: np.ndarray):
+        """
+        Обновление маркеров спутников
+
+        :param names: Названия спутников
+        :param positions: Текущие положения ECEF, массив (N, 3)
+        :param colors: Цвета RGB 0..255, массив (N, 3)
+        """
+        if names == self.marker_names:
+            # Состав не изменился: координаты записываются в существующий массив
+            self.markers.points[:] = positions
+            return
+        self.marker_names = list(names)
+        self.markers.points = positions.reshape(-1, 3)
+        # Пустые массивы в данных точек не допускаются
+        self.markers.point_data.clear()
+        if names:
+            self.markers.point_data['colors'] = colors.reshape(-1, 3).astype(np.uint8)
+
     def reset_camera(self):
         """Сброс положения камеры"""
+        if self.plotter is None:
+            return
         self.plotter.reset_camera()
         self.plotter.camera.position = (0, -15000, 15000)
         self.plotter.camera.focal_point = (0, 0, 0)
         self.plotter.camera.up = (0, 0, 1)
         self.plotter.camera.view_angle = 45
 
+    def set_frame(self, frame: str):
+        """
+        Выбор системы координат сцены (ключ FRAMES).
+
+        В 'eci' данные спутников передаются в инерциальной системе:
+        'orbit' — виток (N, 3), 'position' — текущее положение (3,).
+        """
+        if frame not in FRAMES:
+            raise ValueError(f"Неизвестная система координат: {frame}")
+        self.frame = frame
+        if frame == 'ecef':
+            self.earth_rotation.Identity()
+
     def update_view(self, satellites_data: List[dict],
                     station_lon: Optional[float] = None,
-                    station_lat: Optional[float] = None):
-        """Обновление 3D сцены"""
+                    station_lat: Optional[float] = None,
+                    sidereal_angle: Optional[float] = None):
+        """
+        Обновление 3D сцены
+
+        :param sidereal_angle: Звездное время (радианы) для поворота Земли в режиме ECI
+        """
+        if self.plotter is None:
+            # Сцена еще не показывалась: кадр будет запрошен после показа
+            return
         try:
+            # Поворот Земли и станции — одна матрица на кадр
+            if self.frame == 'eci' and sidereal_angle is not None:
+                self.earth_rotation.Identity()
+                self.earth_rotation.RotateZ(math.degrees(sidereal_angle))
+
             # Обновляем наземную станцию
             self._update_station(station_lon, station_lat)
 
             # Удаляем спутники, которых больше нет
             self._remove_old_satellites(satellites_data)
 
-            # Добавляем/обновляем спутники
+            # Добавляем/обновляем орбиты и метки спутников
+            names, heads, colors = [], [], []
             for sat_data in satellites_data:
-                self._update_satellite(sat_data)
-
-            self.plotter.update()
+                head = self._update_satellite(sat_data)
+                if head is not None:
+                    color = sat_data['color']
+                    names.append(sat_data['name'])
+                    heads.append(head)
+                    colors.append((color.red(), color.green(), color.blue()))
+
+            # Маркеры всех спутников обновляются одной записью массива
+            self._update_markers(names, np.array(heads, dtype=float).reshape(-1, 3),
+                                 np.array(colors, dtype=np.uint8).reshape(-1, 3))
+
+            if not self.off_screen:
+                # Без окна кадр отрисовывается явно при захвате (grab_frame:
+                # render перед screenshot), чтобы не рисовать его дважды
+                self.plotter.update()
         except Exception as e:
             print(f"Ошибка обновления 3D вида: {str(e)}")
 
@@ -97,18 +290,12 @@ class Earth3DViewer(QtWidgets.QWidget):
 
         x, y, z = self.geodetic_to_ecef(lat, lon, 0)
 
-        if self.station is None:
-            # Создаем новую станцию
-            self.station = pv.Cone(center=(x, y, z), direction=(0, 0, 1),
-                                   height=500, radius=200)
-            self.station_actor = self.plotter.add_mesh(
-                self.station, color='red', name='station')
-        else:
-            # Обновляем существующую станцию
-            self.station = pv.Cone(center=(x, y, z), direction=(0, 0, 1),
-                                   height=500, radius=200, resolution=10)
-            self.station_actor = self.plotter.add_mesh(
-                self.station, color='red')
+        if self.station_actor is None:
+            # Станция добавляется на сцену один раз
+            self.station_actor = self.actors.register('station', self.plotter.add_mesh(
+                self.station, color='red', name='station', reset_camera=False))
+            self.station_actor.SetUserTransform(self.earth_rotation)
+        self.station_actor.SetPosition(x, y, z)
 
     def _remove_old_satellites(self, satellites_data: List[dict]):
         """Удаление спутников, которых больше нет в данных"""
@@ -117,20 +304,25 @@ class Earth3DViewer(QtWidgets.QWidget):
             if name not in current_names:
                 self._remove_satellite(name)
 
-    def _update_satellite(self, sat_data: dict):
-        """Обновление данных одного спутника"""
+    def _update_satellite(self, sat_data: dict) -> Optional[Tuple[float, float, float]]:
+        """
+        Обновление данных одного спутника
+
+        :return: Текущее положение в системе сцены или None, если трасса пуста
+        """
         name = sat_data['name']
-        lons = sat_data['lons']
-        lats = sat_data['lats']
-        alts = sat_data['alts']
         color = sat_data['color']
 
         # Конвертируем цвет
         color_rgb = (color.red()/255, color.green()/255, color.blue()/255)
 
-        # Конвертируем координаты
-        ecef_positions = [self.geodetic_to_ecef(lat, lon, alt)
-                          for lon, lat, alt in zip(lons, lats, alts)]
+        if 'orbit' in sat_data:
+            return self._update_inertial_satellite(name, sat_data['orbit'],
+                                                   sat_data['position'], color_rgb)
+
+        # Конвертируем координаты (всю трассу одним векторным расчетом)
+        ecef_positions = self.geodetic_to_ecef_array(
+            sat_data['lats'], sat_data['lons'], sat_data['alts'])
 
         if name not in self.satellites:
             # Создаем новый спутник
@@ -138,72 +330,116 @@ class Earth3DViewer(QtWidgets.QWidget):
         else:
             # Обновляем существующий спутник
             self._update_existing_satellite(name, ecef_positions, color_rgb)
+        return tuple(ecef_positions[0]) if len(ecef_positions) else None
+
+    def _update_inertial_satellite(self, name: str, orbit: np.ndarray, position: np.ndarray,
+                                   color: Tuple[float, float, float]) -> Tuple[float, float, float]:
+        """
+        Спутник в режиме ECI: виток записывается в буфер только при смене
+        массива витка (новые TLE), на каждом кадре перемещаются маркер и метка.
+        """
+        if name not in self.satellites:
+            self._create_satellite(name, orbit, color)
+        elif self.satellites[name]['orbit_source'] is not orbit:
+            self._set_orbit(name, orbit)
+        sat = self.satellites[name]
+        sat['orbit_source'] = orbit
+        sat['label'].SetPosition(*self._label_position(position))
+        return tuple(position)
 
-    def _create_satellite(self, name: str,
-                          positions: List[Tuple[float, float, float]],
-                          color: Tuple[float, float, float]):
-        """Создание нового спутника"""
-        if not positions:
-            return
-
-        # Создаем орбиту
-        orbit = pv.Spline(positions) if len(positions) > 1 else None
+    @staticmethod
+    def _create_orbit_buffer(count: int) -> pv.PolyData:
+        """
+        Ломаная орбиты с запасом точек.
+
+        Емкость округляется вверх до степени двойки; неиспользуемые точки
+        совпадают с последней, поэтому связность ломаной не меняется
+        при изменении длины трассы в пределах емкости.
+        """
+        capacity = max(2, 1 << (count - 1).bit_length())
+        lines = np.concatenate([[capacity], np.arange(capacity)])
+        return pv.PolyData(np.zeros((capacity, 3)), lines=lines)
 
-        # Создаем спутник
-        satellite = pv.Sphere(radius=self.satellite_size,
-                              center=positions[0])
+    @staticmethod
+    def _write_orbit(orbit: pv.PolyData, positions: np.ndarray):
+        """Запись трассы в буфер ломаной без создания новой сетки"""
+        points = orbit.points
+        points[:len(positions)] = positions
+        points[len(positions):] = positions[-1]
+
+    def _set_orbit(self, name: str, positions: np.ndarray):
+        """Обновление ломаной орбиты (буфер пересоздается только при смене емкости)"""
+        sat = self.satellites[name]
+        orbit = sat['orbit']
+        if len(positions) < 2:
+            if orbit is not None:
+                self.actors.remove(f'orbit_{name}')
+                sat['orbit'] = sat['orbit_actor'] = None
+            return
 
-        # Добавляем на сцену
-        orbit_actor = self.plotter.add_mesh(
-            orbit, color=color, line_width=self.orbit_width,
-            name=f'orbit_{name}') if orbit else None
+        capacity = orbit.n_points if orbit is not None else 0
+        if capacity < len(positions) or capacity >= 4 * len(positions):
+            orbit = self._create_orbit_buffer(len(positions))
+            self._write_orbit(orbit, positions)
+            sat['orbit'] = orbit
+            sat['orbit_actor'] = self.actors.register(f'orbit_{name}', self.plotter.add_mesh(
+                orbit, color=sat['color'], line_width=self.orbit_width,
+                name=f'orbit_{name}', reset_camera=False))
+        else:
+            self._write_orbit(orbit, positions)
 
-        sat_actor = self.plotter.add_mesh(
-            satellite, color=color, name=f'sat_{name}')
+    def _create_satellite(self, name: str, positions: np.ndarray,
+                          color: Tuple[float, float, float]):
+        """Создание нового спутника"""
+        if not len(positions):
+            return
 
-        label = self.plotter.add_point_labels(
-            [positions[0]], [name],
-            font_size=10, text_color=color,
-            shadow=True, name=f'label_{name}'
-        )
+        # Метка создается один раз и далее только перемещается
+        label = vtkBillboardTextActor3D()
+        label.SetInput(name)
+        label.SetDisplayOffset(8, 8)
+        text = label.GetTextProperty()
+        text.SetFontSize(10)
+        text.SetColor(color)
+        text.ShadowOn()
+        label.SetPosition(*self._label_position(positions[0]))
+        self.actors.add(f'label_{name}', label)
 
         # Сохраняем в хранилище
         self.satellites[name] = {
-            'orbit': orbit,
-            'satellite': satellite,
-            'orbit_actor': orbit_actor,
-            'satellite_actor': sat_actor,
+            'orbit': None,
+            'orbit_actor': None,
             'label': label,
-            'color': color
+            'color': color,
+            # Массив витка ECI, записанный в буфер орбиты (None — трасса ECEF)
+            'orbit_source': None
         }
 
-    def _update_existing_satellite(self, name: str,
-                                   positions: List[Tuple[float, float, float]],
+        # Создаем орбиту
+        self._set_orbit(name, positions)
+
+    def _update_existing_satellite(self, name: str, positions: np.ndarray,
                                    color: Tuple[float, float, float]):
         """Обновление существующего спутника"""
-        if not positions or name not in self.satellites:
+        if not len(positions) or name not in self.satellites:
             return
 
         sat = self.satellites[name]
         current_pos = positions[0]
 
-        # Обновляем орбиту
-        if len(positions) > 1 and sat['orbit'] is not None:
-            new_orbit = pv.Spline(positions)
-            sat['orbit'].copy_from(new_orbit)
+        # Обновляем орбиту записью в существующий буфер точек
+        self._set_orbit(name, positions)
+        sat['orbit_source'] = None
 
-        # Обновляем позицию спутника
-        satellite = pv.Sphere(radius=self.satellite_size,
-                              center=current_pos)
-        sat['satellite'].copy_from(satellite)
+        # Перемещаем метку
+        sat['label'].SetPosition(*self._label_position(current_pos))
 
-        # Обновляем метку (удаляем старую и создаем новую)
-        self.plotter.remove_actor(f'label_{name}')
-        sat['label'] = self.plotter.add_point_labels(
-            [current_pos], [name],
-            font_size=10, text_color=color,
-            shadow=True, name=f'label_{name}'
-        )
+    def _label_position(self, position: np.ndarray) -> np.ndarray:
+        """Точка привязки метки над маркером (иначе сфера закрывает текст по глубине)"""
+        distance = np.linalg.norm(position)
+        if distance == 0:
+            return position
+        return position * (1 + 1.5 * self.satellite_size / distance)
 
     def _remove_satellite(self, name: str):
         """Удаление спутника со сцены"""
@@ -213,19 +449,31 @@ class Earth3DViewer(QtWidgets.QWidget):
         sat = self.satellites[name]
 
         # Удаляем все компоненты
-        if sat['orbit_actor']:
-            self.plotter.remove_actor(f'orbit_{name}')
-        if sat['satellite_actor']:
-            self.plotter.remove_actor(f'sat_{name}')
-        if sat['label']:
-            self.plotter.remove_actor(f'label_{name}')
+        self.actors.remove(f'orbit_{name}')
+        self.actors.remove(f'label_{name}')
 
         del self.satellites[name]
 
+    def grab_frame(self) -> np.ndarray:
+        """Отрисовка текущего состояния сцены в изображение (RGB-массив uint8)"""
+        self.ensure_scene()
+        # screenshot рисует сцену только при первом вызове, далее читает буфер окна
+        self.plotter.render()
+        return self.plotter.screenshot(return_img=True)
+
+    def actor_count(self) -> Dict[str, int]:
+        """Количество актеров: управляемых реестром и всего на сцене"""
+        if self.actors is None:
+            return {'managed': 0, 'scene': 0}
+        return {'managed': len(self.actors), 'scene': self.actors.scene_actor_count()}
+
     def clear_view(self):
         """Очистка сцены от всех спутников"""
+        if self.plotter is None:
+            return
         for name in list(self.satellites.keys()):
             self._remove_satellite(name)
+        self._update_markers([], np.zeros((0, 3)), np.zeros((0, 3), dtype=np.uint8))
         self.plotter.update()
 
     @staticmethod
@@ -244,3 +492,25 @@ class Earth3DViewer(QtWidgets.QWidget):
         z = ((1 - e**2) * N + alt) * math.sin(lat_rad)
 
         return (x, y, z)
+
+    @staticmethod
+    def geodetic_to_ecef_array(lats, lons, alts) -> np.ndarray:
+        """
+        Векторная конвертация геодезических координат в ECEF (в км)
+
+        :return: Массив (N, 3)
+        """
+        a = 6378.137  # Большая полуось (км)
+        e = 0.0818191908426  # Эксцентриситет
+
+        lat_rad = np.radians(np.asarray(lats, dtype=float))
+        lon_rad = np.radians(np.asarray(lons, dtype=float))
+        alts = np.asarray(alts, dtype=float)
+
+        N = a / np.sqrt(1 - (e * np.sin(lat_rad))**2)
+
+        positions = np.empty((len(lat_rad), 3))
+        positions[:, 0] = (N + alts) * np.cos(lat_rad) * np.cos(lon_rad)
+        positions[:, 1] = (N + alts) * np.cos(lat_rad) * np.sin(lon_rad)
+        positions[:, 2] = ((1 - e**2) * N + alts) * np.sin(lat_rad)
+        return positions
@@ -1,17 +1,25 @@
 import sys
 import os
+import shutil
 import sqlite3
-import pickle
+import threading
 import pandas as pd
-from typing import List, Dict, Tuple, Any, Optional
+from typing import Callable, List, Dict, Set, Tuple, Any, Optional
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                               QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
+                               QHBoxLayout, QPushButton, QTableView,
                                QComboBox, QLabel, QMessageBox, QTabWidget)
 from PySide6.QtCore import Qt
 from datetime import datetime
 from pyorbital.orbital import Orbital
 import math
 import requests
+from binary_table import is_binary_table, read_legacy_pickle, read_tables, write_tables
+from catalog import SatelliteCatalog, parse_norad_id, parse_tle_text
+from orbital_elements import classify_by_parameters, orbit_parameters, tle_age_days
+from search_index import SatelliteSearchIndex
+from tle_history import TleHistory
+from reference_model import PagedTableModel
+from reference_store import CATEGORY_FIELDS, SATELLITE_FIELDS, get_reference_store
 
 # Пути к файлам
 WORK_DIR = "work/data"
@@ -20,6 +28,37 @@ DB_PATH = "satellites.db"
 # Пути к справочникам в бинарном формате
 CATEGORIES_FILE = os.path.join(WORK_DIR, "categories.bin")
 ORBIT_TYPES_FILE = os.path.join(WORK_DIR, "orbit_types.bin")
+REFERENCES_FILE = os.path.join(WORK_DIR, "references.bin")
+
+# Схемы таблиц бинарных справочников (название столбца, тип)
+CATEGORY_SCHEMA = [('id', 'int'), ('name', 'str'), ('description', 'str'),
+                   ('priority', 'int'), ('is_active', 'bool'), ('last_update', 'datetime')]
+ORBIT_TYPE_SCHEMA = [('id', 'int'), ('name', 'str'), ('min_altitude', 'float'),
+                     ('max_altitude', 'float'), ('typical_inclination', 'float'),
+                     ('description', 'str'), ('last_update', 'datetime')]
+# Выгрузка редактора справочников (таблицы базы SQLite)
+CATEGORY_SUMMARY_SCHEMA = [('name', 'str'), ('description', 'str'),
+                           ('total_satellites', 'int'), ('last_update', 'str')]
+SATELLITE_SCHEMA = [('name', 'str'), ('norad_id', 'int'), ('category', 'str'),
+                    ('period_minutes', 'float'), ('inclination_deg', 'float'),
+                    ('apogee_km', 'float'), ('perigee_km', 'float')]
+
+# История элементов TLE
+HISTORY_DB_PATH = os.path.join(WORK_DIR, "tle_history.db")
+
+# Группы Celestrak по категориям спутников
+CELESTRAK_URL = "https://celestrak.org/NORAD/elements/gp.php?GROUP={group}&FORMAT=tle"
+CELESTRAK_GROUPS = {
+    "Навигационные": ["gps-ops", "glonass-operational", "galileo"],
+    "Метеорологические": ["weather", "noaa"],
+    "Научные": ["science", "stations"],
+    "Связь": ["intelsat", "geo"],
+    "Наблюдение Земли": ["resource", "sarsat"]
+}
+# Категория каждой группы Celestrak
+GROUP_CATEGORIES = {group: category
+                    for category, groups in CELESTRAK_GROUPS.items()
+                    for group in groups}
 
 
 class Satellite:
@@ -112,6 +151,46 @@ class Satellite:
         return x/1000, y/1000, z/1000  # Конвертируем в км
 
 
+# Общий экземпляр базы для всех окон приложения
+_database: Optional['Database'] = None
+_database_lock = threading.Lock()
+
+
+def get_database() -> 'Database':
+    """
+    Возвращает общий экземпляр базы данных, создавая его при первом вызове.
+
+    Каталог загружается один раз; окна трекера и редактора справочников
+    работают с одними и теми же данными в памяти.
+    """
+    global _database
+    with _database_lock:
+        if _database is None:
+            _database = Database()
+        return _database
+
+
+def upgrade_legacy_file(path: str, to_tables: Callable[[Any], Dict[str, Tuple[list, list]]]):
+    """
+    Однократное преобразование справочника старого формата (pickle) в binary_table.
+
+    Исходный файл сохраняется рядом с расширением .bak; файл в новом
+    формате не изменяется.
+
+    :param path: Путь к файлу справочника
+    :param to_tables: Преобразование загруженного объекта в таблицы для write_tables
+    """
+    if is_binary_table(path):
+        return
+    print(f"Преобразование справочника старого формата: {path}")
+    tables = to_tables(read_legacy_pickle(path))
+    backup_path = f"{path}.bak"
+    if not os.path.exists(backup_path):
+        shutil.copy2(path, backup_path)
+    write_tables(path, tables)
+    print(f"Справочник преобразован, исходный файл сохранен в {backup_path}")
+
+
 class Database:
     """Класс для работы со справочниками в памяти"""
 
@@ -124,72 +203,221 @@ class Database:
         self.categories = []
         self.orbit_types = []
         self.satellites = []
-        self.tle_data = {}  # Словарь для хранения TLE данных {name: (tle1, tle2)}
+        # Блокировка каталога и индексов (поиск выполняется в фоновом потоке)
+        self.lock = threading.RLock()
+        # Каталог TLE с ключом по номеру NORAD
+        self.catalog = SatelliteCatalog()
+        # Кэш пропагаторов {norad_id: Satellite}
+        self._propagators: Dict[int, Satellite] = {}
+        # История элементов для расчетов на прошедшие моменты времени
+        self.history = TleHistory(HISTORY_DB_PATH)
+
+        # Индексы, заполняемые при загрузке: {категория: {norad_id: None}}
+        # и {тип орбиты: {norad_id: None}} (словари сохраняют порядок добавления)
+        self.category_index: Dict[str, Dict[int, None]] = {}
+        self.orbit_type_index: Dict[str, Dict[int, None]] = {}
+        # Поисковый индекс, обновляемый инкрементально при загрузке TLE
+        self.search_index = SatelliteSearchIndex()
 
         print("Инициализация справочников...")
+        # Файлы справочников не удалось прочитать: они не перезаписываются
+        self.references_damaged = False
         # Пытаемся загрузить справочники из файлов
         if not self.load_references():
             print("Справочники не найдены, создаем новые...")
             self.initialize_references()
             self.save_references()
 
+        # Справочники в SQLite (редактор и производные параметры орбит)
+        self.store = get_reference_store(DB_PATH)
+        self.store.seed_categories(self.categories)
+
         # Загружаем данные спутников из Celestrak
         self._load_celestrak_data()
 
     def _load_celestrak_data(self):
         """Загрузка актуальных данных спутников из Celestrak"""
-        celestrak_categories = {
-            "Навигационные": [
-                "https://celestrak.org/NORAD/elements/gp.php?GROUP=gps-ops&FORMAT=tle",
-                "https://celestrak.org/NORAD/elements/gp.php?GROUP=glonass-operational&FORMAT=tle",
-                "https://celestrak.org/NORAD/elements/gp.php?GROUP=galileo&FORMAT=tle"
-            ],
-            "Метеорологические": [
-                "https://celestrak.org/NORAD/elements/gp.php?GROUP=weather&FORMAT=tle",
-                "https://celestrak.org/NORAD/elements/gp.php?GROUP=noaa&FORMAT=tle"
-            ],
-            "Научные": [
-                "https://celestrak.org/NORAD/elements/gp.php?GROUP=science&FORMAT=tle",
-                "https://celestrak.org/NORAD/elements/gp.php?GROUP=stations&FORMAT=tle"
-            ],
-            "Связь": [
-                "https://celestrak.org/NORAD/elements/gp.php?GROUP=intelsat&FORMAT=tle",
-                "https://celestrak.org/NORAD/elements/gp.php?GROUP=geo&FORMAT=tle"
-            ],
-            "Наблюдение Земли": [
-                "https://celestrak.org/NORAD/elements/gp.php?GROUP=resource&FORMAT=tle",
-                "https://celestrak.org/NORAD/elements/gp.php?GROUP=sarsat&FORMAT=tle"
-            ]
-        }
+        self.apply_celestrak_data(self.fetch_celestrak_data())
+        print(f"Загружено {len(self.catalog)} спутников с TLE данными")
+
+    def fetch_celestrak_data(self) -> List[Tuple[str, str, str, str]]:
+        """
+        Скачивание элементов всех групп Celestrak без изменения каталога.
 
+        :return: Список кортежей (имя, первая строка TLE, вторая строка TLE, группа)
+        """
         print("Загрузка данных спутников из Celestrak...")
-        for category, urls in celestrak_categories.items():
-            for url in urls:
+        entries = []
+        for groups in CELESTRAK_GROUPS.values():
+            for group in groups:
+                url = CELESTRAK_URL.format(group=group)
                 try:
                     response = requests.get(url)
                     if response.status_code == 200:
-                        lines = response.text.strip().split('\n')
-                        # Обрабатываем данные по три строки (имя и две строки TLE)
-                        for i in range(0, len(lines), 3):
-                            if i + 2 < len(lines):
-                                name = lines[i].strip()
-                                tle1 = lines[i + 1].strip()
-                                tle2 = lines[i + 2].strip()
-                                self.tle_data[name] = (tle1, tle2)
+                        entries.extend((name, tle1, tle2, group) for name, tle1, tle2
+                                       in parse_tle_text(response.text))
                 except Exception as e:
                     print(f"Ошибка загрузки данных из {url}: {str(e)}")
+        return entries
+
+    def apply_celestrak_data(self, entries: List[Tuple[str, str, str, str]]) -> Set[int]:
+        """
+        Применение скачанных элементов к каталогу.
+
+        Элементы сравниваются с хранимыми по номеру NORAD и эпохе, пропагаторы
+        сбрасываются только у спутников, чьи TLE действительно изменились.
 
-        print(f"Загружено {len(self.tle_data)} спутников с TLE данными")
+        :param entries: Результат fetch_celestrak_data
+        :return: Номера NORAD новых и изменившихся спутников
+        """
+        with self.lock:
+            changed = self._apply_entries(entries)
+            records = [dict(self.catalog.get(norad_id)) for norad_id in changed]
+
+        try:
+            self.history.add_many(records)
+        except sqlite3.Error as e:
+            print(f"Ошибка сохранения истории TLE: {str(e)}")
 
-    def search_satellites(self, search_term: str) -> List[str]:
-        """Поиск спутников по имени"""
-        search_term = search_term.lower()
-        return [name for name in self.tle_data.keys() 
-                if search_term in name.lower()]
+        # Производные параметры обновляются у спутников из справочника редактора
+        try:
+            self.store.sync_orbit_parameters({
+                'norad_id': r['norad_id'],
+                'period_minutes': r['period_minutes'],
+                'inclination_deg': r['inclination'],
+                'apogee_km': r['apogee_km'],
+                'perigee_km': r['perigee_km']
+            } for r in records)
+        except sqlite3.Error as e:
+            print(f"Ошибка сохранения параметров орбит: {str(e)}")
+        return changed
+
+    def _apply_entries(self, entries: List[Tuple[str, str, str, str]]) -> Set[int]:
+        """Обновление каталога и индексов (вызывается под блокировкой)"""
+        changed = self.catalog.update(entries)
+        for norad_id in changed:
+            self._propagators.pop(norad_id, None)
+
+        # Принадлежность категориям определяется группой-источником
+        for _, tle1, _, group in entries:
+            category = GROUP_CATEGORIES.get(group)
+            if category is None:
+                continue
+            try:
+                norad_id = parse_norad_id(tle1)
+            except ValueError:
+                continue
+            self.category_index.setdefault(category, {})[norad_id] = None
+        self._derive_parameters(changed)
+        self.search_index.add_many(
+            (record['norad_id'], record['name'], record['cospar_id'])
+            for record in (self.catalog.get(norad_id) for norad_id in changed))
+        return changed
+
+    def _derive_parameters(self, norad_ids: Set[int]):
+        """
+        Расчет производных параметров и типов орбит одним векторным проходом.
 
-    def get_satellite_tle(self, satellite_name: str) -> Optional[Tuple[str, str]]:
+        Период, большая полуось, высоты апогея/перигея и возраст элементов
+        сохраняются в записях каталога рядом со средними элементами.
+        """
+        ids = [norad_id for norad_id in norad_ids if norad_id in self.catalog]
+        if not ids:
+            return
+        records = [self.catalog.get(norad_id) for norad_id in ids]
+        eccentricity = [r['eccentricity'] for r in records]
+        params = orbit_parameters([r['mean_motion'] for r in records], eccentricity)
+        params['tle_age_days'] = tle_age_days([r['epoch'].timestamp() for r in records],
+                                              datetime.now().timestamp())
+        orbit_types = classify_by_parameters(params['period_minutes'], params['apogee_km'],
+                                             eccentricity)
+
+        columns = {key: values.tolist() for key, values in params.items()}
+        for i, record in enumerate(records):
+            for key, values in columns.items():
+                record[key] = values[i]
+
+        # Связь с записями справочника типов орбит
+        orbit_type_ids = {o['name']: o['id'] for o in self.orbit_types}
+        for record, orbit_type in zip(records, orbit_types.tolist()):
+            previous = record.get('orbit_type')
+            if previous is not None:
+                self.orbit_type_index.get(previous, {}).pop(record['norad_id'], None)
+            record['orbit_type'] = orbit_type
+            record['orbit_type_id'] = orbit_type_ids.get(orbit_type)
+            self.orbit_type_index.setdefault(orbit_type, {})[record['norad_id']] = None
+
+    def refresh_catalog(self) -> Set[int]:
+        """Инкрементальное обновление каталога, возвращает изменившиеся номера NORAD"""
+        changed = self.apply_celestrak_data(self.fetch_celestrak_data())
+        print(f"Обновлено элементов: {len(changed)} из {len(self.catalog)}")
+        return changed
+
+    def search_satellites(self, search_term: str, limit: Optional[int] = None) -> List[int]:
+        """
+        Поиск спутников по названию, номеру NORAD или COSPAR
+
+        :param search_term: Строка запроса
+        :param limit: Максимальное количество результатов
+        :return: Номера NORAD в порядке релевантности
+        """
+        with self.lock:
+            return self.search_index.search(search_term, limit)
+
+    def get_orbit_parameters(self, norad_id: int,
+                             when: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Средние элементы и производные параметры орбиты, рассчитанные при загрузке
+
+        :param norad_id: Номер NORAD спутника
+        :param when: Момент для расчета возраста элементов (UTC, по умолчанию — сейчас)
+        :return: Копия записи каталога или None
+        """
+        with self.lock:
+            record = self.catalog.get(norad_id)
+            if record is None:
+                return None
+            params = dict(record)
+        if when is not None:
+            epoch = params['epoch'].replace(tzinfo=None)
+            params['tle_age_days'] = (when.replace(tzinfo=None) - epoch).total_seconds() / 86400.0
+        return params
+
+    def get_display_name(self, norad_id: int) -> str:
+        """Уникальное отображаемое имя спутника"""
+        return self.catalog.display_name(norad_id)
+
+    def get_satellite_tle(self, norad_id: int) -> Optional[Tuple[str, str]]:
         """Получение TLE данных для спутника"""
-        return self.tle_data.get(satellite_name)
+        record = self.catalog.get(norad_id)
+        if record is None:
+            return None
+        return record['tle1'], record['tle2']
+
+    def get_satellite(self, norad_id: int) -> Optional[Satellite]:
+        """Получение пропагатора спутника (создается один раз на объект)"""
+        sat = self._propagators.get(norad_id)
+        if sat is None:
+            record = self.catalog.get(norad_id)
+            if record is None:
+                return None
+            sat = Satellite(self.get_display_name(norad_id),
+                            record['tle1'], record['tle2'])
+            self._propagators[norad_id] = sat
+        return sat
+
+    def get_satellite_at(self, norad_id: int, timestamp: datetime) -> Optional[Satellite]:
+        """
+        Пропагатор спутника по элементам, ближайшим к указанному моменту
+
+        :param norad_id: Номер NORAD спутника
+        :param timestamp: Момент времени (datetime в UTC)
+        :return: Пропагатор по историческим TLE или по текущим, если истории нет
+        """
+        record = self.history.get_tle_at(norad_id, timestamp)
+        if record is None:
+            return self.get_satellite(norad_id)
+        return Satellite(record['name'], record['tle1'], record['tle2'])
 
     def get_default_categories(self) -> List[Dict[str, Any]]:
         """Возвращает список стандартных категорий спутников"""
@@ -317,14 +545,15 @@ class Database:
 
     def save_references(self) -> bool:
         """Сохранение справочников в бинарные файлы"""
+        if self.references_damaged:
+            print("Справочники не сохранены: файлы не удалось прочитать при загрузке")
+            return False
         try:
             print("Сохранение справочников...")
-            with open(CATEGORIES_FILE, 'wb') as f:
-                pickle.dump(self.categories, f)
+            write_tables(CATEGORIES_FILE, {'categories': (CATEGORY_SCHEMA, self.categories)})
             print(f"Категории сохранены в {CATEGORIES_FILE}")
 
-            with open(ORBIT_TYPES_FILE, 'wb') as f:
-                pickle.dump(self.orbit_types, f)
+            write_tables(ORBIT_TYPES_FILE, {'orbit_types': (ORBIT_TYPE_SCHEMA, self.orbit_types)})
             print(f"Типы орбит сохранены в {ORBIT_TYPES_FILE}")
             return True
         except Exception as e:
@@ -332,24 +561,38 @@ class Database:
             return False
 
     def load_references(self) -> bool:
-        """Загрузка справочников из бинарных файлов"""
-        try:
-            if not os.path.exists(CATEGORIES_FILE) or not os.path.exists(ORBIT_TYPES_FILE):
-                print("Файлы справочников не найдены")
-                return False
+        """
+        Загрузка справочников из бинарных файлов.
 
+        Файлы старого формата (pickle) преобразуются в новый. Если файл не
+        удалось прочитать, он не перезаписывается: до исправления файла
+        используются справочники по умолчанию.
+
+        :return: False, если файлов справочников нет
+        """
+        if not os.path.exists(CATEGORIES_FILE) or not os.path.exists(ORBIT_TYPES_FILE):
+            print("Файлы справочников не найдены")
+            return False
+
+        try:
             print("Загрузка справочников...")
-            with open(CATEGORIES_FILE, 'rb') as f:
-                self.categories = pickle.load(f)
+            upgrade_legacy_file(CATEGORIES_FILE,
+                                lambda data: {'categories': (CATEGORY_SCHEMA, data)})
+            self.categories = read_tables(
+                CATEGORIES_FILE, {'categories': CATEGORY_SCHEMA})['categories']
             print(f"Загружено категорий: {len(self.categories)}")
 
-            with open(ORBIT_TYPES_FILE, 'rb') as f:
-                self.orbit_types = pickle.load(f)
+            upgrade_legacy_file(ORBIT_TYPES_FILE,
+                                lambda data: {'orbit_types': (ORBIT_TYPE_SCHEMA, data)})
+            self.orbit_types = read_tables(
+                ORBIT_TYPES_FILE, {'orbit_types': ORBIT_TYPE_SCHEMA})['orbit_types']
             print(f"Загружено типов орбит: {len(self.orbit_types)}")
-            return True
         except Exception as e:
-            print(f"Ошибка загрузки справочников: {str(e)}")
-            return False
+            print(f"Ошибка загрузки справочников: {str(e)}; "
+                  f"файлы не изменены, используются справочники по умолчанию")
+            self.references_damaged = True
+            self.initialize_references()
+        return True
 
     def get_all_categories(self) -> List[Dict[str, Any]]:
         """Получение списка всех категорий"""
@@ -360,25 +603,18 @@ class Database:
         return sorted(self.orbit_types, key=lambda x: x['min_altitude'])
 
     def get_satellites_by_category(self, category_name: str) -> List[Dict[str, Any]]:
-        """Получение списка спутников по категории"""
-        # Для демонстрации возвращаем все спутники, так как у нас нет привязки к категориям
+        """Получение списка спутников по категории (из индекса, построенного при загрузке)"""
         if category_name == "Все спутники":
-            return [{'name': name} for name in self.tle_data.keys()]
-        
-        # Распределяем спутники по категориям на основе их названий
-        satellites = []
-        for name in self.tle_data.keys():
-            if any(nav in name for nav in ["GPS", "GLONASS", "GALILEO"]) and category_name == "Навигационные":
-                satellites.append({'name': name})
-            elif any(met in name for met in ["NOAA", "METEOR", "METOP"]) and category_name == "Метеорологические":
-                satellites.append({'name': name})
-            elif any(sci in name for sci in ["ISS", "HUBBLE", "SWOT"]) and category_name == "Научные":
-                satellites.append({'name': name})
-            elif any(com in name for com in ["INTELSAT", "EUTELSAT"]) and category_name == "Связь":
-                satellites.append({'name': name})
-            elif any(obs in name for obs in ["LANDSAT", "SENTINEL"]) and category_name == "Наблюдение Земли":
-                satellites.append({'name': name})
-        return satellites
+            norad_ids = self.catalog
+        else:
+            norad_ids = self.category_index.get(category_name, {})
+        return [{'norad_id': norad_id, 'name': self.get_display_name(norad_id)}
+                for norad_id in norad_ids]
+
+    def get_satellites_by_orbit_type(self, orbit_type: str) -> List[Dict[str, Any]]:
+        """Получение списка спутников по типу орбиты (LEO/MEO/GEO/HEO)"""
+        return [{'norad_id': norad_id, 'name': self.get_display_name(norad_id)}
+                for norad_id in self.orbit_type_index.get(orbit_type, {})]
 
     def add_category(self, name: str, description: str, priority: int) -> bool:
         """Добавление новой категории"""
@@ -430,8 +666,12 @@ class Database:
                      norad_id: Optional[int] = None) -> bool:
         """Добавление нового спутника"""
         try:
-            # Проверяем уникальность имени
-            if any(s['name'] == name for s in self.satellites):
+            # Проверяем уникальность номера NORAD (или имени, если номер не задан)
+            if norad_id is not None:
+                if any(s['norad_id'] == norad_id for s in self.satellites):
+                    print(f"Спутник с NORAD ID {norad_id} уже существует")
+                    return False
+            elif any(s['name'] == name for s in self.satellites):
                 print(f"Спутник {name} уже существует")
                 return False
 
@@ -460,13 +700,19 @@ class Database:
 class ReferenceManager(QMainWindow):
     """Графический интерфейс для управления справочниками"""
 
-    def __init__(self):
+    def __init__(self, db: Optional[Database] = None):
+        """
+        :param db: База данных (по умолчанию — общий экземпляр приложения)
+        """
         super().__init__()
         self.setWindowTitle("Управление справочниками")
         self.setGeometry(100, 100, 800, 600)
 
-        # Инициализируем базу данных при запуске
-        self.db = Database()
+        # Используем уже загруженную базу данных, если она передана
+        self.db = db if db is not None else get_database()
+
+        # Хранилище справочников в SQLite (общее с базой данных)
+        self.store = self.db.store
         
         # Создаем центральный виджет и общий layout
         central_widget = QWidget()
@@ -487,6 +733,9 @@ class ReferenceManager(QMainWindow):
         tabs.addTab(satellites_tab, "Спутники")
         self._setup_satellites_tab(satellites_tab)
 
+        # Категории загружаются после создания фильтра на вкладке спутников
+        self._load_categories()
+
         # Кнопки для сохранения/загрузки в двоичном формате
         btn_layout = QHBoxLayout()
         layout.addLayout(btn_layout)
@@ -502,12 +751,12 @@ class ReferenceManager(QMainWindow):
     def _setup_categories_tab(self, tab):
         layout = QVBoxLayout(tab)
 
-        # Таблица категорий
-        self.categories_table = QTableWidget()
-        self.categories_table.setColumnCount(4)
-        self.categories_table.setHorizontalHeaderLabels([
-            "Название", "Описание", "Количество спутников", "Последнее обновление"
-        ])
+        # Таблица категорий: строки подгружаются из базы по мере прокрутки
+        self.categories_model = PagedTableModel(
+            ["Название", "Описание", "Количество спутников", "Последнее обновление"],
+            self.store.fetch_categories, self.store.count_categories,
+            editable_columns={0, 1}, default_sort=-1, parent=self)
+        self.categories_table = self._create_table_view(self.categories_model)
         layout.addWidget(self.categories_table)
 
         # Кнопки управления
@@ -526,8 +775,6 @@ class ReferenceManager(QMainWindow):
         save_btn.clicked.connect(self._save_categories)
         btn_layout.addWidget(save_btn)
 
-        self._load_categories()
-
     def _setup_satellites_tab(self, tab):
         layout = QVBoxLayout(tab)
 
@@ -541,13 +788,12 @@ class ReferenceManager(QMainWindow):
             self._filter_satellites)
         filter_layout.addWidget(self.category_filter)
 
-        # Таблица спутников
-        self.satellites_table = QTableWidget()
-        self.satellites_table.setColumnCount(7)
-        self.satellites_table.setHorizontalHeaderLabels([
-            "Название", "NORAD ID", "Категория", "Период (мин)",
-            "Наклонение (град)", "Апогей (км)", "Перигей (км)"
-        ])
+        # Таблица спутников: фильтр и сортировка выполняются запросом к базе
+        self.satellites_model = PagedTableModel(
+            ["Название", "NORAD ID", "Категория", "Период (мин)",
+             "Наклонение (град)", "Апогей (км)", "Перигей (км)"],
+            self._fetch_satellites_page, self._count_satellites, parent=self)
+        self.satellites_table = self._create_table_view(self.satellites_model)
         layout.addWidget(self.satellites_table)
 
         # Кнопки управления
@@ -566,270 +812,201 @@ class ReferenceManager(QMainWindow):
         save_btn.clicked.connect(self._save_satellites)
         btn_layout.addWidget(save_btn)
 
-        self._load_satellites()
+    @staticmethod
+    def _create_table_view(model: PagedTableModel) -> QTableView:
+        """Таблица на основе страничной модели с сортировкой по заголовкам"""
+        view = QTableView()
+        view.setModel(model)
+        view.setSelectionBehavior(QTableView.SelectRows)
+        # Без индикатора сортировки модель сохраняет порядок по умолчанию
+        view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        view.setSortingEnabled(True)
+        return view
+
+    def _selected_filter_category(self) -> Optional[str]:
+        """Категория, выбранная в фильтре (None — все категории)"""
+        category = self.category_filter.currentText()
+        if not category or category == "Все категории":
+            return None
+        return category
+
+    def _fetch_satellites_page(self, offset: int, limit: int,
+                               sort_column: int, descending: bool) -> List[Tuple]:
+        return self.store.fetch_satellites(offset, limit, self._selected_filter_category(),
+                                           max(sort_column, 0), descending)
+
+    def _count_satellites(self) -> int:
+        return self.store.count_satellites(self._selected_filter_category())
+
+    def _load_categories(self, reload_satellites: bool = False):
+        """
+        Загрузка категорий из базы данных
 
-    def _load_categories(self):
-        """Загрузка категорий из базы данных"""
+        :param reload_satellites: Сбросить несохраненные правки таблицы спутников
+                                  (иначе они сохраняются при обновлении таблицы)
+        """
         try:
-            with sqlite3.connect(DB_PATH) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                SELECT c.name, c.description, COUNT(s.satellite_id) as total_satellites, c.last_update
-                FROM satellite_categories c
-                LEFT JOIN satellites s ON c.category_id = s.category_id
-                GROUP BY c.category_id, c.name, c.description, c.last_update
-                ORDER BY c.priority, c.name
-                ''')
-                
-                # Очищаем таблицу
-                self.categories_table.setRowCount(0)
-                
-                # Заполняем данными из базы
-                for row_data in cursor.fetchall():
-                    row = self.categories_table.rowCount()
-                    self.categories_table.insertRow(row)
-                    for col, value in enumerate(row_data):
-                        item = QTableWidgetItem(str(value))
-                        self.categories_table.setItem(row, col, item)
-                
-                self._update_category_filter()
+            self.categories_model.reload()
+            self._update_category_filter(reload_satellites)
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Ошибка загрузки категорий: {str(e)}")
 
     def _load_satellites(self):
         """Загрузка спутников из базы данных"""
         try:
-            with sqlite3.connect(DB_PATH) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                SELECT s.name, s.norad_id, c.name as category, 
-                       s.period_minutes, s.inclination_deg, s.apogee_km, s.perigee_km
-                FROM satellites s
-                LEFT JOIN satellite_categories c ON s.category_id = c.category_id
-                ORDER BY s.name
-                ''')
-                
-                # Очищаем таблицу
-                self.satellites_table.setRowCount(0)
-                
-                # Заполняем данными из базы
-                for row_data in cursor.fetchall():
-                    row = self.satellites_table.rowCount()
-                    self.satellites_table.insertRow(row)
-                    for col, value in enumerate(row_data):
-                        item = QTableWidgetItem(str(value))
-                        self.satellites_table.setItem(row, col, item)
+            self.satellites_model.reload()
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Ошибка загрузки спутников: {str(e)}")
 
-    def _update_category_filter(self):
+    def _update_category_filter(self, reload_satellites: bool = False):
+        # Смена списка не должна вызывать повторную загрузку на каждый элемент
+        current = self.category_filter.currentText()
+        self.category_filter.blockSignals(True)
         self.category_filter.clear()
         self.category_filter.addItem("Все категории")
-        categories = []
-        for i in range(self.categories_table.rowCount()):
-            category = self.categories_table.item(i, 0)
-            if category:
-                categories.append(category.text())
-        self.category_filter.addItems(categories)
+        self.category_filter.addItems(self.store.category_names())
+        index = self.category_filter.findText(current)
+        self.category_filter.setCurrentIndex(max(index, 0))
+        self.category_filter.blockSignals(False)
+        if reload_satellites:
+            self._load_satellites()
+        else:
+            self.satellites_model.refresh()
 
     def _add_category(self):
-        row = self.categories_table.rowCount()
-        self.categories_table.insertRow(row)
-        self._update_category_filter()
+        row = self.categories_model.insert_row()
+        self.categories_table.scrollToTop()
+        self.categories_table.edit(self.categories_model.index(row, 0))
 
     def _delete_category(self):
-        current_row = self.categories_table.currentRow()
+        current_row = self.categories_table.currentIndex().row()
         if current_row >= 0:
-            self.categories_table.removeRow(current_row)
-            self._update_category_filter()
+            self.categories_model.remove_row(current_row)
 
     def _add_satellite(self):
-        row = self.satellites_table.rowCount()
-        self.satellites_table.insertRow(row)
+        row = self.satellites_model.insert_row()
+        self.satellites_table.scrollToTop()
+        self.satellites_table.edit(self.satellites_model.index(row, 0))
 
     def _delete_satellite(self):
-        current_row = self.satellites_table.currentRow()
+        current_row = self.satellites_table.currentIndex().row()
         if current_row >= 0:
-            self.satellites_table.removeRow(current_row)
+            self.satellites_model.remove_row(current_row)
+
+    @staticmethod
+    def _parse_satellite(values: List[Any]) -> Dict[str, Any]:
+        """Преобразование значений строки таблицы спутников к типам базы"""
+        values = dict(zip(SATELLITE_FIELDS, (value or "" for value in values)))
+        return {
+            'name': values['name'],
+            'norad_id': int(values['norad_id']) if values['norad_id'] else None,
+            'category': values['category'] or None,
+            'period_minutes': float(values['period_minutes']) if values['period_minutes'] else None,
+            'inclination_deg': float(values['inclination_deg']) if values['inclination_deg'] else None,
+            'apogee_km': float(values['apogee_km']) if values['apogee_km'] else None,
+            'perigee_km': float(values['perigee_km']) if values['perigee_km'] else None
+        }
+
+    def _with_orbit_parameters(self, sat: Dict[str, Any]) -> Dict[str, Any]:
+        """Незаполненные параметры орбиты нового спутника берутся из каталога TLE"""
+        params = self.db.get_orbit_parameters(sat['norad_id']) if sat['norad_id'] else None
+        if params is not None:
+            for field, key in (('period_minutes', 'period_minutes'),
+                               ('inclination_deg', 'inclination'),
+                               ('apogee_km', 'apogee_km'), ('perigee_km', 'perigee_km')):
+                if sat[field] is None:
+                    sat[field] = params[key]
+        return sat
+
+    @classmethod
+    def _convert_legacy_references(cls, data: Dict[str, List[List[str]]]) -> Dict[str, Tuple[list, list]]:
+        """Таблицы выгрузки старого формата (строки значений в виде текста) для write_tables"""
+        categories = [dict(zip(CATEGORY_FIELDS, (value or None for value in row)))
+                      for row in data.get('categories', []) if row and row[0]]
+        for category in categories:
+            total = category.get('total_satellites')
+            category['total_satellites'] = int(total) if total else None
+        satellites = [cls._parse_satellite(row[:len(SATELLITE_FIELDS)])
+                      for row in data.get('satellites', []) if row and row[0]]
+        return {'categories': (CATEGORY_SUMMARY_SCHEMA, categories),
+                'satellites': (SATELLITE_SCHEMA, satellites)}
 
     def _save_categories(self):
         """Сохранение изменений в категориях"""
         try:
-            with sqlite3.connect(DB_PATH) as conn:
-                cursor = conn.cursor()
-                
-                # Получаем все текущие категории из таблицы интерфейса
-                categories = []
-                for row in range(self.categories_table.rowCount()):
-                    category = {
-                        'name': self.categories_table.item(row, 0).text(),
-                        'description': self.categories_table.item(row, 1).text(),
-                        'priority': row + 1  # Приоритет по порядку строк
-                    }
-                    categories.append(category)
-                
-                # Обновляем базу данных
-                for category in categories:
-                    cursor.execute('''
-                    INSERT OR REPLACE INTO satellite_categories 
-                    (name, description, priority, is_active, last_update)
-                    VALUES (?, ?, ?, 1, datetime('now'))
-                    ''', (category['name'], category['description'], category['priority'], 1, datetime.now()))
-                
-                conn.commit()
-                self._load_categories()  # Перезагружаем данные
-                QMessageBox.information(self, "Успех", "Категории сохранены успешно")
+            updated, inserted, deleted = self.categories_model.changes()
+            self.store.save_categories(
+                {category_id: {'name': values[0], 'description': values[1]}
+                 for category_id, values in updated.items() if values[0]},
+                [{'name': values[0], 'description': values[1]}
+                 for values in inserted if values[0]],
+                deleted)
+            self._load_categories()  # Перезагружаем данные
+            QMessageBox.information(self, "Успех", "Категории сохранены успешно")
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Ошибка сохранения категорий: {str(e)}")
 
     def _save_satellites(self):
         """Сохранение изменений в спутниках"""
         try:
-            with sqlite3.connect(DB_PATH) as conn:
-                cursor = conn.cursor()
-                
-                # Получаем все текущие спутники из таблицы интерфейса
-                satellites = []
-                for row in range(self.satellites_table.rowCount()):
-                    satellite = {
-                        'name': self.satellites_table.item(row, 0).text(),
-                        'norad_id': self.satellites_table.item(row, 1).text(),
-                        'category': self.satellites_table.item(row, 2).text(),
-                        'period_minutes': self.satellites_table.item(row, 3).text(),
-                        'inclination_deg': self.satellites_table.item(row, 4).text(),
-                        'apogee_km': self.satellites_table.item(row, 5).text(),
-                        'perigee_km': self.satellites_table.item(row, 6).text()
-                    }
-                    satellites.append(satellite)
-                
-                # Обновляем базу данных
-                for satellite in satellites:
-                    # Получаем ID категории
-                    cursor.execute('SELECT category_id FROM satellite_categories WHERE name = ?',
-                                 (satellite['category'],))
-                    result = cursor.fetchone()
-                    if result:
-                        category_id = result[0]
-                        cursor.execute('''
-                        INSERT OR REPLACE INTO satellites 
-                        (name, norad_id, category_id, period_minutes, 
-                         inclination_deg, apogee_km, perigee_km, last_update)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
-                        ''', (
-                            satellite['name'],
-                            int(satellite['norad_id']) if satellite['norad_id'] else None,
-                            category_id,
-                            float(satellite['period_minutes']) if satellite['period_minutes'] else None,
-                            float(satellite['inclination_deg']) if satellite['inclination_deg'] else None,
-                            float(satellite['apogee_km']) if satellite['apogee_km'] else None,
-                            float(satellite['perigee_km']) if satellite['perigee_km'] else None
-                        ))
-                
-                conn.commit()
-                self._load_satellites()  # Перезагружаем данные
-                QMessageBox.information(self, "Успех", "Спутники сохранены успешно")
+            updated, inserted, deleted = self.satellites_model.changes()
+            # Сохраняются только измененные строки, одной транзакцией
+            self.store.save_satellites(
+                {satellite_id: self._parse_satellite(values)
+                 for satellite_id, values in updated.items() if values[0]},
+                [self._with_orbit_parameters(self._parse_satellite(values))
+                 for values in inserted if values[0]],
+                deleted)
+            # Количество спутников в категориях могло измениться;
+            # сохраненные правки таблицы спутников сбрасываются
+            self._load_categories(reload_satellites=True)
+            QMessageBox.information(self, "Успех", "Спутники сохранены успешно")
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Ошибка сохранения спутников: {str(e)}")
 
     def _filter_satellites(self):
-        """Фильтрация спутников по выбранной категории"""
+        """Фильтрация спутников по выбранной категории (условие WHERE в запросе)"""
         try:
-            category = self.category_filter.currentText()
-            with sqlite3.connect(DB_PATH) as conn:
-                cursor = conn.cursor()
-                
-                if category == "Все категории":
-                    cursor.execute('''
-                    SELECT s.name, s.norad_id, c.name as category, 
-                           s.period_minutes, s.inclination_deg, s.apogee_km, s.perigee_km
-                    FROM satellites s
-                    LEFT JOIN satellite_categories c ON s.category_id = c.category_id
-                    ORDER BY s.name
-                    ''')
-                else:
-                    cursor.execute('''
-                    SELECT s.name, s.norad_id, c.name as category, 
-                           s.period_minutes, s.inclination_deg, s.apogee_km, s.perigee_km
-                    FROM satellites s
-                    LEFT JOIN satellite_categories c ON s.category_id = c.category_id
-                    WHERE c.name = ?
-                    ORDER BY s.name
-                    ''', (category,))
-                
-                # Очищаем таблицу
-                self.satellites_table.setRowCount(0)
-                
-                # Заполняем отфильтрованными данными
-                for row_data in cursor.fetchall():
-                    row = self.satellites_table.rowCount()
-                    self.satellites_table.insertRow(row)
-                    for col, value in enumerate(row_data):
-                        item = QTableWidgetItem(str(value))
-                        self.satellites_table.setItem(row, col, item)
+            self.satellites_model.reload()
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Ошибка фильтрации: {str(e)}")
 
     def _save_binary(self):
         try:
-            # Получаем данные из таблиц
-            categories_data = []
-            for i in range(self.categories_table.rowCount()):
-                row = []
-                for j in range(self.categories_table.columnCount()):
-                    item = self.categories_table.item(i, j)
-                    row.append(item.text() if item else "")
-                categories_data.append(row)
-
-            satellites_data = []
-            for i in range(self.satellites_table.rowCount()):
-                row = []
-                for j in range(self.satellites_table.columnCount()):
-                    item = self.satellites_table.item(i, j)
-                    row.append(item.text() if item else "")
-                satellites_data.append(row)
-
-            # Создаем объект для сохранения
-            data = {
-                'categories': categories_data,
-                'satellites': satellites_data
-            }
-
-            # Сохраняем в двоичном формате
-            binary_file = os.path.join(WORK_DIR, 'references.bin')
-            with open(binary_file, 'wb') as f:
-                pickle.dump(data, f)
+            # Выгружаем справочники из базы (без несохраненных правок в таблицах)
+            categories = [dict(zip(CATEGORY_FIELDS, row)) for row in self.store.category_summary()]
+            satellites = [dict(zip(SATELLITE_FIELDS, row)) for row in self.store.list_satellites()]
+
+            # Сохраняем в двоичном формате с типизированными столбцами
+            write_tables(REFERENCES_FILE, {
+                'categories': (CATEGORY_SUMMARY_SCHEMA, categories),
+                'satellites': (SATELLITE_SCHEMA, satellites)
+            })
 
             QMessageBox.information(self, "Успех",
-                                    f"Данные сохранены в двоичном формате: {binary_file}")
+                                    f"Данные сохранены в двоичном формате: {REFERENCES_FILE}")
         except Exception as e:
             QMessageBox.warning(self, "Ошибка",
                                 f"Ошибка сохранения в двоичном формате: {str(e)}")
 
     def _load_binary(self):
         try:
-            binary_file = os.path.join(WORK_DIR, 'references.bin')
-            if not os.path.exists(binary_file):
+            if not os.path.exists(REFERENCES_FILE):
                 raise FileNotFoundError("Файл с двоичными данными не найден")
 
-            # Загружаем данные
-            with open(binary_file, 'rb') as f:
-                data = pickle.load(f)
-
-            # Обновляем таблицу категорий
-            self.categories_table.setRowCount(len(data['categories']))
-            for i, row in enumerate(data['categories']):
-                for j, value in enumerate(row):
-                    item = QTableWidgetItem(str(value))
-                    self.categories_table.setItem(i, j, item)
-
-            # Обновляем таблицу спутников
-            self.satellites_table.setRowCount(len(data['satellites']))
-            for i, row in enumerate(data['satellites']):
-                for j, value in enumerate(row):
-                    item = QTableWidgetItem(str(value))
-                    self.satellites_table.setItem(i, j, item)
-
-            self._update_category_filter()
+            # Выгрузка старого формата (pickle) один раз преобразуется в новый
+            upgrade_legacy_file(REFERENCES_FILE, self._convert_legacy_references)
+            data = read_tables(REFERENCES_FILE, {'categories': CATEGORY_SUMMARY_SCHEMA,
+                                                 'satellites': SATELLITE_SCHEMA})
+
+            # Таблицы читают данные из базы, поэтому справочники записываются в нее
+            self.store.upsert_categories([
+                {'name': c['name'], 'description': c['description'], 'priority': i + 1}
+                for i, c in enumerate(data.get('categories', [])) if c['name']])
+            self.store.upsert_satellites([
+                sat for sat in data.get('satellites', []) if sat['name']])
+
+            self._load_categories(reload_satellites=True)
             QMessageBox.information(
                 self, "Успех", "Данные загружены из двоичного формата")
         except Exception as e:
@@ -0,0 +1,292 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from pyorbital.astronomy import gmst
+from map_geometry import simplify_track, split_antimeridian
+
+# Количество точек витка орбиты в инерциальной системе
+INERTIAL_ORBIT_POINTS = 360
+# Срок использования витка в инерциальной системе (ч);
+# за это время прецессия орбиты остается незаметной
+INERTIAL_ORBIT_HOURS = 12.0
+
+
+def to_datetime64(timestamp: datetime) -> np.datetime64:
+    """Переводит datetime (UTC) в np.datetime64 без часового пояса"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(timestamp, 'us')
+
+
+def time_grid(start: datetime, count: int, step_seconds: float) -> np.ndarray:
+    """Равномерная сетка моментов времени в формате np.datetime64"""
+    step = np.timedelta64(int(step_seconds * 1e6), 'us')
+    return to_datetime64(start) + np.arange(count) * step
+
+
+def sidereal_angle(now: datetime) -> float:
+    """Гринвичское среднее звездное время (угол поворота Земли, радианы)"""
+    return float(gmst(to_datetime64(now)))
+
+
+class EphemerisCache:
+    """Буферы эфемерид отслеживаемых спутников на минутной сетке"""
+
+    def __init__(self, margin_minutes: int = 60,
+                 inertial_hours: float = INERTIAL_ORBIT_HOURS):
+        """
+        :param margin_minutes: Запас буфера сверх глубины прогноза (мин)
+        :param inertial_hours: Срок использования витка в инерциальной системе (ч)
+        """
+        self.margin_minutes = margin_minutes
+        self.inertial_hours = inertial_hours
+        # Буферы {norad_id: {'start', 'end', 'times', 'lons', 'lats', 'alts'}};
+        # 'split' — трасса буфера, разбитая по линии ±180° (создается при запросе);
+        # 'lod' — маски прореженной трассы {допуск: маска точек 'split'}
+        self._buffers: Dict[int, Dict[str, Any]] = {}
+        # Последнее точное положение {norad_id: (момент, положение)}
+        self._positions: Dict[int, Tuple[datetime, Dict[str, Any]]] = {}
+        # Витки в инерциальной системе {norad_id: {'start', 'points'}}
+        self._orbits: Dict[int, Dict[str, Any]] = {}
+
+    def get_track(self, norad_id: int, sat, now: datetime,
+                  depth: int) -> Tuple[List[float], List[float], List[float]]:
+        """
+        Возвращает трассу спутника от текущего момента на depth минут вперед.
+
+        Первая точка рассчитывается точно на момент now, остальные берутся
+        из буфера, который пересчитывается только при выходе за его границы
+        или после инвалидации.
+
+        :param norad_id: Номер NORAD спутника
+        :param sat: Пропагатор спутника (Satellite)
+        :param now: Текущий момент (datetime в UTC)
+        :param depth: Глубина прогноза в минутах
+        :return: Списки долгот, широт и высот
+        """
+        pos = self._position(norad_id, sat, now)
+        lons, lats, alts = [pos['longitude']], [pos['latitude']], [pos['altitude']]
+        if depth <= 0:
+            return lons, lats, alts
+
+        buffer, first, last = self._window(norad_id, sat, now, depth)
+        lons.extend(buffer['lons'][first:last].tolist())
+        lats.extend(buffer['lats'][first:last].tolist())
+        alts.extend(buffer['alts'][first:last].tolist())
+        return lons, lats, alts
+
+    def get_ground_track(self, norad_id: int, sat, now: datetime, depth: int,
+                         tolerance: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Трасса для карты в PlateCarree с разрывами на линии ±180°.
+
+        Разбиение и прореживание выполняются один раз для всего буфера; на каждом
+        шаге берется срез трассы и к нему добавляется точное текущее положение.
+
+        :param tolerance: Допуск прореживания (градусы, 0 — без прореживания)
+        :return: Массивы долгот и широт (NaN в местах разрыва)
+        """
+        pos = self._position(norad_id, sat, now)
+        head_lon, head_lat = pos['longitude'], pos['latitude']
+        if depth <= 0:
+            return np.array([head_lon]), np.array([head_lat])
+
+        buffer, first, last = self._window(norad_id, sat, now, depth)
+        return ground_track_window(buffer, first, last, head_lon, head_lat, tolerance)
+
+    def get_inertial_orbit(self, norad_id: int, sat, now: datetime) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Виток орбиты и текущее положение в инерциальной системе (TEME, км).
+
+        Виток рассчитывается один раз для элементов TLE и возвращается тем же
+        массивом, пока не истечет срок inertial_hours или не будет инвалидации;
+        на каждом шаге рассчитывается только текущее положение.
+
+        :return: Замкнутый виток (N, 3) и положение спутника (3,)
+        """
+        orbit = self._orbits.get(norad_id)
+        if orbit is None or not (
+                orbit['start'] <= now <= orbit['start'] + timedelta(hours=self.inertial_hours)):
+            orbit = {'start': now, 'points': inertial_orbit(sat, now)}
+            self._orbits[norad_id] = orbit
+        position = np.asarray(sat.orb.get_position(to_datetime64(now), normalize=False)[0])
+        return orbit['points'], position
+
+    def get_position(self, norad_id: int, sat, now: datetime) -> Dict[str, Any]:
+        """Точное положение спутника на момент now (см. calculate_satellite_position)"""
+        return self._position(norad_id, sat, now)
+
+    def _position(self, norad_id: int, sat, now: datetime) -> Dict[str, Any]:
+        """Точное положение на момент now (повторно не рассчитывается в пределах шага)"""
+        cached = self._positions.get(norad_id)
+        if cached is not None and cached[0] == now:
+            return cached[1]
+        pos = sat.calculate_satellite_position(now)
+        self._positions[norad_id] = (now, pos)
+        return pos
+
+    def _window(self, norad_id: int, sat, now: datetime, depth: int) -> Tuple[Dict[str, Any], int, int]:
+        """Буфер, покрывающий интервал прогноза, и индексы точек интервала в нем"""
+        end = now + timedelta(minutes=depth)
+        buffer = self._buffers.get(norad_id)
+        if buffer is None or now < buffer['start'] or end > buffer['end']:
+            buffer = propagate_buffer(sat, now, depth + self.margin_minutes)
+            self._buffers[norad_id] = buffer
+        first, last = window_indices(buffer, now, depth)
+        return buffer, first, last
+
+    def invalidate(self, norad_ids: Iterable[int]):
+        """Сбрасывает буферы указанных спутников"""
+        for norad_id in norad_ids:
+            self._buffers.pop(norad_id, None)
+            self._positions.pop(norad_id, None)
+            self._orbits.pop(norad_id, None)
+
+    def clear(self):
+        """Сбрасывает все буферы"""
+        self._buffers.clear()
+        self._positions.clear()
+        self._orbits.clear()
+
+
+def propagate_buffer(sat, start: datetime, minutes: int) -> Dict[str, Any]:
+    """
+    Векторный расчет буфера эфемерид на минутной сетке
+
+    :param sat: Пропагатор спутника (Satellite)
+    :param start: Начало интервала (округляется вниз до минуты)
+    :param minutes: Длительность интервала (мин)
+    :return: Буфер {'start', 'end', 'times', 'lons', 'lats', 'alts'}
+    """
+    start = start.replace(second=0, microsecond=0)
+    count = int(minutes) + 2
+    times = time_grid(start, count, 60)
+    lons, lats, alts = sat.orb.get_lonlatalt(times)
+    return {
+        'start': start,
+        'end': start + timedelta(minutes=count - 1),
+        'times': times,
+        'lons': np.asarray(lons),
+        'lats': np.asarray(lats),
+        'alts': np.asarray(alts)
+    }
+
+
+def window_indices(buffer: Dict[str, Any], now: datetime, depth: int) -> Tuple[int, int]:
+    """Индексы точек буфера в интервале (now, now + depth]"""
+    times = buffer['times']
+    first = int(np.searchsorted(times, to_datetime64(now), side='right'))
+    last = int(np.searchsorted(times, to_datetime64(now + timedelta(minutes=depth)),
+                               side='right'))
+    return first, last
+
+
+def ground_track_window(buffer: Dict[str, Any], first: int, last: int,
+                        head_lon: float, head_lat: float,
+                        tolerance: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Трасса для карты из среза буфера с текущим положением в начале.
+
+    Разбиение по линии ±180° ('split') и маски прореживания ('lod')
+    рассчитываются один раз для всего буфера и сохраняются в нем.
+
+    :param first: Индекс первой точки буфера после текущего момента
+    :param last: Индекс за последней точкой интервала
+    :param tolerance: Допуск прореживания (градусы, 0 — без прореживания)
+    :return: Массивы долгот и широт (NaN в местах разрыва)
+    """
+    if first >= last:
+        return np.array([head_lon]), np.array([head_lat])
+    split = buffer.get('split')
+    if split is None:
+        split = split_antimeridian(buffer['lons'], buffer['lats'])
+        buffer['split'] = split
+    split_lons, split_lats, index = split
+
+    start, stop = index[first], index[last - 1] + 1
+    # Отрезок от текущего положения до первой точки буфера тоже может пересекать ±180°
+    head_lons, head_lats, _ = split_antimeridian(
+        [head_lon, buffer['lons'][first]], [head_lat, buffer['lats'][first]])
+    track_lons, track_lats = split_lons[start:stop], split_lats[start:stop]
+    if tolerance > 0:
+        lod = buffer.setdefault('lod', {})
+        mask = lod.get(tolerance)
+        if mask is None:
+            mask = simplify_track(split_lons, split_lats, tolerance)
+            lod[tolerance] = mask
+        # Первая и последняя точки интервала сохраняются всегда
+        keep = mask[start:stop].copy()
+        keep[0] = keep[-1] = True
+        track_lons, track_lats = track_lons[keep], track_lats[keep]
+    return (np.concatenate([head_lons[:-1], track_lons]),
+            np.concatenate([head_lats[:-1], track_lats]))
+
+
+def inertial_orbit(sat, start: datetime) -> np.ndarray:
+    """
+    Замкнутый виток орбиты от момента start в инерциальной системе (TEME, км)
+
+    :return: Массив (INERTIAL_ORBIT_POINTS + 1, 3)
+    """
+    period = float(sat.orb.orbit_elements.period)
+    times = time_grid(start, INERTIAL_ORBIT_POINTS, period * 60 / INERTIAL_ORBIT_POINTS)
+    points = np.column_stack(sat.orb.get_position(times, normalize=False)[0])
+    return np.vstack([points, points[:1]])
+
+
+class PassCache:
+    """Кэш пролетов спутников над наземной станцией"""
+
+    def __init__(self, retry_minutes: int = 10):
+        """
+        :param retry_minutes: Через сколько минут повторять поиск, если пролетов нет
+        """
+        self.retry_minutes = retry_minutes
+        # Кэш {norad_id: {'station', 'valid_until', 'contacts', 'passes'}}
+        self._entries: Dict[int, Dict[str, Any]] = {}
+
+    def get(self, norad_id: int, station: Tuple[float, float, float], now: datetime,
+            compute: Callable[[datetime], Tuple[list, list]]) -> Tuple[list, list]:
+        """
+        Возвращает контакты и пролеты спутника, пересчитывая их при необходимости.
+
+        Результат действителен до окончания ближайшего контакта, смены станции
+        или инвалидации после обновления TLE.
+
+        :param norad_id: Номер NORAD спутника
+        :param station: Координаты станции (lat, lon, alt)
+        :param now: Текущий момент (datetime в UTC)
+        :param compute: Функция расчета (now) -> (контакты, пролеты)
+        :return: Кортеж (контакты, пролеты)
+        """
+        entry = self._entries.get(norad_id)
+        if entry is None or entry['station'] != station or now >= entry['valid_until']:
+            contacts, passes = compute(now)
+            if contacts:
+                valid_until = _as_utc(contacts[0][1])
+            else:
+                valid_until = now + timedelta(minutes=self.retry_minutes)
+            entry = {
+                'station': station,
+                'valid_until': valid_until,
+                'contacts': contacts,
+                'passes': passes
+            }
+            self._entries[norad_id] = entry
+        return entry['contacts'], entry['passes']
+
+    def invalidate(self, norad_ids: Iterable[int]):
+        """Сбрасывает пролеты указанных спутников"""
+        for norad_id in norad_ids:
+            self._entries.pop(norad_id, None)
+
+    def clear(self):
+        """Сбрасывает весь кэш"""
+        self._entries.clear()
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    """Приводит время pyorbital (без часового пояса) к UTC"""
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
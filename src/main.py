@@ -1,12 +1,13 @@
-from database import Database, ReferenceManager, Satellite
+from database import ReferenceManager, get_database
 import sys
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget,
                                QVBoxLayout, QHBoxLayout, QGridLayout,
                                QComboBox, QLineEdit, QLabel, QGroupBox,
-                               QFormLayout, QTextEdit, QPushButton,
-                               QListWidget, QMessageBox, QColorDialog,
+                               QFormLayout, QTextEdit, QPushButton, QCheckBox,
+                               QListWidget, QListWidgetItem, QListView,
+                               QMessageBox, QColorDialog, QFileDialog,
                                QMenuBar, QMenu, QStatusBar)
-from PySide6.QtCore import QTimer, Qt
+from PySide6.QtCore import QTimer, Qt, QThread, QThreadPool, Signal
 from PySide6 import QtGui
 from PySide6.QtGui import QColor, QPalette
 from datetime import datetime, timedelta, timezone
@@ -14,6 +15,10 @@ import random
 from map_view import Map2DWidget
 from d3_view import Earth3DViewer
 from sky_view import SkyViewWidget
+from ephemeris import EphemerisCache, PassCache, sidereal_angle
+from coverage import compute_coverage, save_coverage
+from search_model import SatelliteListModel, SearchSignals, SearchTask
+from render_scheduler import RenderScheduler
 import warnings
 warnings.filterwarnings("ignore", message="pkg_resources is deprecated")
 warnings.filterwarnings(
@@ -22,17 +27,74 @@ warnings.filterwarnings(
     module="pyorbital"
 )
 
+# Период фонового обновления TLE (Celestrak обновляет данные раз в несколько часов)
+REFRESH_INTERVAL_MS = 2 * 60 * 60 * 1000
+# Задержка поиска после последнего нажатия клавиши
+SEARCH_DEBOUNCE_MS = 200
+# Частота обновления (Гц) и бюджет кадра (мс) представлений
+VIEW_REFRESH = {
+    'map': (0.2, 1000),
+    'sky': (1.0, 300),
+    '3d': (10.0, 60)
+}
+
+
 def load_styles():
     with open('styles/styles.css', 'r') as f:
         return f.read()
 
 
+class CatalogRefreshWorker(QThread):
+    """Фоновая загрузка TLE из Celestrak без блокировки интерфейса"""
+
+    fetched = Signal(list)
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+
+    def run(self):
+        self.fetched.emit(self.db.fetch_celestrak_data())
+
+
+class CoverageWorker(QThread):
+    """Фоновый расчет сетки покрытия для группы спутников"""
+
+    finished_grid = Signal(object)
+    failed = Signal(str)
+    progress = Signal(int, int)
+
+    def __init__(self, satellites, start, duration_minutes, min_elevation, parent=None):
+        super().__init__(parent)
+        self.satellites = satellites
+        self.start_time = start
+        self.duration_minutes = duration_minutes
+        self.min_elevation = min_elevation
+
+    def run(self):
+        try:
+            grid = compute_coverage(self.satellites, self.start_time, self.duration_minutes,
+                                    min_elevation=self.min_elevation,
+                                    progress=self.progress.emit)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_grid.emit(grid)
+
+
 class SatelliteTracker(QMainWindow):
 
     def __init__(self):
         super().__init__()
         self.set_dark_theme()
 
+        # Окно справочников (создается при первом открытии)
+        self.ref_editor = None
+
+        # Последний расчет покрытия и его фоновый поток
+        self.coverage_grid = None
+        self.coverage_worker = None
+
         # Инициализируем базу данных
         if not self.initialize_database():
             QMessageBox.critical(
@@ -79,11 +141,17 @@ class SatelliteTracker(QMainWindow):
         search_input_layout.addWidget(self.sat_search)
         search_input_layout.addWidget(self.search_button)
 
-        self.search_results = QListWidget()
+        # Результаты поиска: модель подгружает строки по мере прокрутки
+        self.search_model = SatelliteListModel(self.db.get_display_name, self)
+        self.search_results = QListView()
+        self.search_results.setModel(self.search_model)
+        self.search_results.setUniformItemSizes(True)
         self.search_results.setMaximumHeight(150)
+        self.search_status = QLabel()
 
         search_layout.addLayout(search_input_layout)
         search_layout.addWidget(self.search_results)
+        search_layout.addWidget(self.search_status)
 
         sat_layout.addRow("Поиск:", search_widget)
 
@@ -95,10 +163,22 @@ class SatelliteTracker(QMainWindow):
         self.selected_sats_list.itemClicked.connect(self.on_satellite_selected)
         sat_layout.addRow("Выбранные\nспутники:", self.selected_sats_list)
 
+        # Поиск по мере ввода: запрос выполняется в фоне после паузы в наборе
+        self._search_generation = 0
+        self.search_pool = QThreadPool(self)
+        self.search_pool.setMaxThreadCount(1)
+        self.search_signals = SearchSignals(self)
+        self.search_signals.finished.connect(self._on_search_finished)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.search_satellite)
+
         # Подключаем сигналы
         self.search_button.clicked.connect(self.search_satellite)
         self.sat_search.returnPressed.connect(self.search_satellite)
-        self.search_results.itemDoubleClicked.connect(self.select_satellite)
+        self.sat_search.textChanged.connect(self.search_timer.start)
+        self.search_results.doubleClicked.connect(self.select_satellite)
         self.category_combo.currentTextChanged.connect(
             self.on_category_changed)
 
@@ -107,6 +187,16 @@ class SatelliteTracker(QMainWindow):
         self.prog_input = QLineEdit("120")
         prog_layout.addRow("Интервал (мин):", self.prog_input)
 
+        # Зоны видимости спутников на 2D карте
+        self.footprint_check = QCheckBox("Показывать зоны видимости")
+        prog_layout.addRow(self.footprint_check)
+        self.footprint_elev_input = QLineEdit("10")
+        prog_layout.addRow("Мин. угол места (°):", self.footprint_elev_input)
+
+        # 3D вид в инерциальной системе: орбиты неподвижны, вращается Земля
+        self.inertial_check = QCheckBox("3D в инерциальной системе (ECI)")
+        prog_layout.addRow(self.inertial_check)
+
         # Группа станции
         station_group = QGroupBox("Наземная станция")
         station_layout = QFormLayout(station_group)
@@ -140,6 +230,10 @@ class SatelliteTracker(QMainWindow):
 
         # Верхняя часть - 2D карта
         self.map_2d = Map2DWidget()
+        # После смены масштаба трассы запрашиваются с новой детализацией
+        # (в очереди событий, а не внутри обработчика колеса мыши)
+        self.map_2d.lod_changed.connect(
+            lambda: self.render_scheduler.mark_dirty('map'), Qt.QueuedConnection)
         right_layout.addWidget(self.map_2d, stretch=2)
 
         # Нижняя часть - 3D и SkyView
@@ -159,16 +253,38 @@ class SatelliteTracker(QMainWindow):
         main_layout.addWidget(left_panel, stretch=1)
         main_layout.addWidget(right_panel, stretch=4)
 
-        # Таймер для автообновления
-        self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self.update_views)
-        self.update_timer.start(1000)  # Обновление каждую секунду
+        # Таймер периодического обновления TLE
+        self.refresh_worker = None
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh_catalog)
+        self.refresh_timer.start(REFRESH_INTERVAL_MS)
 
         # Хранилище данных о спутниках
-        self.satellites = {}  # {name: {'tle1': ..., 'tle2': ..., 'color': ...}}
-        # Имя текущего выбранного спутника для детальной информации
+        self.satellites = {}  # {norad_id: {'name': ..., 'tle1': ..., 'tle2': ..., 'color': ...}}
+        # Номер NORAD текущего выбранного спутника для детальной информации
         self.current_satellite = None
 
+        # Кэши эфемерид и пролетов (сбрасываются только при изменении TLE)
+        self.ephemeris = EphemerisCache()
+        self.pass_cache = PassCache()
+
+        # Перерисовка представлений: у каждого своя частота и бюджет кадра;
+        # скрытые и не изменившиеся представления не перерисовываются
+        self.render_scheduler = RenderScheduler(self)
+        for name, widget, render in (('map', self.map_2d, self._render_map),
+                                     ('sky', self.sky_view, self._render_sky),
+                                     ('3d', self.earth_3d, self._render_3d)):
+            rate_hz, budget_ms = VIEW_REFRESH[name]
+            self.render_scheduler.add_view(name, widget, render, rate_hz, budget_ms)
+
+        # Изменение настроек прогноза и станции требует перерисовки
+        for line_edit in (self.prog_input, self.footprint_elev_input,
+                          self.lat_input, self.lon_input, self.alt_input):
+            line_edit.editingFinished.connect(self.update_views)
+        self.footprint_check.toggled.connect(
+            lambda: self.render_scheduler.mark_dirty('map'))
+        self.inertial_check.toggled.connect(self._on_frame_changed)
+
     def _create_menu(self):
         """Создание главного меню"""
         menubar = self.menuBar()
@@ -179,6 +295,10 @@ class SatelliteTracker(QMainWindow):
         # Пункт "Управление справочниками"
         ref_action = file_menu.addAction("Управление справочниками")
         ref_action.triggered.connect(self._show_reference_editor)
+
+        # Пункт "Обновить TLE"
+        refresh_action = file_menu.addAction("Обновить TLE")
+        refresh_action.triggered.connect(self.refresh_catalog)
         
         file_menu.addSeparator()
         
@@ -186,72 +306,206 @@ class SatelliteTracker(QMainWindow):
         exit_action = file_menu.addAction("Выход")
         exit_action.triggered.connect(self.close)
 
+        # Меню "Анализ": покрытие выбранных спутников за интервал прогноза
+        analysis_menu = menubar.addMenu("Анализ")
+        coverage_action = analysis_menu.addAction("Рассчитать покрытие")
+        coverage_action.triggered.connect(self.calculate_coverage)
+
+        analysis_menu.addSeparator()
+        show_coverage_action = analysis_menu.addAction("Показать время покрытия")
+        show_coverage_action.triggered.connect(
+            lambda: self._show_coverage('coverage_minutes'))
+        show_gap_action = analysis_menu.addAction("Показать максимальный перерыв")
+        show_gap_action.triggered.connect(
+            lambda: self._show_coverage('max_gap_minutes'))
+        hide_coverage_action = analysis_menu.addAction("Скрыть покрытие")
+        hide_coverage_action.triggered.connect(lambda: self.map_2d.clear_coverage())
+
+        analysis_menu.addSeparator()
+        export_coverage_action = analysis_menu.addAction("Экспорт покрытия...")
+        export_coverage_action.triggered.connect(self.export_coverage)
+
         # Добавляем статусбар
         self.statusBar = QStatusBar()
         self.setStatusBar(self.statusBar)
 
     def _show_reference_editor(self):
         """Открытие окна управления справочниками"""
-        editor = ReferenceManager()
-        editor.show()
-        # Сохраняем ссылку, чтобы окно не закрылось сразу
-        self.ref_editor = editor
+        # Окно создается один раз и работает с уже загруженной базой
+        if self.ref_editor is None:
+            self.ref_editor = ReferenceManager(self.db)
+        self.ref_editor.show()
+        self.ref_editor.raise_()
+        self.ref_editor.activateWindow()
+
+    def calculate_coverage(self):
+        """Запуск фонового расчета покрытия отслеживаемых спутников"""
+        if self.coverage_worker is not None and self.coverage_worker.isRunning():
+            return
+        if not self.satellites:
+            QMessageBox.information(self, "Информация",
+                                    "Добавьте спутники для расчета покрытия")
+            return
+        try:
+            duration = int(self.prog_input.text())
+            min_elevation = float(self.footprint_elev_input.text())
+        except ValueError:
+            QMessageBox.warning(self, "Предупреждение",
+                                "Некорректный интервал прогноза или угол места")
+            return
+
+        satellites = []
+        for norad_id, sat_data in self.satellites.items():
+            try:
+                sat = self.db.get_satellite(norad_id)
+            except Exception as e:
+                print(f"Ошибка создания пропагатора {sat_data['name']}: {str(e)}")
+                continue
+            if sat is not None:
+                satellites.append(sat)
+        self.statusBar.showMessage("Расчет покрытия...")
+        self.coverage_worker = CoverageWorker(satellites, datetime.now(timezone.utc),
+                                              max(0, duration), min_elevation, self)
+        self.coverage_worker.progress.connect(
+            lambda done, total: self.statusBar.showMessage(
+                f"Расчет покрытия: {100 * done // total}%"))
+        self.coverage_worker.finished_grid.connect(self._on_coverage_calculated)
+        self.coverage_worker.failed.connect(self._on_coverage_failed)
+        self.coverage_worker.start()
+
+    def _on_coverage_calculated(self, grid):
+        self.coverage_grid = grid
+        self.statusBar.showMessage(
+            f"Покрытие рассчитано: {len(grid['satellites'])} спутников, "
+            f"{grid['duration_minutes']} мин", 10000)
+        self._show_coverage('coverage_minutes')
+
+    def _on_coverage_failed(self, message):
+        print(f"Ошибка расчета покрытия: {message}")
+        self.statusBar.clearMessage()
+        QMessageBox.warning(self, "Предупреждение", f"Ошибка расчета покрытия: {message}")
+
+    def _show_coverage(self, field):
+        """Показ рассчитанного покрытия на 2D карте"""
+        if self.coverage_grid is None:
+            QMessageBox.information(self, "Информация", "Покрытие еще не рассчитано")
+            return
+        self.map_2d.set_coverage(self.coverage_grid, field)
+
+    def export_coverage(self):
+        """Сохранение сетки покрытия в файл NumPy"""
+        if self.coverage_grid is None:
+            QMessageBox.information(self, "Информация", "Покрытие еще не рассчитано")
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Экспорт покрытия", "coverage.npz",
+            "Архив NumPy (*.npz);;Массив NumPy (*.npy)")
+        if not path:
+            return
+        try:
+            save_coverage(path, self.coverage_grid)
+            self.statusBar.showMessage(f"Покрытие сохранено: {path}", 10000)
+        except Exception as e:
+            print(f"Ошибка сохранения покрытия: {str(e)}")
+            QMessageBox.critical(self, "Ошибка", f"Ошибка сохранения покрытия: {str(e)}")
 
     def initialize_database(self) -> bool:
         """Инициализирует БД и возвращает статус успеха"""
         try:
-            self.db = Database()
+            self.db = get_database()
             return True
         except Exception as e:
             print(f"Ошибка инициализации БД: {str(e)}")
             return False
 
+    def refresh_catalog(self):
+        """Запуск фонового обновления TLE"""
+        if self.refresh_worker is not None and self.refresh_worker.isRunning():
+            return
+        self.statusBar.showMessage("Обновление TLE...")
+        self.refresh_worker = CatalogRefreshWorker(self.db, self)
+        self.refresh_worker.fetched.connect(self._on_catalog_fetched)
+        self.refresh_worker.start()
+
+    def _on_catalog_fetched(self, entries):
+        """Применение загруженных TLE: пересчитываются только изменившиеся спутники"""
+        changed = self.db.apply_celestrak_data(entries)
+        tracked = changed & self.satellites.keys()
+        for norad_id in tracked:
+            self.satellites[norad_id]['tle1'], self.satellites[norad_id]['tle2'] = \
+                self.db.get_satellite_tle(norad_id)
+        self.ephemeris.invalidate(tracked)
+        self.pass_cache.invalidate(tracked)
+        if tracked:
+            self.update_views()
+        self.statusBar.showMessage(
+            f"TLE обновлены: изменилось {len(changed)} из {len(self.db.catalog)}", 10000)
+
     def generate_color(self):
         """Генерирует случайный цвет для нового спутника"""
         return QColor(random.randint(30, 255), random.randint(30, 255), random.randint(30, 255))
 
+    def _make_satellite_item(self, norad_id: int) -> QListWidgetItem:
+        """Создает элемент списка спутника с номером NORAD в данных"""
+        item = QListWidgetItem(self.db.get_display_name(norad_id))
+        item.setData(Qt.UserRole, norad_id)
+        return item
+
     def search_satellite(self):
-        """Поиск спутника по имени и отображение результатов"""
+        """Запуск фонового поиска спутника по имени или номеру"""
+        self.search_timer.stop()
         search_term = self.sat_search.text().strip()
+        self._search_generation += 1
+        # Еще не начатые устаревшие запросы снимаются с очереди
+        self.search_pool.clear()
+
         if not search_term:
-            QMessageBox.warning(self, "Предупреждение",
-                                "Введите название спутника")
+            self._show_category(self.category_combo.currentText())
             return
 
-        self.search_results.clear()
-        try:
-            results = self.db.search_satellites(search_term)
-            if results:
-                # Показываем первые 20 результатов
-                self.search_results.addItems(results[:20])
-                if len(results) > 20:
-                    self.search_results.addItem(
-                        f"... и еще {len(results) - 20} результатов")
-            else:
-                self.search_results.addItem("Спутники не найдены")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка поиска: {str(e)}")
+        self.search_pool.start(SearchTask(
+            self._search_generation, search_term,
+            self.db.search_satellites, self.search_signals))
+
+    def _on_search_finished(self, generation, search_term, results):
+        """Отображение результатов поиска (результаты устаревших запросов отбрасываются)"""
+        if generation != self._search_generation:
+            return
+        self._show_results(results)
+
+    def _show_results(self, norad_ids):
+        """Отображение списка спутников в результатах поиска"""
+        self.search_model.set_results(norad_ids)
+        if norad_ids:
+            self.search_status.setText(f"Найдено спутников: {len(norad_ids)}")
+        else:
+            self.search_status.setText("Спутники не найдены")
+
+    def _show_category(self, category):
+        """Отображение всех спутников категории в результатах поиска"""
+        satellites = self.db.get_satellites_by_category(category)
+        self._show_results([sat['norad_id'] for sat in satellites])
 
     def on_satellite_selected(self, item):
         """Обработчик выбора спутника из списка для отображения детальной информации"""
-        satellite_name = item.text()
-        self.current_satellite = satellite_name
+        self.current_satellite = item.data(Qt.UserRole)
         self.update_views()
 
-    def select_satellite(self, item):
-        """Обработка выбора спутника из списка"""
-        satellite_name = item.text()
-        if "... и еще" in satellite_name:
+    def select_satellite(self, index):
+        """Обработка выбора спутника из результатов поиска"""
+        norad_id = self.search_model.norad_id(index)
+        if norad_id is None:
             return
+        satellite_name = self.db.get_display_name(norad_id)
 
         try:
-            if satellite_name in self.satellites:
+            if norad_id in self.satellites:
                 QMessageBox.information(
                     self, "Информация", "Этот спутник уже добавлен")
                 return
 
-            print(f"Добавление спутника: {satellite_name}")
-            tle = self.db.get_satellite_tle(satellite_name)
+            print(f"Добавление спутника: {satellite_name} (NORAD {norad_id})")
+            tle = self.db.get_satellite_tle(norad_id)
             if tle:
                 tle1, tle2 = tle
                 print(f"Получены TLE данные для {satellite_name}:")
@@ -262,17 +516,19 @@ class SatelliteTracker(QMainWindow):
                 print(f"Сгенерирован цвет: RGB({color.red()}, {color.green()}, {color.blue()})")
 
                 # Добавляем спутник в хранилище
-                self.satellites[satellite_name] = {
+                self.satellites[norad_id] = {
+                    'name': satellite_name,
                     'tle1': tle1,
                     'tle2': tle2,
                     'color': color
                 }
 
                 # Добавляем в список выбранных спутников
-                self.selected_sats_list.addItem(satellite_name)
+                self.selected_sats_list.addItem(
+                    self._make_satellite_item(norad_id))
 
                 # Устанавливаем как текущий для отображения информации
-                self.current_satellite = satellite_name
+                self.current_satellite = norad_id
 
                 print(f"Спутник {satellite_name} успешно добавлен в список отслеживаемых")
                 self.update_views()
@@ -290,6 +546,7 @@ class SatelliteTracker(QMainWindow):
     def remove_satellite(self, item):
         """Удаление спутника из списка отслеживаемых"""
         satellite_name = item.text()
+        norad_id = item.data(Qt.UserRole)
         reply = QMessageBox.question(
             self, 'Подтверждение',
             f'Удалить спутник {satellite_name} из списка?',
@@ -297,14 +554,16 @@ class SatelliteTracker(QMainWindow):
 
         if reply == QMessageBox.Yes:
             # Удаляем из хранилища
-            if satellite_name in self.satellites:
-                del self.satellites[satellite_name]
+            if norad_id in self.satellites:
+                del self.satellites[norad_id]
+                self.ephemeris.invalidate([norad_id])
+                self.pass_cache.invalidate([norad_id])
 
             # Удаляем из списка
             self.selected_sats_list.takeItem(self.selected_sats_list.row(item))
 
             # Если удалили текущий спутник, сбрасываем текущий
-            if self.current_satellite == satellite_name:
+            if self.current_satellite == norad_id:
                 self.current_satellite = None
                 self.info_text.clear()
 
@@ -313,170 +572,196 @@ class SatelliteTracker(QMainWindow):
     def on_category_changed(self, category):
         """Обработка изменения категории спутников"""
         try:
-            # Очищаем результаты поиска и список выбранных спутников
-            self.search_results.clear()
+            # Очищаем список выбранных спутников
             self.selected_sats_list.clear()
             self.satellites.clear()
+            self.ephemeris.clear()
+            self.pass_cache.clear()
+            self.update_views()
 
-            # Получаем спутники выбранной категории
-            satellites = self.db.get_satellites_by_category(category)
-
-            # Добавляем первые 20 спутников в список результатов
-            for sat in satellites[:20]:
-                self.search_results.addItem(sat['name'])
-
-            if len(satellites) > 20:
-                self.search_results.addItem(
-                    f"... и еще {len(satellites) - 20} спутников")
+            # Показываем все спутники выбранной категории
+            self._search_generation += 1
+            self._show_category(category)
 
         except Exception as e:
             QMessageBox.critical(
                 self, "Ошибка", f"Ошибка при смене категории: {str(e)}")
 
     def update_views(self):
+        """Пометка всех представлений для перерисовки (после изменения данных или настроек)"""
+        self.render_scheduler.set_animating(bool(self.satellites))
+        self.render_scheduler.mark_dirty()
+
+    def _station_coordinates(self):
+        """Координаты станции (lon, lat, alt) или (None, None, None) при ошибке ввода"""
+        try:
+            return (float(self.lon_input.text()), float(self.lat_input.text()),
+                    float(self.alt_input.text()))
+        except ValueError:
+            return None, None, None
+
+    def _forecast_depth(self) -> int:
+        try:
+            return int(self.prog_input.text())
+        except ValueError:
+            return 0
+
+    def _render_map(self):
+        """Кадр 2D карты"""
         if not self.satellites:
-            # Очищаем все представления, если нет спутников
             self.map_2d.clear_plot()
-            self.earth_3d.clear_view()
-            self.sky_view.clear_plot()
             return
 
-        try:
-            # Получаем координаты станции
+        station_lon, station_lat, _ = self._station_coordinates()
+        now = datetime.now(timezone.utc)
+        depth = self._forecast_depth()
+        # Трассы для 2D карты прореживаются до разрешения текущего масштаба
+        lod_tolerance = self.map_2d.lod_tolerance()
+
+        map_data = []
+        for norad_id, sat_data in self.satellites.items():
+            try:
+                sat = self.db.get_satellite(norad_id)
+                # Трасса с разрывами на ±180° (из буфера эфемерид)
+                map_lons, map_lats = self.ephemeris.get_ground_track(
+                    norad_id, sat, now, depth, lod_tolerance)
+                position = self.ephemeris.get_position(norad_id, sat, now)
+            except Exception as e:
+                print(f"Ошибка расчета траектории {sat_data['name']}: {e}")
+                continue
+            map_data.append({
+                'lons': map_lons,
+                'lats': map_lats,
+                'alt': position['altitude'],
+                'name': sat_data['name'],
+                'color': sat_data['color']
+            })
+
+        # Минимальный угол места для зон видимости (None — зоны скрыты)
+        footprint_elevation = None
+        if self.footprint_check.isChecked():
             try:
-                station_lon = float(self.lon_input.text())
-                station_lat = float(self.lat_input.text())
-                station_alt = float(self.alt_input.text())
+                footprint_elevation = float(self.footprint_elev_input.text())
             except ValueError:
-                station_lon, station_lat, station_alt = None, None, None
+                footprint_elevation = 0.0
 
-            now = datetime.now(timezone.utc)
-            all_passes = []
+        try:
+            self.map_2d.update_plot(map_data, station_lon, station_lat,
+                                    footprint_elevation)
+        except Exception as e:
+            print(f"Ошибка обновления 2D карты: {e}")
+            QMessageBox.warning(self, "Предупреждение",
+                                f"Ошибка обновления 2D карты: {str(e)}")
 
-            # Собираем данные для всех спутников
-            map_data = []
-            earth_3d_data = []
-            sky_view_data = []
+    def _on_frame_changed(self, inertial: bool):
+        """Переключение системы координат 3D вида"""
+        self.earth_3d.set_frame('eci' if inertial else 'ecef')
+        self.render_scheduler.mark_dirty('3d')
 
-            for sat_name, sat_data in self.satellites.items():
-                try:
-                    sat = Satellite(
-                        sat_name, sat_data['tle1'], sat_data['tle2'])
-                    color = sat_data['color']
+    def _render_3d(self):
+        """Кадр 3D вида"""
+        if not self.satellites:
+            self.earth_3d.clear_view()
+            return
 
-                    # Рассчитываем траекторию
-                    lons, lats, alts = [], [], []
-                    try:
-                        depth = int(self.prog_input.text())
-                    except:
-                        depth = 0
-
-                    for i in range(depth+1):
-                        time = now + timedelta(minutes=i)
-                        try:
-                            pos = sat.calculate_satellite_position(time)
-                            lons.append(pos['longitude'])
-                            lats.append(pos['latitude'])
-                            alts.append(pos['altitude'])
-                        except Exception as e:
-                            print(
-                                f"Ошибка расчета позиции для времени {time}: {e}")
-                            continue
-
-                    if not lons:  # Если не удалось рассчитать ни одной позиции
-                        continue
-
-                    # Добавляем данные для 2D карты
-                    map_data.append({
-                        'lons': lons,
-                        'lats': lats,
-                        'name': sat_name,
-                        'color': color
-                    })
-
-                    # Добавляем данные для 3D вида
-                    earth_3d_data.append({
-                        'lons': lons,
-                        'lats': lats,
-                        'alts': alts,
-                        'name': sat_name,
-                        'color': color
-                    })
-
-                    # Рассчитываем положение спутника относительно станции
-                    if station_lon is not None and station_lat is not None:
-                        try:
-                            look = sat.get_observer_look({
-                                'lat': station_lat,
-                                'lon': station_lon,
-                                'alt': station_alt
-                            }, now)
-
-                            # Добавляем данные для SkyView
-                            sky_view_data.append({
-                                'azimuth': look['azimuth'],
-                                'elevation': look['elevation'],
-                                'name': sat_name,
-                                'color': color
-                            })
-
-                            # Если это текущий спутник, обновляем информацию
-                            if sat_name == self.current_satellite:
-                                self.update_satellite_info(
-                                    sat, now, look['azimuth'], look['elevation'])
-
-                            # Рассчитываем пролеты для SkyView
-                            passes = self.calculate_passes(
-                                sat, station_lat, station_lon, station_alt, now)
-                            if len(passes) > 0:
-                                all_passes.extend(
-                                    [(passes[0], color, sat_name)])
-
-                        except Exception as e:
-                            print(
-                                f"Ошибка расчета положения относительно станции: {e}")
-                            if sat_name == self.current_satellite:
-                                self.update_satellite_info(
-                                    sat, now, None, None)
-
-                    elif sat_name == self.current_satellite:
-                        self.update_satellite_info(sat, now, None, None)
-
-                except Exception as e:
-                    print(f"Ошибка обработки спутника {sat_name}: {e}")
-                    continue
-
-            # Обновляем все представления
+        station_lon, station_lat, _ = self._station_coordinates()
+        now = datetime.now(timezone.utc)
+        depth = self._forecast_depth()
+        inertial = self.earth_3d.frame == 'eci'
+
+        earth_3d_data = []
+        for norad_id, sat_data in self.satellites.items():
+            entry = {'name': sat_data['name'], 'color': sat_data['color']}
             try:
-                self.map_2d.update_plot(map_data, station_lon, station_lat)
+                sat = self.db.get_satellite(norad_id)
+                if inertial:
+                    # Виток строится один раз для TLE, за кадр — только положение
+                    entry['orbit'], entry['position'] = self.ephemeris.get_inertial_orbit(
+                        norad_id, sat, now)
+                else:
+                    entry['lons'], entry['lats'], entry['alts'] = self.ephemeris.get_track(
+                        norad_id, sat, now, depth)
             except Exception as e:
-                print(f"Ошибка обновления 2D карты: {e}")
-                QMessageBox.warning(self, "Предупреждение",
-                                    f"Ошибка обновления 2D карты: {str(e)}")
+                print(f"Ошибка расчета траектории {sat_data['name']}: {e}")
+                continue
+            earth_3d_data.append(entry)
+
+        try:
+            self.earth_3d.update_view(earth_3d_data, station_lon, station_lat,
+                                      sidereal_angle(now) if inertial else None)
+        except Exception as e:
+            print(f"Ошибка обновления 3D вида: {e}")
+            QMessageBox.warning(self, "Предупреждение",
+                                f"Ошибка обновления 3D вида: {str(e)}")
+
+    def _render_sky(self):
+        """Кадр вида неба и панели информации о текущем спутнике"""
+        if not self.satellites:
+            self.sky_view.clear_plot()
+            return
+
+        station_lon, station_lat, station_alt = self._station_coordinates()
+        now = datetime.now(timezone.utc)
+        all_passes = []
+        sky_view_data = []
 
+        for norad_id, sat_data in self.satellites.items():
+            sat_name = sat_data['name']
+            color = sat_data['color']
             try:
-                self.earth_3d.update_view(
-                    earth_3d_data, station_lon, station_lat)
+                sat = self.db.get_satellite(norad_id)
             except Exception as e:
-                print(f"Ошибка обновления 3D вида: {e}")
-                QMessageBox.warning(self, "Предупреждение",
-                                    f"Ошибка обновления 3D вида: {str(e)}")
-
+                print(f"Ошибка обработки спутника {sat_name}: {e}")
+                continue
+
+            # Рассчитываем положение спутника относительно станции
+            if station_lon is None or station_lat is None:
+                if norad_id == self.current_satellite:
+                    self.update_satellite_info(norad_id, sat, now, None, None)
+                continue
             try:
-                self.sky_view.update_plot(sky_view_data, all_passes)
+                look = sat.get_observer_look({
+                    'lat': station_lat,
+                    'lon': station_lon,
+                    'alt': station_alt
+                }, now)
+
+                # Добавляем данные для SkyView
+                sky_view_data.append({
+                    'azimuth': look['azimuth'],
+                    'elevation': look['elevation'],
+                    'name': sat_name,
+                    'color': color
+                })
+
+                # Рассчитываем пролеты для SkyView (из кэша)
+                contacts, passes = self.pass_cache.get(
+                    norad_id, (station_lat, station_lon, station_alt), now,
+                    lambda t, sat=sat: self.calculate_passes(
+                        sat, station_lat, station_lon, station_alt, t))
+                if len(passes) > 0:
+                    all_passes.extend([(passes[0], color, sat_name)])
+
+                # Если это текущий спутник, обновляем информацию
+                if norad_id == self.current_satellite:
+                    self.update_satellite_info(
+                        norad_id, sat, now, look['azimuth'], look['elevation'], contacts)
+
             except Exception as e:
-                print(f"Ошибка обновления вида неба: {e}")
-                QMessageBox.warning(self, "Предупреждение",
-                                    f"Ошибка обновления вида неба: {str(e)}")
+                print(f"Ошибка расчета положения относительно станции: {e}")
+                if norad_id == self.current_satellite:
+                    self.update_satellite_info(norad_id, sat, now, None, None)
 
+        try:
+            self.sky_view.update_plot(sky_view_data, all_passes)
         except Exception as e:
-            error_msg = f"Ошибка при обновлении представлений: {str(e)}"
-            print(error_msg)
-            QMessageBox.critical(self, "Ошибка", error_msg)
+            print(f"Ошибка обновления вида неба: {e}")
+            QMessageBox.warning(self, "Предупреждение",
+                                f"Ошибка обновления вида неба: {str(e)}")
 
     def calculate_passes(self, sat, station_lat, station_lon, station_alt, now):
-        """Рассчитывает пролеты спутника над станцией"""
-        passes = []
+        """Рассчитывает контакты и пролеты спутника над станцией"""
+        contacts, passes = [], []
         try:
             contacts = sat.get_contacts_times({
                 'lat': station_lat,
@@ -519,9 +804,9 @@ class SatelliteTracker(QMainWindow):
         except Exception as e:
             print(f"Ошибка расчета пролетов: {e}")
 
-        return passes
+        return contacts, passes
 
-    def update_satellite_info(self, sat, time, azimuth, elevation):
+    def update_satellite_info(self, norad_id, sat, time, azimuth, elevation, contacts=None):
         """Обновляет информацию о выбранном спутнике в стиле панели справа"""
         # Сохраняем текущую позицию скролла
         scroll_bar = self.info_text.verticalScrollBar()
@@ -550,7 +835,7 @@ class SatelliteTracker(QMainWindow):
         fmt_value.setFontPointSize(10)
 
         # Заголовок с цветным индикатором
-        color = self.satellites[sat.name]['color']
+        color = self.satellites[norad_id]['color']
         cursor.insertText("   ", fmt_normal)  # Отступ для цветного индикатора
 
         # Вставляем цветной квадратик (символ с фоном)
@@ -560,6 +845,7 @@ class SatelliteTracker(QMainWindow):
         cursor.insertText(" ", fmt_normal)  # Пробел после индикатора
 
         cursor.insertText(f"{sat.name}\n", fmt_title)
+        cursor.insertText(f"  NORAD ID: {norad_id}\n", fmt_value)
         cursor.insertText("\n", fmt_normal)
 
         cursor.insertText(f"Проекция на землю\n", fmt_section)
@@ -594,17 +880,18 @@ class SatelliteTracker(QMainWindow):
             cursor.insertText("  Статус: ", fmt_value)
             cursor.insertText(f"{status}\n", fmt_status)
 
-            # Рассчитываем следующее время контакта
+            # Следующее время контакта
             try:
-                station_lat = float(self.lat_input.text())
-                station_lon = float(self.lon_input.text())
-                station_alt = float(self.alt_input.text())
+                if contacts is None:
+                    station_lat = float(self.lat_input.text())
+                    station_lon = float(self.lon_input.text())
+                    station_alt = float(self.alt_input.text())
 
-                contacts = sat.get_contacts_times({
-                    'lat': station_lat,
-                    'lon': station_lon,
-                    'alt': station_alt
-                }, time, 5)
+                    contacts = sat.get_contacts_times({
+                        'lat': station_lat,
+                        'lon': station_lon,
+                        'alt': station_alt
+                    }, time, 5)
 
                 if contacts and len(contacts) > 0:
                     next_contact = contacts[0]
@@ -634,19 +921,33 @@ class SatelliteTracker(QMainWindow):
             f"  Время: {time.strftime('%Y-%m-%d %H:%M:%S UTC')}\n", fmt_value)
 
         try:
-            TLE2 = self.satellites[sat.name]['tle2']
+            # Параметры рассчитаны при загрузке каталога
+            params = self.db.get_orbit_parameters(norad_id, time)
+            if params is None:
+                raise ValueError("нет данных в каталоге")
+            cursor.insertText(
+                f"  Наклонение: {params['inclination']:.2f}°\n", fmt_value)
+            cursor.insertText(
+                f"  RAAN: {params['raan']:.2f}°\n", fmt_value)
             cursor.insertText(
-                f"  Наклонение: {float(TLE2[8:16]):.2f}°\n", fmt_value)
+                f"  Аргумент перицентра: {params['arg_perigee']:.2f}°\n", fmt_value)
             cursor.insertText(
-                f"  RAAN: {float(TLE2[17:25]):.2f}°\n", fmt_value)
+                f"  Эксцентриситет: {params['eccentricity']:.6f}\n", fmt_value)
             cursor.insertText(
-                f"  Аргумент перицентра: {float(TLE2[34:42]):.2f}°\n", fmt_value)
+                f"  Средняя аномалия: {params['mean_anomaly']:.2f}°\n", fmt_value)
             cursor.insertText(
-                f"  Эксцентриситет: {float(f'0.{TLE2[26:33]}'):.6f}\n", fmt_value)
+                f"  Период: {params['period_minutes']:.2f} мин\n", fmt_value)
             cursor.insertText(
-                f"  Средняя аномалия: {float(TLE2[43:51]):.2f}°\n", fmt_value)
+                f"  Большая полуось: {params['semi_major_axis_km']:.1f} км\n", fmt_value)
+            cursor.insertText(
+                f"  Апогей: {params['apogee_km']:.1f} км\n", fmt_value)
+            cursor.insertText(
+                f"  Перигей: {params['perigee_km']:.1f} км\n", fmt_value)
+            if params.get('orbit_type'):
+                cursor.insertText(
+                    f"  Тип орбиты: {params['orbit_type']}\n", fmt_value)
             cursor.insertText(
-                f"  Период: {(1440 / float(TLE2[52:63])):.2f} мин\n", fmt_value)
+                f"  Возраст TLE: {params['tle_age_days']:.1f} сут\n", fmt_value)
         except Exception as e:
             cursor.insertText(
                 f"  Не удалось получить параметры орбиты: {str(e)}\n", fmt_value)
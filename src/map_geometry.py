@@ -0,0 +1,220 @@
+from typing import List, Sequence, Tuple
+import numpy as np
+
+# Экваториальный радиус Земли (км)
+EARTH_RADIUS = 6378.137
+
+
+def split_antimeridian(lons: Sequence[float], lats: Sequence[float]
+                       ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Разбиение трассы на участки при пересечении линии ±180° (векторно).
+
+    В месте пересечения добавляются точки на краях карты с интерполированной
+    широтой, разделенные NaN, поэтому трассу можно рисовать в PlateCarree
+    одной линией без геодезических преобразований.
+
+    :param lons: Долготы (градусы, -180..180)
+    :param lats: Широты (градусы)
+    :return: Долготы и широты с разрывами, индексы исходных точек в результате
+    """
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    if len(lons) < 2:
+        return lons.copy(), lats.copy(), np.arange(len(lons))
+
+    step = np.diff(lons)
+    crossings = np.nonzero(np.abs(step) > 180)[0]
+    if len(crossings) == 0:
+        return lons.copy(), lats.copy(), np.arange(len(lons))
+
+    # Граница, к которой уходит трасса: +180 при движении на восток через линию
+    lon0 = lons[crossings]
+    lat0 = lats[crossings]
+    direction = -np.sign(step[crossings])
+    lon1 = lons[crossings + 1] + 360 * direction
+    lat1 = lats[crossings + 1]
+    edge = 180 * direction
+    fraction = (edge - lon0) / (lon1 - lon0)
+    lat_edge = lat0 + fraction * (lat1 - lat0)
+
+    # Для каждого пересечения: край, разрыв, противоположный край
+    positions = np.repeat(crossings + 1, 3)
+    inserted_lons = np.column_stack([edge, np.full_like(edge, np.nan), -edge]).ravel()
+    inserted_lats = np.column_stack([lat_edge, np.full_like(lat_edge, np.nan),
+                                     lat_edge]).ravel()
+    split_lons = np.insert(lons, positions, inserted_lons)
+    split_lats = np.insert(lats, positions, inserted_lats)
+
+    # Перед точкой i вставлено по 3 значения на каждое предшествующее пересечение
+    shift = np.zeros(len(lons), dtype=int)
+    shift[crossings + 1] = 3
+    index = np.arange(len(lons)) + np.cumsum(shift)
+    return split_lons, split_lats, index
+
+
+def footprint_radius(altitudes: Sequence[float], min_elevation: float) -> np.ndarray:
+    """
+    Угловой радиус зоны видимости (центральный угол Земли)
+
+    :param altitudes: Высоты спутников (км)
+    :param min_elevation: Минимальный угол места на границе зоны (градусы)
+    :return: Радиусы зон в радианах
+    """
+    elevation = np.radians(min_elevation)
+    ratio = EARTH_RADIUS / (EARTH_RADIUS + np.maximum(np.asarray(altitudes, dtype=float), 0))
+    return np.arccos(np.clip(ratio * np.cos(elevation), -1, 1)) - elevation
+
+
+def footprint_polygons(lons: Sequence[float], lats: Sequence[float],
+                       altitudes: Sequence[float], min_elevation: float = 0.0,
+                       points: int = 90) -> Tuple[List[np.ndarray], np.ndarray]:
+    """
+    Границы зон видимости спутников для карты в PlateCarree.
+
+    Малые круги всех спутников рассчитываются одним векторным проходом.
+    Долготы границы не сворачиваются в -180..180, поэтому полигон, пересекающий
+    линию ±180°, дополняется копией со сдвигом на 360° (лишнее отсекается осями).
+    Зона, накрывающая полюс, замыкается через полюс по краям карты.
+
+    :param lons: Долготы подспутниковых точек (градусы)
+    :param lats: Широты подспутниковых точек (градусы)
+    :param altitudes: Высоты спутников (км)
+    :param min_elevation: Минимальный угол места (градусы)
+    :param points: Количество точек границы
+    :return: Полигоны (массивы (K, 2) долгот и широт) и номер спутника для каждого
+    """
+    lon0 = np.radians(np.asarray(lons, dtype=float))[:, None]
+    lat0 = np.radians(np.asarray(lats, dtype=float))[:, None]
+    radius = footprint_radius(altitudes, min_elevation)[:, None]
+    bearing = np.linspace(0, 2 * np.pi, points, endpoint=False)[None, :]
+
+    # Точки на расстоянии radius от подспутниковой точки по всем азимутам
+    sin_lat = np.sin(lat0) * np.cos(radius) + np.cos(lat0) * np.sin(radius) * np.cos(bearing)
+    lat = np.arcsin(np.clip(sin_lat, -1, 1))
+    dlon = np.arctan2(np.sin(bearing) * np.sin(radius) * np.cos(lat0),
+                      np.cos(radius) - np.sin(lat0) * sin_lat)
+    lon = np.degrees(lon0 + dlon)
+    lat = np.degrees(lat)
+
+    # Зона накрывает полюс, если расстояние до него меньше радиуса
+    colatitude = np.pi / 2 - np.abs(lat0[:, 0])
+    pole = np.where(colatitude < radius[:, 0], np.sign(lat0[:, 0]), 0)
+
+    polygons, owners = [], []
+    for i in range(len(lon)):
+        if not np.isfinite(radius[i, 0]) or radius[i, 0] <= 0:
+            continue
+        if pole[i]:
+            # Граница обходит полюс: упорядочиваем по долготе и замыкаем через полюс
+            center = np.degrees(lon0[i, 0])
+            ring_lon = (lon[i] - center + 180) % 360 + center - 180
+            order = np.argsort(ring_lon)
+            ring_lon, ring_lat = ring_lon[order], lat[i][order]
+            # Широта границы на краях развертки (между последней и первой точкой)
+            gap = ring_lon[0] + 360 - ring_lon[-1]
+            seam_lat = ring_lat[-1] + (ring_lat[0] - ring_lat[-1]) * (
+                (center + 180 - ring_lon[-1]) / gap if gap > 0 else 0)
+            edge_lat = 90 * pole[i]
+            # Граница повторяется трижды со сдвигом на 360°, чтобы вертикальные
+            # края полигона оказались за пределами карты
+            tiled_lon = np.concatenate([ring_lon - 360, ring_lon, ring_lon + 360])
+            tiled_lat = np.tile(ring_lat, 3)
+            polygons.append(np.column_stack([
+                np.concatenate([[center - 540], tiled_lon, [center + 540, center + 540,
+                                                           center - 540]]),
+                np.concatenate([[seam_lat], tiled_lat, [seam_lat, edge_lat, edge_lat]])]))
+            owners.append(i)
+            continue
+
+        polygon = np.column_stack([lon[i], lat[i]])
+        polygons.append(polygon)
+        owners.append(i)
+        # Копии для частей, вышедших за линию ±180°
+        for shift in (-360, 360):
+            shifted = polygon[:, 0] + shift
+            if shifted.min() < 180 and shifted.max() > -180:
+                polygons.append(np.column_stack([shifted, polygon[:, 1]]))
+                owners.append(i)
+    return polygons, np.asarray(owners, dtype=int)
+
+
+def simplify_track(lons: Sequence[float], lats: Sequence[float],
+                   tolerance: float) -> np.ndarray:
+    """
+    Прореживание трассы алгоритмом Дугласа — Пекера.
+
+    Каждый участок между разрывами (NaN) упрощается отдельно; концы участков
+    и сами разрывы сохраняются.
+
+    :param lons: Долготы (градусы)
+    :param lats: Широты (градусы)
+    :param tolerance: Допустимое отклонение от исходной трассы (градусы)
+    :return: Маска сохраняемых точек
+    """
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    gaps = np.isnan(lons) | np.isnan(lats)
+    keep = gaps.copy()
+
+    # Начала и концы участков без разрывов
+    finite = np.concatenate([[False], ~gaps, [False]])
+    edges = np.diff(finite.astype(np.int8))
+    starts = np.nonzero(edges == 1)[0]
+    ends = np.nonzero(edges == -1)[0] - 1
+    keep[starts] = True
+    keep[ends] = True
+
+    stack = [(s, e) for s, e in zip(starts.tolist(), ends.tolist()) if e - s > 1]
+    while stack:
+        first, last = stack.pop()
+        x0, y0 = lons[first], lats[first]
+        dx, dy = lons[last] - x0, lats[last] - y0
+        px, py = lons[first + 1:last] - x0, lats[first + 1:last] - y0
+        # Расстояние до отрезка (а не до прямой), чтобы петли трассы не терялись
+        length = dx * dx + dy * dy
+        t = np.clip((px * dx + py * dy) / length, 0, 1) if length > 0 else 0.0
+        distance = np.hypot(px - t * dx, py - t * dy)
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            middle = first + 1 + i
+            keep[middle] = True
+            if middle - first > 1:
+                stack.append((first, middle))
+            if last - middle > 1:
+                stack.append((middle, last))
+    return keep
+
+
+def clip_track(lons: np.ndarray, lats: np.ndarray,
+               extent: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Отсечение частей трассы за пределами области карты.
+
+    Сохраняются точки отрезков, габарит которых пересекает область;
+    остальные заменяются одним разрывом (NaN) на каждый невидимый участок.
+
+    :param extent: Границы [lon_min, lon_max, lat_min, lat_max]
+    :return: Долготы и широты видимой части с разрывами
+    """
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    if len(lons) < 2:
+        return lons, lats
+
+    # Отрезок виден, если его габарит пересекает область (NaN дает False)
+    x0, x1 = lons[:-1], lons[1:]
+    y0, y1 = lats[:-1], lats[1:]
+    visible = ((np.fmax(x0, x1) >= extent[0]) & (np.fmin(x0, x1) <= extent[1])
+               & (np.fmax(y0, y1) >= extent[2]) & (np.fmin(y0, y1) <= extent[3])
+               & np.isfinite(x0 + x1 + y0 + y1))
+    keep = np.zeros(len(lons), dtype=bool)
+    keep[:-1] |= visible
+    keep[1:] |= visible
+
+    clipped_lons = np.where(keep, lons, np.nan)
+    clipped_lats = np.where(keep, lats, np.nan)
+    # Из подряд идущих разрывов оставляем один
+    gap = ~keep
+    select = keep | (gap & ~np.concatenate([[False], gap[:-1]]))
+    return clipped_lons[select], clipped_lats[select]
@@ -1,11 +1,40 @@
+import math
+import numpy as np
 import matplotlib.pyplot as plt
 import cartopy.crs as ccrs
-import cartopy.feature as cfeature
+from basemap_cache import THEMES, basemap_size, get_basemap
+from coverage import COVERAGE_FIELDS
+from map_geometry import clip_track, footprint_polygons
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.lines import Line2D
 from PySide6 import QtWidgets
+from PySide6.QtCore import Signal
+
+# Максимальное количество спутников, перечисляемых в легенде
+LEGEND_MAX_ITEMS = 10
+# Изменение масштаба за один шаг колеса мыши
+ZOOM_STEP = 1.25
+# Наименьшая ширина области карты (градусы долготы)
+MIN_LON_SPAN = 2.0
+# Наибольшая ширина растра подложки всего мира (пиксели)
+BASEMAP_MAX_WIDTH = 4096
+
+
+def track_segments(lons, lats):
+    """Разбиение трассы на отрезки без NaN (разрывы на линии ±180°)"""
+    points = np.column_stack([np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)])
+    gaps = np.nonzero(np.isnan(points[:, 0]))[0]
+    pieces = np.split(points, gaps)
+    # Каждый отрезок после первого начинается с NaN-разделителя
+    return [piece[1:] if i else piece for i, piece in enumerate(pieces)
+            if len(piece) - (1 if i else 0) > 1]
 
 
 class Map2DWidget(QtWidgets.QWidget):
+    # Изменился допуск прореживания трасс (после смены масштаба)
+    lod_changed = Signal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -20,27 +49,255 @@ class Map2DWidget(QtWidgets.QWidget):
         # Инициализируем границы
         self.original_extent = [-180, 180, -90, 90]  # Весь мир
         self.zoomed = False
+        self.extent = list(self.original_extent)
+        self.theme = 'dark'
 
-        # Подключаем обработчик событий мыши
+        # Подложка рисуется один раз и сохраняется как растр; поверх нее
+        # при каждом обновлении перерисовываются только траектории и маркеры
+        self.ax = None
+        self._basemap = None
+        self._basemap_image = None
+        self._basemap_size = None
+        self._background = None
+        self._footprints = None
+        self._tracks = None
+        self._markers = None
+        self._station = None
+        self._legend = None
+        self._legend_key = None
+        # Слой покрытия: сетка, показываемое поле, растр и шкала
+        self._coverage_grid = None
+        self._coverage_field = None
+        self._coverage_image = None
+        self._coverage_colorbar = None
+        # Аргументы последнего update_plot: при смене области трассы
+        # отсекаются заново без обращения к главному окну
+        self._plot_args = None
+        # Состояние перетаскивания: (x, y на экране, границы в начале)
+        self._pan_start = None
+        self._setup_axes()
+
+        # Колесо мыши — масштаб, перетаскивание — сдвиг, двойной клик — весь мир
         self.canvas.mpl_connect('button_press_event', self.on_click)
+        self.canvas.mpl_connect('motion_notify_event', self._on_motion)
+        self.canvas.mpl_connect('button_release_event', self._on_release)
+        self.canvas.mpl_connect('scroll_event', self._on_scroll)
+        # Полная перерисовка (в том числе при изменении размера) обновляет подложку
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _setup_axes(self):
+        """Создание осей с подложкой карты"""
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111, projection=ccrs.PlateCarree())
+        self.setup_dark_map(self.ax)
+        self.ax.set_extent(self.extent, crs=ccrs.PlateCarree())
+        self._set_title()
+        self._background = None
+
+        # Все трассы — одна коллекция линий, все текущие положения — одна
+        # коллекция маркеров: стоимость отрисовки почти не зависит от числа спутников
+        self._footprints = PolyCollection([], linewidths=0.8, animated=True)
+        self.ax.add_collection(self._footprints, autolim=False)
+        self._tracks = LineCollection([], linewidths=1.8, animated=True)
+        self.ax.add_collection(self._tracks, autolim=False)
+        self._markers = self.ax.scatter(np.empty(0), np.empty(0), s=50, edgecolors='white',
+                                        animated=True)
+        self._station = self.ax.scatter(np.empty(0), np.empty(0), color='#42a5f5', s=80,
+                                        marker='^', edgecolor='white', animated=True)
+        self._legend = None
+        self._legend_key = None
+
+    def _update_basemap(self, ax):
+        """
+        Установка растра подложки для текущего масштаба и размера осей.
+
+        Подложка всегда покрывает весь мир, а ее разрешение растет с масштабом
+        ступенями по степеням двойки: сдвиг карты не требует новой подложки,
+        а соседние масштабы используют один растр.
+
+        :return: True, если растр изменился
+        """
+        width = self.figure.bbox.width * ax.get_position().width
+        zoom = 2 ** math.ceil(math.log2(max(1.0, self._zoom_factor())))
+        world_width = min(BASEMAP_MAX_WIDTH, width * zoom)
+        size = basemap_size(self.original_extent, world_width)
+        changed = self._basemap_image is None or size != self._basemap_size
+        if changed:
+            try:
+                image = get_basemap(ax.projection, self.original_extent, size, self.theme)
+            except Exception as e:
+                print(f"Ошибка подготовки подложки карты: {str(e)}")
+                return False
+            self._basemap_size = size
+            self._basemap_image = image
+        self._show_basemap(ax)
+        return changed
+
+    def _show_basemap(self, ax):
+        """
+        Показ видимой части растра подложки.
+
+        В изображение передается только вырезка под текущую область,
+        чтобы при увеличении не масштабировался весь растр мира.
+        """
+        image = self._basemap_image
+        if image is None:
+            return
+        height, width = image.shape[:2]
+        lon_min, lon_max, lat_min, lat_max = self.original_extent
+        x_scale = width / (lon_max - lon_min)
+        y_scale = height / (lat_max - lat_min)
+        # Вырезка с запасом в один пиксель по краям
+        col0 = max(0, int(math.floor((self.extent[0] - lon_min) * x_scale)) - 1)
+        col1 = min(width, int(math.ceil((self.extent[1] - lon_min) * x_scale)) + 1)
+        row0 = max(0, int(math.floor((lat_max - self.extent[3]) * y_scale)) - 1)
+        row1 = min(height, int(math.ceil((lat_max - self.extent[2]) * y_scale)) + 1)
+        crop = image[row0:row1, col0:col1]
+        crop_extent = [lon_min + col0 / x_scale, lon_min + col1 / x_scale,
+                       lat_max - row1 / y_scale, lat_max - row0 / y_scale]
+
+        if self._basemap is None:
+            self._basemap = ax.imshow(crop, origin='upper', extent=crop_extent,
+                                      transform=ccrs.PlateCarree(),
+                                      interpolation='bilinear', zorder=0)
+        else:
+            self._basemap.set_data(crop)
+            self._basemap.set_extent(crop_extent)
+
+    def _zoom_factor(self) -> float:
+        """Во сколько раз текущая область уже всей карты"""
+        return ((self.original_extent[1] - self.original_extent[0])
+                / (self.extent[1] - self.extent[0]))
+
+    def _degrees_per_pixel(self) -> float:
+        width = max(1.0, self.ax.bbox.width)
+        return (self.extent[1] - self.extent[0]) / width
+
+    def lod_tolerance(self) -> float:
+        """
+        Допуск прореживания трасс для текущего масштаба (градусы).
+
+        Размер пикселя округляется вниз до степени двойки, чтобы прореженные
+        трассы кэшировались по уровням масштаба, а не по каждой области.
+        """
+        return 2.0 ** math.floor(math.log2(self._degrees_per_pixel()))
+
+    def _set_title(self):
+        title = 'Траектории спутников'
+        if self.zoomed:
+            title += ' (увеличенный вид)'
+        if self._coverage_field is not None:
+            title += f' — {COVERAGE_FIELDS[self._coverage_field].lower()}'
+        self.ax.set_title(title, color='white', pad=15, fontsize=11)
+
+    def _animated_artists(self):
+        artists = [self._footprints, self._tracks, self._markers, self._station]
+        if self._legend is not None:
+            artists.append(self._legend)
+        return artists
+
+    def _on_draw(self, event):
+        """Сохранение подложки после полной перерисовки"""
+        # После изменения размера берем растр подходящего разрешения
+        if self._update_basemap(self.ax):
+            self._background = None
+            self.canvas.draw_idle()
+            return
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self._animated_artists():
+            self.ax.draw_artist(artist)
+
+    def _blit(self):
+        """Перерисовка только динамических элементов поверх сохраненной подложки"""
+        if self._background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self._background)
+        for artist in self._animated_artists():
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)
 
     def on_click(self, event):
-        """Обработчик клика для приближения/отдаления"""
-        # if event.button == 1:  # Левая кнопка мыши
-        #    self.zoomed = not self.zoomed
-        #    self.update_plot([], [], None, None)
+        """Начало перетаскивания карты; двойной клик возвращает весь мир"""
+        if event.button != 1 or event.inaxes is not self.ax:
+            return
+        if event.dblclick:
+            self._pan_start = None
+            self.set_view(self.original_extent)
+            return
+        self._pan_start = (event.x, event.y, list(self.extent))
+
+    def _on_motion(self, event):
+        """Сдвиг карты при перетаскивании"""
+        if self._pan_start is None:
+            return
+        x, y, extent = self._pan_start
+        scale = self._degrees_per_pixel()
+        dx, dy = (event.x - x) * scale, (event.y - y) * scale
+        self.set_view([extent[0] - dx, extent[1] - dx, extent[2] - dy, extent[3] - dy])
+
+    def _on_release(self, event):
+        self._pan_start = None
+
+    def _on_scroll(self, event):
+        """Изменение масштаба колесом мыши относительно курсора"""
+        if event.inaxes is not self.ax or event.xdata is None:
+            return
+        factor = ZOOM_STEP ** -event.step
+        lon_span = (self.extent[1] - self.extent[0]) * factor
+        world_span = self.original_extent[1] - self.original_extent[0]
+        lon_span = min(world_span, max(MIN_LON_SPAN, lon_span))
+        factor = lon_span / (self.extent[1] - self.extent[0])
+        # Точка под курсором остается на месте
+        x, y = event.xdata, event.ydata
+        self.set_view([x - (x - self.extent[0]) * factor, x + (self.extent[1] - x) * factor,
+                       y - (y - self.extent[2]) * factor, y + (self.extent[3] - y) * factor])
+
+    def set_view(self, extent):
+        """
+        Установка видимой области карты (с ограничением пределами мира)
+
+        :param extent: Границы [lon_min, lon_max, lat_min, lat_max]
+        """
+        extent = self._clamp_extent(extent)
+        if extent == self.extent:
+            return
+        tolerance = self.lod_tolerance()
+        self.extent = extent
+        self.zoomed = extent != self.original_extent
+        self.ax.set_extent(extent, crs=ccrs.PlateCarree())
+        self._update_basemap(self.ax)
+        self._set_title()
+
+        # Трассы отсекаются по новой области сразу, не дожидаясь обновления данных
+        self._background = None
+        if self._plot_args is not None:
+            self._update_artists(*self._plot_args)
+        self.canvas.draw_idle()
+        if self.lod_tolerance() != tolerance:
+            self.lod_changed.emit()
+
+    def _clamp_extent(self, extent):
+        """Сдвиг области внутрь пределов мира без изменения ее размера"""
+        clamped = []
+        for low, high, (min_value, max_value) in (
+                (extent[0], extent[1], self.original_extent[0:2]),
+                (extent[2], extent[3], self.original_extent[2:4])):
+            span = min(high - low, max_value - min_value)
+            low = min(max(low, min_value), max_value - span)
+            clamped.extend([float(low), float(low + span)])
+        return clamped
 
     def setup_dark_map(self, ax):
         """Настраивает темный стиль для карты"""
         # Цвета фона и элементов
-        ax.set_facecolor('#1e1e1e')
+        ax.set_facecolor(THEMES[self.theme]['background'])
 
-        # Особенности карты в темных тонах
-        ax.add_feature(cfeature.LAND, facecolor='#2d2d2d')
-        ax.add_feature(cfeature.OCEAN, facecolor='#1a1a2e')
-        ax.add_feature(cfeature.COASTLINE, edgecolor='#4d4d4d', linewidth=0.8)
-        ax.add_feature(cfeature.BORDERS, linestyle=':',
-                       edgecolor='#4d4d4d', linewidth=0.5)
+        # Суша, океан и границы — готовым растром из кэша подложек
+        self._basemap = None
+        self._basemap_image = None
+        self._basemap_size = None
+        self._update_basemap(ax)
 
         # Сетка
         gl = ax.gridlines(
@@ -55,73 +312,176 @@ class Map2DWidget(QtWidgets.QWidget):
         gl.xlabel_style = {'color': '#aaaaaa'}
         gl.ylabel_style = {'color': '#aaaaaa'}
 
-    def update_plot(self, satellites_data, station_lon=None, station_lat=None):
-        """Обновляет карту с темной темой"""
-        self.figure.clear()
-        ax = self.figure.add_subplot(111, projection=ccrs.PlateCarree())
-
-        # Применяем темный стиль
-        self.setup_dark_map(ax)
-
-        # Устанавливаем границы
-        if self.zoomed and satellites_data:
-            all_lons = [lon for sat in satellites_data for lon in sat['lons']]
-            all_lats = [lat for sat in satellites_data for lat in sat['lats']]
-
-            if all_lons and all_lats:
-                extent = [
-                    max(-180, min(all_lons) - 30),
-                    min(180, max(all_lons) + 30),
-                    max(-90, min(all_lats) - 20),
-                    min(90, max(all_lats) + 20)
-                ]
-                ax.set_extent(extent, crs=ccrs.PlateCarree())
-            else:
-                ax.set_extent(self.original_extent, crs=ccrs.PlateCarree())
+    def update_plot(self, satellites_data, station_lon=None, station_lat=None,
+                    footprint_elevation=None):
+        """
+        Обновляет траектории и маркеры; подложка перерисовывается только при смене границ
+
+        :param satellites_data: Словари с 'lons', 'lats', 'alt', 'name', 'color'
+        :param footprint_elevation: Минимальный угол места для зон видимости
+                                    (None — зоны не показываются)
+        """
+        self._plot_args = (satellites_data, station_lon, station_lat, footprint_elevation)
+        self._update_artists(*self._plot_args)
+        if self._background is None:
+            self.canvas.draw()
         else:
-            ax.set_extent(self.original_extent, crs=ccrs.PlateCarree())
+            self._blit()
 
-        # Отображаем траектории спутников
-        for sat_data in satellites_data:
+    def _update_artists(self, satellites_data, station_lon, station_lat, footprint_elevation):
+        """Обновление данных динамических элементов для текущей области карты"""
+        # Отображаем траектории спутников. Проекция осей — PlateCarree, поэтому
+        # трассы (уже разбитые на линии ±180°) задаются в координатах данных
+        segments, segment_colors = [], []
+        positions = np.full((len(satellites_data), 2), np.nan)
+        colors = np.zeros((len(satellites_data), 4))
+        for i, sat_data in enumerate(satellites_data):
             lons = sat_data['lons']
             lats = sat_data['lats']
-            name = sat_data['name']
             color = sat_data['color']
+            colors[i] = (color.redF(), color.greenF(), color.blueF(), 1.0)
 
-            color_hex = "#{:02x}{:02x}{:02x}".format(
-                color.red(), color.green(), color.blue())
-
+            if len(lons) > 0:
+                positions[i] = (lons[0], lats[0])
             if len(lons) > 1:
-                ax.plot(lons, lats, '-', transform=ccrs.Geodetic(),
-                        color=color_hex, linewidth=1.8, alpha=1)
+                if self.zoomed:
+                    # Рисуем только части трасс, попадающие в видимую область
+                    lons, lats = clip_track(lons, lats, self.extent)
+                pieces = track_segments(lons, lats)
+                segments.extend(pieces)
+                segment_colors.extend([colors[i]] * len(pieces))
 
-            if len(lons) > 0:
-                ax.scatter(lons[0], lats[0], color=color_hex, s=50,
-                           transform=ccrs.Geodetic(), edgecolors='white',
-                           label=f'{name}')
+        self._tracks.set_segments(segments)
+        self._tracks.set_color(segment_colors)
+        self._markers.set_offsets(positions)
+        self._markers.set_facecolor(colors)
+
+        # Зоны видимости всех спутников одним векторным расчетом
+        self._update_footprints(satellites_data, positions, colors, footprint_elevation)
 
         # Наземная станция
-        if station_lon is not None and station_lat is not None:
-            ax.scatter(station_lon, station_lat, color='#42a5f5', s=80,
-                       marker='^', transform=ccrs.Geodetic(),
-                       edgecolor='white', label='Станция')
+        has_station = station_lon is not None and station_lat is not None
+        self._station.set_offsets([[station_lon, station_lat]] if has_station
+                                  else np.empty((0, 2)))
 
-        # Легенда
-        if satellites_data or (station_lon and station_lat):
-            ax.legend(loc='upper right', facecolor='#2d2d2d',
-                      edgecolor='none', fontsize=9)
+        # Легенда пересоздается только при изменении состава спутников
+        legend_key = (tuple(sat['name'] for sat in satellites_data), has_station)
+        if legend_key != self._legend_key:
+            self._legend_key = legend_key
+            self._update_legend(satellites_data, colors, has_station)
 
-        # Заголовок
-        title = 'Траектории спутников'
-        if self.zoomed:
-            title += ' (увеличенный вид)'
-        ax.set_title(title, color='white', pad=15, fontsize=11)
+    def _update_footprints(self, satellites_data, positions, colors, min_elevation):
+        """Обновление зон видимости спутников для заданного минимального угла места"""
+        visible = np.isfinite(positions[:, 0]) if len(positions) else np.zeros(0, dtype=bool)
+        if min_elevation is None or not visible.any():
+            self._footprints.set_verts([])
+            return
+        indices = np.nonzero(visible)[0]
+        alts = [satellites_data[i].get('alt', 0.0) for i in indices]
+        polygons, owners = footprint_polygons(positions[indices, 0], positions[indices, 1],
+                                              alts, min_elevation)
+        owner_colors = colors[indices][owners] if len(owners) else np.zeros((0, 4))
+        self._footprints.set_verts(polygons)
+        self._footprints.set_facecolor(owner_colors * [1, 1, 1, 0] + [0, 0, 0, 0.12])
+        self._footprints.set_edgecolor(owner_colors * [1, 1, 1, 0] + [0, 0, 0, 0.6])
 
+    def _update_legend(self, satellites_data, colors, has_station):
+        """
+        Легенда из маркеров-заместителей.
+
+        При большом количестве спутников перечисляются только первые
+        LEGEND_MAX_ITEMS, остальные сводятся в одну строку.
+        """
+        if self._legend is not None:
+            self._legend.remove()
+            self._legend = None
+        if not satellites_data and not has_station:
+            return
+
+        handles, labels = [], []
+        for sat_data, color in zip(satellites_data[:LEGEND_MAX_ITEMS], colors):
+            handles.append(Line2D([], [], linestyle='', marker='o', markersize=7,
+                                  markerfacecolor=color, markeredgecolor='white'))
+            labels.append(sat_data['name'])
+        hidden = len(satellites_data) - LEGEND_MAX_ITEMS
+        if hidden > 0:
+            handles.append(Line2D([], [], linestyle=''))
+            labels.append(f"... и еще {hidden}")
+        if has_station:
+            handles.append(Line2D([], [], linestyle='', marker='^', markersize=8,
+                                  markerfacecolor='#42a5f5', markeredgecolor='white'))
+            labels.append('Станция')
+
+        self._legend = self.ax.legend(handles, labels, loc='upper right', facecolor='#2d2d2d',
+                                      edgecolor='none', fontsize=9)
+        self._legend.set_animated(True)
+
+    def set_coverage(self, grid, field='coverage_minutes'):
+        """
+        Показ сетки покрытия тепловой картой под траекториями.
+
+        Слой статичен, поэтому входит в сохраненную подложку и не влияет
+        на стоимость ежесекундного обновления.
+
+        :param grid: Результат coverage.compute_coverage
+        :param field: Показываемое поле из COVERAGE_FIELDS
+        """
+        self.clear_coverage(redraw=False)
+        self._coverage_grid = grid
+        self._coverage_field = field
+
+        values = np.asarray(grid[field], dtype=float)
+        if field == 'coverage_minutes':
+            # Непокрытые ячейки прозрачны, чтобы была видна подложка
+            values = np.ma.masked_less_equal(values, 0)
+        step_lon = grid['lons'][1] - grid['lons'][0] if len(grid['lons']) > 1 else 360
+        step_lat = grid['lats'][1] - grid['lats'][0] if len(grid['lats']) > 1 else 180
+        extent = [grid['lons'][0] - step_lon / 2, grid['lons'][-1] + step_lon / 2,
+                  grid['lats'][0] - step_lat / 2, grid['lats'][-1] + step_lat / 2]
+        vmax = max(1.0, float(np.max(grid[field])))
+        self._coverage_image = self.ax.imshow(values, origin='lower', extent=extent,
+                                              transform=ccrs.PlateCarree(), cmap='inferno',
+                                              vmin=0, vmax=vmax, alpha=0.55,
+                                              interpolation='nearest', zorder=1)
+
+        # Шкала внутри осей, чтобы не менять размер карты и подложки
+        cax = self.ax.inset_axes([0.02, 0.05, 0.3, 0.025])
+        self._coverage_colorbar = self.figure.colorbar(self._coverage_image, cax=cax,
+                                                       orientation='horizontal')
+        self._coverage_colorbar.ax.tick_params(colors='#aaaaaa', labelsize=8)
+        self._coverage_colorbar.outline.set_edgecolor('#4d4d4d')
+        self._set_title()
+        self._redraw()
+
+    def clear_coverage(self, redraw=True):
+        """Скрытие слоя покрытия"""
+        if self._coverage_image is None:
+            return
+        self._coverage_colorbar.remove()
+        self._coverage_image.remove()
+        self._coverage_colorbar = None
+        self._coverage_image = None
+        self._coverage_grid = None
+        self._coverage_field = None
+        self._set_title()
+        if redraw:
+            self._redraw()
+
+    def _redraw(self):
+        """Полная перерисовка с обновлением сохраненной подложки"""
+        self._background = None
         self.canvas.draw()
 
     def clear_plot(self):
-        """Очищает карту"""
-        self.figure.clear()
-        ax = self.figure.add_subplot(111, projection=ccrs.PlateCarree())
-        self.setup_dark_map(ax)
-        self.canvas.draw()
+        """Очищает карту (подложка сохраняется)"""
+        self.update_plot([])
+
+    def set_frame_size(self, width: int, height: int):
+        """Размер кадра для отрисовки без окна (пиксели)"""
+        dpi = self.figure.get_dpi()
+        self.figure.set_size_inches(width / dpi, height / dpi)
+        self._redraw()
+
+    def grab_frame(self) -> np.ndarray:
+        """Изображение текущего кадра (RGB-массив uint8)"""
+        return np.asarray(self.canvas.buffer_rgba())[:, :, :3].copy()
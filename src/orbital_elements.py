@@ -0,0 +1,89 @@
+from typing import Dict, Sequence
+import numpy as np
+
+# Гравитационный параметр Земли (км^3/с^2) и экваториальный радиус (км)
+MU_EARTH = 398600.4418
+EARTH_RADIUS = 6378.137
+
+# Период геосинхронной орбиты (мин) и допуск классификации GEO
+GEO_PERIOD = 1436.07
+GEO_PERIOD_TOLERANCE = 30.0
+# Эксцентриситет, начиная с которого орбита считается высокоэллиптической
+HEO_MIN_ECCENTRICITY = 0.25
+# Верхняя граница высоты апогея LEO (км)
+LEO_MAX_APOGEE = 2000.0
+
+
+def semi_major_axis(mean_motion: np.ndarray) -> np.ndarray:
+    """
+    Большая полуось по среднему движению
+
+    :param mean_motion: Среднее движение (оборотов в сутки)
+    :return: Большая полуось (км)
+    """
+    n = np.asarray(mean_motion, dtype=float) * 2 * np.pi / 86400.0
+    return np.cbrt(MU_EARTH / n ** 2)
+
+
+def orbit_parameters(mean_motion: Sequence[float],
+                     eccentricity: Sequence[float]) -> Dict[str, np.ndarray]:
+    """
+    Векторный расчет производных параметров орбит
+
+    :param mean_motion: Средние движения (оборотов в сутки)
+    :param eccentricity: Эксцентриситеты
+    :return: Словарь массивов 'period_minutes', 'semi_major_axis_km',
+             'apogee_km', 'perigee_km' (высоты над экватором)
+    """
+    mean_motion = np.asarray(mean_motion, dtype=float)
+    ecc = np.asarray(eccentricity, dtype=float)
+    a = semi_major_axis(mean_motion)
+    return {
+        'period_minutes': 1440.0 / mean_motion,
+        'semi_major_axis_km': a,
+        'apogee_km': a * (1 + ecc) - EARTH_RADIUS,
+        'perigee_km': a * (1 - ecc) - EARTH_RADIUS
+    }
+
+
+def tle_age_days(epochs: Sequence[float], now: float) -> np.ndarray:
+    """
+    Возраст элементов
+
+    :param epochs: Эпохи элементов (секунды Unix)
+    :param now: Текущий момент (секунды Unix)
+    :return: Возраст в сутках
+    """
+    return (now - np.asarray(epochs, dtype=float)) / 86400.0
+
+
+def classify_orbits(mean_motion: Sequence[float],
+                    eccentricity: Sequence[float]) -> np.ndarray:
+    """
+    Векторная классификация орбит по типам справочника (LEO/MEO/GEO/HEO)
+
+    :param mean_motion: Средние движения (оборотов в сутки)
+    :param eccentricity: Эксцентриситеты
+    :return: Массив названий типов орбит
+    """
+    params = orbit_parameters(mean_motion, eccentricity)
+    return classify_by_parameters(params['period_minutes'], params['apogee_km'], eccentricity)
+
+
+def classify_by_parameters(period: np.ndarray, apogee: np.ndarray,
+                           eccentricity: Sequence[float]) -> np.ndarray:
+    """
+    Классификация по уже рассчитанным периоду и высоте апогея
+
+    :param period: Периоды (мин)
+    :param apogee: Высоты апогея (км)
+    :param eccentricity: Эксцентриситеты
+    :return: Массив названий типов орбит
+    """
+    ecc = np.asarray(eccentricity, dtype=float)
+    return np.select(
+        [ecc >= HEO_MIN_ECCENTRICITY,
+         np.abs(period - GEO_PERIOD) <= GEO_PERIOD_TOLERANCE,
+         apogee < LEO_MAX_APOGEE],
+        ['HEO', 'GEO', 'LEO'],
+        default='MEO')
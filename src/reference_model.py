@@ -0,0 +1,162 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+# Количество строк, запрашиваемых из базы за одну страницу
+PAGE_SIZE = 200
+
+
+class PagedTableModel(QAbstractTableModel):
+    """
+    Табличная модель справочника со страничной подгрузкой из базы данных.
+
+    Строки запрашиваются страницами по мере прокрутки, сортировка передается
+    в запрос. Правки накапливаются в модели до сохранения.
+    Первый элемент строки, возвращаемой fetch_page, — ключ записи в базе.
+    """
+
+    def __init__(self, headers: Sequence[str],
+                 fetch_page: Callable[[int, int, int, bool], List[Tuple]],
+                 count_rows: Callable[[], int],
+                 editable_columns: Optional[Set[int]] = None,
+                 default_sort: int = 0, parent=None):
+        """
+        :param headers: Заголовки столбцов
+        :param fetch_page: Функция (offset, limit, столбец, по убыванию) -> строки
+        :param count_rows: Функция, возвращающая общее количество строк
+        :param editable_columns: Редактируемые столбцы (None — все)
+        :param default_sort: Столбец сортировки по умолчанию (-1 — порядок базы)
+        """
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._fetch_page = fetch_page
+        self._count_rows = count_rows
+        self._editable = editable_columns
+        self._sort_column = default_sort
+        self._descending = False
+
+        # Загруженные строки [ключ, значения...]; ключ None у новых строк
+        self._rows: List[List[Any]] = []
+        self._total = 0
+        self._fetched = 0
+
+        # Несохраненные изменения
+        self._updated: Dict[Any, List[Any]] = {}
+        self._inserted: List[List[Any]] = []
+        self._deleted: Set[Any] = set()
+
+    def reload(self):
+        """Сброс несохраненных изменений и загрузка первой страницы"""
+        self._updated.clear()
+        self._inserted.clear()
+        self._deleted.clear()
+        self._refetch()
+
+    def refresh(self):
+        """Повторная загрузка строк из базы без сброса несохраненных правок"""
+        self._refetch()
+
+    def _refetch(self):
+        """Повторный запрос первой страницы с сохранением несохраненных правок"""
+        self.beginResetModel()
+        self._total = self._count_rows()
+        self._fetched = 0
+        self._rows = list(self._inserted) + self._next_page()
+        self.endResetModel()
+
+    def has_changes(self) -> bool:
+        return bool(self._updated or self._inserted or self._deleted)
+
+    def changes(self) -> Tuple[Dict[Any, List[Any]], List[List[Any]], Set[Any]]:
+        """
+        Несохраненные изменения
+
+        :return: (измененные строки {ключ: значения}, новые строки, ключи удаленных)
+        """
+        return (dict(self._updated), [row[1:] for row in self._inserted], set(self._deleted))
+
+    def insert_row(self) -> int:
+        """Добавление пустой строки в начало таблицы"""
+        row = [None] + [None] * len(self._headers)
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._rows.insert(0, row)
+        self._inserted.append(row)
+        self.endInsertRows()
+        return 0
+
+    def remove_row(self, row: int):
+        """Удаление строки (из базы — при сохранении)"""
+        if not 0 <= row < len(self._rows):
+            return
+        values = self._rows[row]
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
+        key = values[0]
+        if key is None:
+            self._inserted = [r for r in self._inserted if r is not values]
+        else:
+            self._updated.pop(key, None)
+            self._deleted.add(key)
+
+    def _next_page(self) -> List[List[Any]]:
+        """Следующая страница из базы с учетом правок, сделанных в редакторе"""
+        rows = self._fetch_page(self._fetched, PAGE_SIZE, self._sort_column, self._descending)
+        self._fetched += len(rows)
+        if len(rows) < PAGE_SIZE:
+            # Строки могли быть удалены в базе после подсчета
+            self._total = self._fetched
+        return [[row[0]] + self._updated[row[0]] if row[0] in self._updated else list(row)
+                for row in rows if row[0] not in self._deleted]
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._headers)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._fetched < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._fetched >= self._total:
+            return
+        rows = self._next_page()
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        """Сортировка выполняется запросом к базе (по сохраненным значениям)"""
+        self._sort_column = column
+        self._descending = order == Qt.DescendingOrder
+        self._refetch()
+
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        value = self._rows[index.row()][index.column() + 1]
+        return "" if value is None else str(value)
+
+    def flags(self, index: QModelIndex):
+        flags = super().flags(index)
+        if self._editable is None or index.column() in self._editable:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index: QModelIndex, value, role=Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        row = self._rows[index.row()]
+        row[index.column() + 1] = str(value).strip()
+        if row[0] is not None:
+            self._updated[row[0]] = row[1:]
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
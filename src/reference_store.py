@@ -0,0 +1,368 @@
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Миграции схемы: индекс в списке + 1 = версия схемы (PRAGMA user_version)
+MIGRATIONS = [
+    '''
+    CREATE TABLE IF NOT EXISTS satellite_categories (
+        category_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        description TEXT,
+        priority INTEGER NOT NULL DEFAULT 0,
+        is_active INTEGER NOT NULL DEFAULT 1,
+        last_update TEXT
+    );
+    CREATE TABLE IF NOT EXISTS satellites (
+        satellite_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        norad_id INTEGER UNIQUE,
+        category_id INTEGER REFERENCES satellite_categories(category_id) ON DELETE SET NULL,
+        period_minutes REAL,
+        inclination_deg REAL,
+        apogee_km REAL,
+        perigee_km REAL,
+        last_update TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_satellites_category ON satellites(category_id);
+    CREATE INDEX IF NOT EXISTS idx_satellites_name ON satellites(name);
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_satellites_unnumbered
+        ON satellites(name) WHERE norad_id IS NULL;
+    ''',
+    # Индексы для сортировки редактора по числовым столбцам
+    '''
+    CREATE INDEX IF NOT EXISTS idx_satellites_period ON satellites(period_minutes);
+    CREATE INDEX IF NOT EXISTS idx_satellites_inclination ON satellites(inclination_deg);
+    CREATE INDEX IF NOT EXISTS idx_satellites_apogee ON satellites(apogee_km);
+    CREATE INDEX IF NOT EXISTS idx_satellites_perigee ON satellites(perigee_km);
+    '''
+]
+
+# Поля спутника в порядке столбцов редактора
+SATELLITE_FIELDS = ['name', 'norad_id', 'category', 'period_minutes',
+                    'inclination_deg', 'apogee_km', 'perigee_km']
+# Выражения сортировки для столбцов редактора
+SATELLITE_SORT_COLUMNS = ['s.name', 's.norad_id', 'c.name', 's.period_minutes',
+                          's.inclination_deg', 's.apogee_km', 's.perigee_km']
+# Поля категории в порядке столбцов редактора и выражения сортировки
+CATEGORY_FIELDS = ['name', 'description', 'total_satellites', 'last_update']
+CATEGORY_SORT_COLUMNS = ['c.name', 'c.description', 'total_satellites', 'c.last_update']
+
+# Открытые хранилища {путь к базе: ReferenceStore}
+_stores: Dict[str, 'ReferenceStore'] = {}
+_stores_lock = threading.Lock()
+
+
+def get_reference_store(db_path: str) -> 'ReferenceStore':
+    """Возвращает общее хранилище для файла базы (одно соединение на файл)"""
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = ReferenceStore(db_path)
+            _stores[db_path] = store
+        return store
+
+
+class ReferenceStore:
+    """Слой доступа к справочникам в SQLite"""
+
+    def __init__(self, db_path: str):
+        """
+        :param db_path: Путь к файлу базы справочников
+        """
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._migrate()
+
+    def _migrate(self):
+        """Применение недостающих миграций схемы"""
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+                with self._conn:
+                    self._conn.executescript(script)
+                    self._conn.execute(f"PRAGMA user_version = {number}")
+
+    @property
+    def schema_version(self) -> int:
+        """Текущая версия схемы"""
+        with self._lock:
+            return self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def seed_categories(self, categories: Iterable[Dict[str, Any]]):
+        """Добавляет отсутствующие категории, существующие не изменяются"""
+        rows = [(c['name'], c.get('description'), c.get('priority', 0))
+                for c in categories]
+        with self._lock, self._conn:
+            self._conn.executemany('''
+            INSERT OR IGNORE INTO satellite_categories
+            (name, description, priority, is_active, last_update)
+            VALUES (?, ?, ?, 1, datetime('now'))
+            ''', rows)
+
+    def category_summary(self) -> List[Tuple]:
+        """Категории с количеством спутников: (name, description, count, last_update)"""
+        with self._lock:
+            return self._conn.execute('''
+            SELECT c.name, c.description, COUNT(s.satellite_id) as total_satellites, c.last_update
+            FROM satellite_categories c
+            LEFT JOIN satellites s ON c.category_id = s.category_id
+            GROUP BY c.category_id
+            ORDER BY c.priority, c.name
+            ''').fetchall()
+
+    def category_ids(self) -> Dict[str, int]:
+        """Соответствие названий категорий их идентификаторам"""
+        with self._lock:
+            return dict(self._conn.execute(
+                'SELECT name, category_id FROM satellite_categories').fetchall())
+
+    def category_names(self) -> List[str]:
+        """Названия категорий в порядке приоритета"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                'SELECT name FROM satellite_categories ORDER BY priority, name')]
+
+    def count_categories(self) -> int:
+        """Количество категорий"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM satellite_categories').fetchone()[0]
+
+    def fetch_categories(self, offset: int, limit: int, sort_column: int = -1,
+                         descending: bool = False) -> List[Tuple]:
+        """
+        Страница категорий: (category_id, name, description, count, last_update)
+
+        :param offset: Смещение первой строки
+        :param limit: Размер страницы
+        :param sort_column: Номер столбца из CATEGORY_FIELDS (-1 — по приоритету)
+        :param descending: Сортировка по убыванию
+        """
+        order = self._order_by(CATEGORY_SORT_COLUMNS, sort_column, descending,
+                               'c.priority, c.name', 'c.category_id')
+        with self._lock:
+            return self._conn.execute(f'''
+            SELECT c.category_id, c.name, c.description,
+                   COUNT(s.satellite_id) as total_satellites, c.last_update
+            FROM satellite_categories c
+            LEFT JOIN satellites s ON c.category_id = s.category_id
+            GROUP BY c.category_id
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+            ''', (limit, offset)).fetchall()
+
+    def count_satellites(self, category: Optional[str] = None) -> int:
+        """Количество спутников (при необходимости одной категории)"""
+        with self._lock:
+            if category is None:
+                return self._conn.execute('SELECT COUNT(*) FROM satellites').fetchone()[0]
+            return self._conn.execute('''
+            SELECT COUNT(*) FROM satellites
+            WHERE category_id = (SELECT category_id FROM satellite_categories WHERE name = ?)
+            ''', (category,)).fetchone()[0]
+
+    def fetch_satellites(self, offset: int, limit: int, category: Optional[str] = None,
+                         sort_column: int = 0, descending: bool = False) -> List[Tuple]:
+        """
+        Страница спутников: satellite_id и поля в порядке SATELLITE_FIELDS.
+
+        Фильтр и сортировка выполняются в SQL по индексированным столбцам.
+
+        :param offset: Смещение первой строки
+        :param limit: Размер страницы
+        :param category: Название категории для фильтра (None — все)
+        :param sort_column: Номер столбца из SATELLITE_FIELDS
+        :param descending: Сортировка по убыванию
+        """
+        order = self._order_by(SATELLITE_SORT_COLUMNS, sort_column, descending,
+                               's.name', 's.satellite_id')
+        query = '''
+        SELECT s.satellite_id, s.name, s.norad_id, c.name as category,
+               s.period_minutes, s.inclination_deg, s.apogee_km, s.perigee_km
+        FROM satellites s
+        LEFT JOIN satellite_categories c ON s.category_id = c.category_id
+        '''
+        with self._lock:
+            if category is None:
+                return self._conn.execute(
+                    query + f'ORDER BY {order} LIMIT ? OFFSET ?', (limit, offset)).fetchall()
+            return self._conn.execute(
+                query + f'''
+                WHERE s.category_id = (SELECT category_id FROM satellite_categories WHERE name = ?)
+                ORDER BY {order} LIMIT ? OFFSET ?
+                ''', (category, limit, offset)).fetchall()
+
+    @staticmethod
+    def _order_by(columns: List[str], sort_column: int, descending: bool,
+                  default: str, tie_breaker: str) -> str:
+        """Выражение ORDER BY из белого списка столбцов"""
+        if 0 <= sort_column < len(columns):
+            direction = 'DESC' if descending else 'ASC'
+            return f"{columns[sort_column]} {direction}, {tie_breaker}"
+        return f"{default}, {tie_breaker}"
+
+    def list_satellites(self, category: Optional[str] = None) -> List[Tuple]:
+        """Спутники (в порядке SATELLITE_FIELDS), при необходимости одной категории"""
+        query = '''
+        SELECT s.name, s.norad_id, c.name as category,
+               s.period_minutes, s.inclination_deg, s.apogee_km, s.perigee_km
+        FROM satellites s
+        LEFT JOIN satellite_categories c ON s.category_id = c.category_id
+        '''
+        with self._lock:
+            if category is None:
+                return self._conn.execute(query + 'ORDER BY s.name').fetchall()
+            return self._conn.execute(query + 'WHERE c.name = ? ORDER BY s.name',
+                                      (category,)).fetchall()
+
+    def upsert_categories(self, categories: Iterable[Dict[str, Any]]) -> int:
+        """
+        Пакетная вставка или обновление категорий по названию
+
+        :param categories: Словари с 'name', 'description', 'priority'
+        :return: Количество записанных строк
+        """
+        rows = [(c['name'], c.get('description'), c.get('priority', 0))
+                for c in categories]
+        with self._lock, self._conn:
+            self._conn.executemany('''
+            INSERT INTO satellite_categories (name, description, priority, is_active, last_update)
+            VALUES (?, ?, ?, 1, datetime('now'))
+            ON CONFLICT(name) DO UPDATE SET
+                description = excluded.description,
+                priority = excluded.priority,
+                last_update = excluded.last_update
+            ''', rows)
+        return len(rows)
+
+    def upsert_satellites(self, satellites: Iterable[Dict[str, Any]]) -> int:
+        """
+        Пакетная вставка или обновление спутников в одной транзакции.
+
+        Спутники с номером NORAD сопоставляются по номеру, без номера — по названию.
+        Категории разрешаются по названию одним запросом на всю пачку.
+
+        :param satellites: Словари с полями из SATELLITE_FIELDS
+        :return: Количество записанных строк
+        """
+        with self._lock:
+            category_ids = self.category_ids()
+            numbered, unnumbered = [], []
+            for sat in satellites:
+                row = (sat['name'], sat.get('norad_id'),
+                       category_ids.get(sat.get('category')),
+                       sat.get('period_minutes'), sat.get('inclination_deg'),
+                       sat.get('apogee_km'), sat.get('perigee_km'))
+                (numbered if row[1] is not None else unnumbered).append(row)
+
+            update = '''
+                name = excluded.name,
+                category_id = excluded.category_id,
+                period_minutes = excluded.period_minutes,
+                inclination_deg = excluded.inclination_deg,
+                apogee_km = excluded.apogee_km,
+                perigee_km = excluded.perigee_km,
+                last_update = excluded.last_update
+            '''
+            insert = '''
+            INSERT INTO satellites (name, norad_id, category_id, period_minutes,
+                                    inclination_deg, apogee_km, perigee_km, last_update)
+            VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
+            '''
+            with self._conn:
+                self._conn.executemany(
+                    insert + 'ON CONFLICT(norad_id) DO UPDATE SET' + update, numbered)
+                self._conn.executemany(
+                    insert + 'ON CONFLICT(name) WHERE norad_id IS NULL DO UPDATE SET' + update,
+                    unnumbered)
+        return len(numbered) + len(unnumbered)
+
+    def sync_orbit_parameters(self, satellites: Iterable[Dict[str, Any]]) -> int:
+        """
+        Обновление параметров орбит, рассчитанных по каталогу TLE.
+
+        Меняются только период, наклонение и высоты спутников, уже внесенных
+        в справочник; строки не добавляются, поэтому спутники, удаленные
+        в редакторе, не возвращаются, а справочник не заполняется всем каталогом.
+
+        :param satellites: Словари с 'norad_id', 'period_minutes', 'inclination_deg',
+                           'apogee_km', 'perigee_km'
+        :return: Количество обновленных строк
+        """
+        rows = [(sat.get('period_minutes'), sat.get('inclination_deg'),
+                 sat.get('apogee_km'), sat.get('perigee_km'), sat['norad_id'])
+                for sat in satellites]
+        with self._lock, self._conn:
+            cursor = self._conn.executemany('''
+            UPDATE satellites
+            SET period_minutes = ?, inclination_deg = ?, apogee_km = ?, perigee_km = ?,
+                last_update = datetime('now')
+            WHERE norad_id = ?
+            ''', rows)
+            return cursor.rowcount
+
+    def save_categories(self, updates: Dict[int, Dict[str, Any]],
+                        inserts: List[Dict[str, Any]], deletes: Iterable[int]):
+        """
+        Сохранение правок редактора категорий в одной транзакции
+
+        :param updates: Измененные категории {category_id: {'name', 'description'}}
+        :param inserts: Новые категории ('name', 'description')
+        :param deletes: Идентификаторы удаленных категорий
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'DELETE FROM satellite_categories WHERE category_id = ?',
+                [(category_id,) for category_id in deletes])
+            self._conn.executemany('''
+            UPDATE satellite_categories
+            SET name = ?, description = ?, last_update = datetime('now')
+            WHERE category_id = ?
+            ''', [(c['name'], c.get('description'), category_id)
+                  for category_id, c in updates.items()])
+            priority = self._conn.execute(
+                'SELECT COALESCE(MAX(priority), 0) FROM satellite_categories').fetchone()[0]
+            self._conn.executemany('''
+            INSERT INTO satellite_categories (name, description, priority, is_active, last_update)
+            VALUES (?, ?, ?, 1, datetime('now'))
+            ON CONFLICT(name) DO UPDATE SET
+                description = excluded.description,
+                last_update = excluded.last_update
+            ''', [(c['name'], c.get('description'), priority + i + 1)
+                  for i, c in enumerate(inserts)])
+
+    def save_satellites(self, updates: Dict[int, Dict[str, Any]],
+                        inserts: List[Dict[str, Any]], deletes: Iterable[int]):
+        """
+        Сохранение правок редактора спутников в одной транзакции
+
+        :param updates: Измененные спутники {satellite_id: поля из SATELLITE_FIELDS}
+        :param inserts: Новые спутники (поля из SATELLITE_FIELDS)
+        :param deletes: Идентификаторы удаленных спутников
+        """
+        with self._lock:
+            category_ids = self.category_ids()
+            with self._conn:
+                self._conn.executemany(
+                    'DELETE FROM satellites WHERE satellite_id = ?',
+                    [(satellite_id,) for satellite_id in deletes])
+                self._conn.executemany('''
+                UPDATE satellites
+                SET name = ?, norad_id = ?, category_id = ?, period_minutes = ?,
+                    inclination_deg = ?, apogee_km = ?, perigee_km = ?,
+                    last_update = datetime('now')
+                WHERE satellite_id = ?
+                ''', [(sat['name'], sat.get('norad_id'), category_ids.get(sat.get('category')),
+                      sat.get('period_minutes'), sat.get('inclination_deg'),
+                      sat.get('apogee_km'), sat.get('perigee_km'), satellite_id)
+                     for satellite_id, sat in updates.items()])
+                self.upsert_satellites(inserts)
+
+    def close(self):
+        """Закрытие соединения"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,123 @@
+import math
+import time
+from typing import Any, Callable, Dict
+from PySide6.QtCore import QEvent, QObject, QTimer
+
+
+class RenderScheduler(QObject):
+    """
+    Планировщик перерисовки представлений.
+
+    У каждого представления свой период обновления и бюджет кадра.
+    Кадр выполняется, только если представление видно и его данные изменились
+    (флаг dirty) либо идет анимация (спутники движутся со временем).
+    Таймеры однократные и взводятся заново после кадра, поэтому события
+    не накапливаются; кадр дольше бюджета отодвигает следующий на несколько периодов.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Представления {название: состояние}
+        self._views: Dict[str, Dict[str, Any]] = {}
+        self.animating = False
+
+    def add_view(self, name: str, widget, render: Callable[[], None],
+                 rate_hz: float, budget_ms: float):
+        """
+        Регистрация представления
+
+        :param name: Название представления
+        :param widget: Виджет (по нему определяется видимость)
+        :param render: Функция отрисовки кадра
+        :param rate_hz: Частота обновления при анимации (Гц)
+        :param budget_ms: Допустимая длительность кадра (мс)
+        """
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.timeout.connect(lambda: self._run_frame(name))
+        self._views[name] = {
+            'widget': widget,
+            'render': render,
+            'interval_ms': int(1000 / rate_hz),
+            'budget_ms': budget_ms,
+            'timer': timer,
+            'dirty': True,
+            'frames': 0,
+            'skipped': 0,
+            'last_duration_ms': 0.0
+        }
+        # После показа скрытого виджета отложенный кадр выполняется сразу
+        widget.installEventFilter(self)
+        timer.start(0)
+
+    def set_animating(self, animating: bool):
+        """Включение обновления по времени (есть движущиеся объекты)"""
+        if animating == self.animating:
+            return
+        self.animating = animating
+        if animating:
+            for name in self._views:
+                self._schedule(name, 0)
+
+    def mark_dirty(self, *names: str):
+        """
+        Пометка представлений как требующих перерисовки (без аргументов — все).
+
+        Кадр выполняется в ближайшем цикле событий; повторные пометки
+        до него объединяются в один кадр.
+        """
+        for name in names or list(self._views):
+            self._views[name]['dirty'] = True
+            self._schedule(name, 0)
+
+    def statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Счетчики кадров: {название: {'frames', 'skipped', 'last_duration_ms'}}"""
+        return {name: {key: view[key] for key in ('frames', 'skipped', 'last_duration_ms')}
+                for name, view in self._views.items()}
+
+    def _schedule(self, name: str, delay_ms: int):
+        """Взвод таймера, если кадр еще не запланирован раньше"""
+        timer = self._views[name]['timer']
+        if not timer.isActive() or timer.remainingTime() > delay_ms:
+            timer.start(delay_ms)
+
+    @staticmethod
+    def _is_visible(widget) -> bool:
+        return (widget.isVisible() and not widget.window().isMinimized()
+                and not widget.visibleRegion().isEmpty())
+
+    def _run_frame(self, name: str):
+        view = self._views[name]
+        if not (view['dirty'] or self.animating):
+            # Нечего обновлять: ждем пометки dirty
+            return
+        if not self._is_visible(view['widget']):
+            # Скрытое представление не рисуется; кадр выполнится при показе
+            # (или при следующей проверке, если окно было свернуто)
+            view['dirty'] = True
+            self._schedule(name, view['interval_ms'])
+            return
+
+        view['dirty'] = False
+        start = time.perf_counter()
+        try:
+            view['render']()
+        except Exception as e:
+            print(f"Ошибка отрисовки представления {name}: {str(e)}")
+        duration_ms = (time.perf_counter() - start) * 1000
+        view['frames'] += 1
+        view['last_duration_ms'] = duration_ms
+
+        if not self.animating:
+            return
+        # Кадр дольше бюджета: пропускаем кадры, чтобы не занимать весь цикл событий
+        periods = max(1, math.ceil(duration_ms / view['budget_ms']))
+        view['skipped'] += periods - 1
+        self._schedule(name, view['interval_ms'] * periods)
+
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() == QEvent.Show:
+            for name, view in self._views.items():
+                if view['widget'] is watched and (view['dirty'] or self.animating):
+                    self._schedule(name, 0)
+        return False
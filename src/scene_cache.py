@@ -0,0 +1,110 @@
+import os
+from typing import Dict, Optional
+import numpy as np
+import pyvista as pv
+from pyvista import examples
+
+# Каталог подготовленных ресурсов 3D сцены
+CACHE_DIR = os.path.join("work", "data", "scene")
+# Версия формата: при изменении старые файлы перестают использоваться
+CACHE_VERSION = 1
+
+# Свойство координат текстуры (active_t_coords в pyvista до 0.43)
+TCOORDS_ATTRIBUTE = ('active_texture_coordinates'
+                     if hasattr(pv.DataSet, 'active_texture_coordinates') else 'active_t_coords')
+
+# Загруженные ресурсы {имя файла: массив или словарь массивов}
+_memory_cache: Dict[str, object] = {}
+
+
+def _save(path: str, write):
+    """Атомарная запись файла кэша (ошибки записи не мешают работе)"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as file:
+            write(file)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Ошибка сохранения ресурса сцены {path}: {str(e)}")
+
+
+def get_earth_mesh(radius: float, lat_resolution: int = 50,
+                   lon_resolution: int = 100) -> pv.PolyData:
+    """
+    Сфера Земли с текстурными координатами и нормалями.
+
+    Сетка строится один раз и хранится в .npz (точки, грани, координаты
+    текстуры, нормали); при следующих запусках только читается.
+
+    :param radius: Радиус сферы (км)
+    :param lat_resolution: Количество точек по широте
+    :param lon_resolution: Количество точек по долготе
+    """
+    name = f"earth_v{CACHE_VERSION}_{radius:g}_{lat_resolution}x{lon_resolution}.npz"
+    arrays = _memory_cache.get(name)
+    path = os.path.join(CACHE_DIR, name)
+    if arrays is None and os.path.exists(path):
+        try:
+            with np.load(path) as data:
+                arrays = {key: data[key] for key in data.files}
+        except Exception as e:
+            print(f"Ошибка чтения сетки Земли {path}: {str(e)}")
+
+    if arrays is None:
+        # load_planet появилась в pyvista 0.49, в более ранних версиях — load_earth
+        load_planet = (getattr(examples.planets, 'load_planet', None)
+                       or examples.planets.load_earth)
+        mesh = load_planet(radius=radius, lat_resolution=lat_resolution,
+                           lon_resolution=lon_resolution)
+        if 'Normals' not in mesh.point_data:
+            mesh = mesh.compute_normals(cell_normals=False)
+        arrays = {
+            'points': np.asarray(mesh.points, dtype=np.float32),
+            'faces': np.asarray(mesh.faces),
+            'tcoords': np.asarray(getattr(mesh, TCOORDS_ATTRIBUTE), dtype=np.float32),
+            'normals': np.asarray(mesh.point_data['Normals'], dtype=np.float32)
+        }
+        _save(path, lambda file: np.savez(file, **arrays))
+    _memory_cache[name] = arrays
+
+    mesh = pv.PolyData(arrays['points'], faces=arrays['faces'])
+    setattr(mesh, TCOORDS_ATTRIBUTE, arrays['tcoords'])
+    mesh.point_data['Normals'] = arrays['normals']
+    mesh.point_data.active_normals_name = 'Normals'
+    return mesh
+
+
+def get_globe_texture() -> Optional[np.ndarray]:
+    """
+    Текстура поверхности Земли (RGB-массив uint8).
+
+    Исходное изображение загружается pyvista (возможно, из сети) один раз и
+    сохраняется несжатым .npy, поэтому повторный запуск не декодирует JPEG
+    и работает без сети.
+
+    :return: Массив (высота, ширина, 3) или None, если текстура недоступна
+    """
+    name = f"globe_texture_v{CACHE_VERSION}.npy"
+    image = _memory_cache.get(name)
+    if image is not None:
+        return image
+
+    path = os.path.join(CACHE_DIR, name)
+    if os.path.exists(path):
+        try:
+            image = np.load(path)
+        except Exception as e:
+            print(f"Ошибка чтения текстуры Земли {path}: {str(e)}")
+
+    if image is None:
+        try:
+            image = np.ascontiguousarray(examples.load_globe_texture().to_array(),
+                                         dtype=np.uint8)
+        except Exception as e:
+            print(f"Ошибка загрузки текстуры Земли: {str(e)}")
+            return None
+        _save(path, lambda file: np.save(file, image))
+
+    _memory_cache[name] = image
+    return image
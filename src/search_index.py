@@ -0,0 +1,287 @@
+import re
+import heapq
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Нечеткий поиск выполняется, только если точных совпадений меньше этого числа
+FUZZY_MIN_RESULTS = 10
+
+COSPAR_PATTERN = re.compile(r'^(\d{4})-?(\d{3})([a-z]*)$')
+WORD_SPLIT = re.compile(r'[^0-9a-zа-яё]+')
+
+
+def normalize(text: str) -> str:
+    """Приведение строки к виду для поиска"""
+    return text.strip().lower()
+
+
+def ngrams(text: str, size: int) -> Set[str]:
+    """Множество n-грамм строки"""
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Расстояние Левенштейна с отсечением
+
+    :return: Расстояние или limit + 1, если оно больше limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class SatelliteSearchIndex:
+    """
+    Поисковый индекс спутников: префиксный, n-граммный, нечеткий и по номерам.
+
+    Префиксный поиск выполняется бинарным поиском по отсортированным массивам
+    названий и слов названий, подстроки ищутся по пересечению списков
+    биграмм/триграмм, номера NORAD и COSPAR — по словарям.
+    """
+
+    def __init__(self):
+        self._names: Dict[int, str] = {}
+        self._cospar: Dict[int, str] = {}
+        self._by_cospar: Dict[str, int] = {}
+        # Отсортированные массивы (название, norad_id), (слово, название, norad_id)
+        # и (COSPAR, norad_id)
+        self._sorted_names: List[Tuple[str, int]] = []
+        self._sorted_words: List[Tuple[str, str, int]] = []
+        self._sorted_cospar: List[Tuple[str, int]] = []
+        # Списки вхождений n-грамм {n-грамма: {norad_id}}
+        self._grams: Dict[str, Set[int]] = {}
+        # Словарь слов для нечеткого поиска {слово: число спутников}
+        # и триграммы слов {триграмма: {слово}}
+        self._word_counts: Dict[str, int] = {}
+        self._word_grams: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, norad_id: int, name: str, cospar_id: Optional[str] = None):
+        """Добавление или обновление одного спутника"""
+        self.add_many([(norad_id, name, cospar_id)])
+
+    def add_many(self, items: Iterable[Tuple[int, str, Optional[str]]]):
+        """
+        Пакетное добавление или обновление спутников
+
+        Спутники, у которых не изменились название и COSPAR, пропускаются;
+        замещаемые записи удаляются одним проходом по отсортированным массивам.
+
+        :param items: Кортежи (norad_id, название, COSPAR)
+        """
+        changed: Dict[int, Tuple[str, Optional[str]]] = {}
+        for norad_id, name, cospar_id in items:
+            key = normalize(name)
+            cospar = normalize(cospar_id) if cospar_id else None
+            if self._names.get(norad_id) == key and self._cospar.get(norad_id) == cospar:
+                changed.pop(norad_id, None)
+                continue
+            changed[norad_id] = (key, cospar)
+        if not changed:
+            return
+        self.remove_many([norad_id for norad_id in changed if norad_id in self._names])
+
+        for norad_id, (key, cospar) in changed.items():
+            self._names[norad_id] = key
+            self._sorted_names.append((key, norad_id))
+            for word in self._words(key):
+                self._sorted_words.append((word, key, norad_id))
+                self._add_word(word)
+            if cospar:
+                self._cospar[norad_id] = cospar
+                self._by_cospar[cospar] = norad_id
+                self._sorted_cospar.append((cospar, norad_id))
+            for gram in ngrams(key, 2) | ngrams(key, 3):
+                self._grams.setdefault(gram, set()).add(norad_id)
+
+        self._sorted_names.sort()
+        self._sorted_words.sort()
+        self._sorted_cospar.sort()
+
+    def remove(self, norad_id: int):
+        """Удаление спутника из индекса"""
+        key = self._names.get(norad_id)
+        if key is None:
+            return
+        self._delete_sorted(self._sorted_names, (key, norad_id))
+        for word in self._words(key):
+            self._delete_sorted(self._sorted_words, (word, key, norad_id))
+        cospar = self._cospar.get(norad_id)
+        if cospar is not None:
+            self._delete_sorted(self._sorted_cospar, (cospar, norad_id))
+        self._forget(norad_id)
+
+    def remove_many(self, norad_ids: Iterable[int]):
+        """
+        Пакетное удаление спутников из индекса
+
+        Отсортированные массивы перестраиваются одним фильтром,
+        а не удалением элементов по одному.
+        """
+        removed = {norad_id for norad_id in norad_ids if norad_id in self._names}
+        if not removed:
+            return
+        self._sorted_names = [item for item in self._sorted_names if item[-1] not in removed]
+        self._sorted_words = [item for item in self._sorted_words if item[-1] not in removed]
+        self._sorted_cospar = [item for item in self._sorted_cospar if item[-1] not in removed]
+        for norad_id in removed:
+            self._forget(norad_id)
+
+    def _forget(self, norad_id: int):
+        """Удаление спутника из словарей и списков n-грамм (кроме отсортированных массивов)"""
+        key = self._names.pop(norad_id)
+        for word in self._words(key):
+            self._remove_word(word)
+        cospar = self._cospar.pop(norad_id, None)
+        if cospar is not None and self._by_cospar.get(cospar) == norad_id:
+            del self._by_cospar[cospar]
+        for gram in ngrams(key, 2) | ngrams(key, 3):
+            ids = self._grams.get(gram)
+            if ids is not None:
+                ids.discard(norad_id)
+                if not ids:
+                    del self._grams[gram]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """
+        Поиск спутников с ранжированием результатов
+
+        Порядок: точный номер NORAD/COSPAR, точное название, начало названия,
+        начало слова, подстрока, нечеткое совпадение. Внутри группы — по алфавиту.
+        При заданном limit поиск останавливается, как только результатов достаточно.
+
+        :param query: Строка запроса
+        :param limit: Максимальное количество результатов
+        :return: Номера NORAD
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        results: Dict[int, None] = {}
+
+        def extend(norad_ids: Iterable[int]) -> bool:
+            for norad_id in norad_ids:
+                results.setdefault(norad_id, None)
+                if limit is not None and len(results) >= limit:
+                    return True
+            return False
+
+        # Номера NORAD и COSPAR
+        if query.isdigit() and int(query) in self._names:
+            if extend([int(query)]):
+                return list(results)
+        cospar = COSPAR_PATTERN.match(query)
+        if cospar:
+            year, number, piece = cospar.groups()
+            if extend(norad_id for _, norad_id in
+                      self._prefix_range(self._sorted_cospar, f"{year}-{number}{piece}")):
+                return list(results)
+
+        # Точное название и начало названия: в отсортированном массиве
+        # точные совпадения идут первыми
+        if extend(item[-1] for item in self._prefix_range(self._sorted_names, query)):
+            return list(results)
+
+        # Начало слова в названии (внутри слова — по алфавиту названий)
+        if extend(item[-1] for item in self._prefix_range(self._sorted_words, query)):
+            return list(results)
+
+        # Подстроки по n-граммам (запросы из одного символа ищутся только по префиксам)
+        if len(query) >= 2:
+            matched = [norad_id for norad_id in self._substring_candidates(query)
+                       if norad_id not in results and query in self._names[norad_id]]
+            if extend(self._ordered(matched, limit, len(results))):
+                return list(results)
+
+        # Нечеткое совпадение по словарю слов, если точных результатов мало
+        # (номера NORAD нечетко не сопоставляются)
+        if len(query) >= 4 and not query.isdigit() and len(results) < FUZZY_MIN_RESULTS:
+            ranges = [self._prefix_range(self._sorted_words, word)
+                      for word in self._fuzzy_words(query)]
+            extend(item[-1] for item in heapq.merge(*ranges, key=lambda item: item[1])
+                   if item[-1] not in results)
+
+        return list(results)
+
+    def _ordered(self, norad_ids: Iterable[int], limit: Optional[int], taken: int) -> List[int]:
+        """Упорядочивание по названию; при заданном limit — только нужное количество"""
+        keyed = [(self._names[norad_id], norad_id) for norad_id in norad_ids]
+        if limit is None:
+            return [norad_id for _, norad_id in sorted(keyed)]
+        return [norad_id for _, norad_id in heapq.nsmallest(limit - taken, keyed)]
+
+    def _substring_candidates(self, query: str) -> Set[int]:
+        """Кандидаты на вхождение подстроки: пересечение списков n-грамм"""
+        size = 3 if len(query) >= 3 else 2
+        postings = sorted((self._grams.get(gram, set()) for gram in ngrams(query, size)),
+                          key=len)
+        if not postings or not postings[0]:
+            return set()
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates &= ids
+            if not candidates:
+                break
+        return candidates
+
+    def _fuzzy_words(self, query: str) -> List[str]:
+        """Слова словаря, отличающиеся от запроса не более чем на 1-2 правки"""
+        limit = 1 if len(query) < 8 else 2
+        counts = Counter()
+        for gram in ngrams(query, 3):
+            counts.update(self._word_grams.get(gram, ()))
+        # Каждая правка затрагивает не более трех триграмм
+        threshold = max(1, len(query) - 2 - 3 * limit)
+        return [word for word, shared in counts.items()
+                if shared >= threshold and edit_distance(query, word, limit) <= limit]
+
+    def _add_word(self, word: str):
+        count = self._word_counts.get(word, 0)
+        self._word_counts[word] = count + 1
+        if count == 0:
+            for gram in ngrams(word, 3):
+                self._word_grams.setdefault(gram, set()).add(word)
+
+    def _remove_word(self, word: str):
+        count = self._word_counts.get(word, 0) - 1
+        if count > 0:
+            self._word_counts[word] = count
+            return
+        self._word_counts.pop(word, None)
+        for gram in ngrams(word, 3):
+            words = self._word_grams.get(gram)
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del self._word_grams[gram]
+
+    @staticmethod
+    def _words(key: str) -> List[str]:
+        return [word for word in WORD_SPLIT.split(key) if word]
+
+    @staticmethod
+    def _prefix_range(items: List[Tuple], prefix: str) -> Iterator[Tuple]:
+        """Элементы отсортированного массива, начинающиеся с префикса (без копирования)"""
+        start = bisect_left(items, (prefix,))
+        end = bisect_left(items, (prefix + '\uffff',), lo=start)
+        return (items[i] for i in range(start, end))
+
+    @staticmethod
+    def _delete_sorted(items: List[Tuple], item: Tuple):
+        index = bisect_left(items, item)
+        if index < len(items) and items[index] == item:
+            del items[index]
@@ -0,0 +1,95 @@
+from typing import Callable, List, Optional
+from PySide6.QtCore import (QAbstractListModel, QModelIndex, QObject, QRunnable,
+                            Qt, Signal)
+
+# Количество строк, подгружаемых моделью за один раз при прокрутке
+FETCH_BATCH_SIZE = 100
+
+
+class SatelliteListModel(QAbstractListModel):
+    """Модель списка спутников с ленивой подгрузкой строк при прокрутке"""
+
+    def __init__(self, name_provider: Callable[[int], str], parent=None):
+        """
+        :param name_provider: Функция norad_id -> отображаемое имя
+        """
+        super().__init__(parent)
+        self._name_provider = name_provider
+        self._ids: List[int] = []
+        self._loaded = 0
+
+    def set_results(self, norad_ids: List[int]):
+        """Замена содержимого модели новым списком номеров NORAD"""
+        self.beginResetModel()
+        self._ids = list(norad_ids)
+        self._loaded = min(FETCH_BATCH_SIZE, len(self._ids))
+        self.endResetModel()
+
+    def total_count(self) -> int:
+        """Полное количество результатов (включая еще не подгруженные)"""
+        return len(self._ids)
+
+    def norad_id(self, index: QModelIndex) -> Optional[int]:
+        """Номер NORAD для индекса модели"""
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        return self._ids[index.row()]
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._loaded
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._loaded < len(self._ids)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH_SIZE, len(self._ids) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        norad_id = self.norad_id(index)
+        if norad_id is None:
+            return None
+        if role == Qt.DisplayRole:
+            return self._name_provider(norad_id)
+        if role == Qt.UserRole:
+            return norad_id
+        return None
+
+
+class SearchSignals(QObject):
+    """Сигналы фоновой задачи поиска"""
+
+    # (номер запроса, строка запроса, номера NORAD)
+    finished = Signal(int, str, list)
+
+
+class SearchTask(QRunnable):
+    """Фоновая задача поиска спутников"""
+
+    def __init__(self, generation: int, search_term: str,
+                 search: Callable[[str], List[int]], signals: SearchSignals):
+        """
+        :param generation: Номер запроса (устаревшие результаты отбрасываются)
+        :param search_term: Строка запроса
+        :param search: Функция поиска
+        :param signals: Объект для передачи результата в поток интерфейса
+        """
+        super().__init__()
+        self.generation = generation
+        self.search_term = search_term
+        self.search = search
+        self.signals = signals
+
+    def run(self):
+        try:
+            results = self.search(self.search_term)
+        except Exception as e:
+            print(f"Ошибка поиска: {str(e)}")
+            results = []
+        self.signals.finished.emit(self.generation, self.search_term, results)
@@ -0,0 +1,117 @@
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class TleHistory:
+    """История элементов TLE в SQLite для запросов на произвольный момент времени"""
+
+    def __init__(self, db_path: str):
+        """
+        :param db_path: Путь к файлу базы истории
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """Создание таблицы истории"""
+        with self._lock, self._conn:
+            # Первичный ключ (norad_id, epoch) в таблице WITHOUT ROWID является
+            # кластерным индексом: элементы одного спутника лежат подряд по эпохам
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS tle_history (
+                norad_id INTEGER NOT NULL,
+                epoch REAL NOT NULL,
+                name TEXT,
+                tle1 TEXT NOT NULL,
+                tle2 TEXT NOT NULL,
+                fetched REAL NOT NULL,
+                PRIMARY KEY (norad_id, epoch)
+            ) WITHOUT ROWID
+            ''')
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Пакетное сохранение элементов в одной транзакции
+
+        :param records: Записи каталога ('norad_id', 'name', 'tle1', 'tle2', 'epoch')
+        :return: Количество переданных записей
+        """
+        fetched = datetime.now(timezone.utc).timestamp()
+        rows = [(r['norad_id'], r['epoch'].timestamp(), r['name'],
+                 r['tle1'], r['tle2'], fetched) for r in records]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany('''
+            INSERT OR IGNORE INTO tle_history (norad_id, epoch, name, tle1, tle2, fetched)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+        return len(rows)
+
+    def get_tle_at(self, norad_id: int, when: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает элементы с эпохой, ближайшей к указанному моменту
+
+        :param norad_id: Номер NORAD спутника
+        :param when: Момент времени (datetime в UTC)
+        :return: Словарь с 'norad_id', 'name', 'tle1', 'tle2', 'epoch' или None
+        """
+        timestamp = when.timestamp()
+        with self._lock:
+            before = self._conn.execute('''
+            SELECT norad_id, epoch, name, tle1, tle2 FROM tle_history
+            WHERE norad_id = ? AND epoch <= ? ORDER BY epoch DESC LIMIT 1
+            ''', (norad_id, timestamp)).fetchone()
+            after = self._conn.execute('''
+            SELECT norad_id, epoch, name, tle1, tle2 FROM tle_history
+            WHERE norad_id = ? AND epoch > ? ORDER BY epoch ASC LIMIT 1
+            ''', (norad_id, timestamp)).fetchone()
+
+        candidates = [row for row in (before, after) if row is not None]
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda row: abs(row[1] - timestamp))
+        return self._to_record(best)
+
+    def get_tles_at(self, norad_ids: Iterable[int], when: datetime) -> Dict[int, Dict[str, Any]]:
+        """Элементы нескольких спутников на указанный момент {norad_id: запись}"""
+        result = {}
+        for norad_id in norad_ids:
+            record = self.get_tle_at(norad_id, when)
+            if record is not None:
+                result[norad_id] = record
+        return result
+
+    def get_epochs(self, norad_id: int) -> List[datetime]:
+        """Список эпох всех сохраненных элементов спутника"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT epoch FROM tle_history WHERE norad_id = ? ORDER BY epoch',
+                (norad_id,)).fetchall()
+        return [datetime.fromtimestamp(row[0], timezone.utc) for row in rows]
+
+    def count(self) -> int:
+        """Общее количество сохраненных элементов"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM tle_history').fetchone()[0]
+
+    def close(self):
+        """Закрытие соединения"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_record(row) -> Dict[str, Any]:
+        return {
+            'norad_id': row[0],
+            'epoch': datetime.fromtimestamp(row[1], timezone.utc),
+            'name': row[2],
+            'tle1': row[3],
+            'tle2': row[4]
+        }